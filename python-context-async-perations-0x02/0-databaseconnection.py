@@ -1,4 +1,4 @@
-import sqlite3
+from connection_profiles import DEFAULT_PROFILE, connect
 
 class DatabaseConnection:
     """
@@ -7,14 +7,17 @@ class DatabaseConnection:
     Automatically opens and closes database connections using the with statement.
     """
     
-    def __init__(self, db_name='users.db'):
+    def __init__(self, db_name='users.db', profile=DEFAULT_PROFILE):
         """
         Initialize the DatabaseConnection context manager.
         
         Args:
             db_name: Name of the database file (default: 'users.db')
+            profile: Connection profile from connection_profiles
+                (default: 'default', which changes no settings)
         """
         self.db_name = db_name
+        self.profile = profile
         self.conn = None
     
     def __enter__(self):
@@ -24,7 +27,7 @@ class DatabaseConnection:
         Returns:
             The database connection object
         """
-        self.conn = sqlite3.connect(self.db_name)
+        self.conn = connect(self.db_name, self.profile)
         return self.conn
     
     def __exit__(self, exc_type, exc_val, exc_tb):
@@ -1,4 +1,4 @@
-import sqlite3
+from connection_profiles import DEFAULT_PROFILE, connect
 
 class ExecuteQuery:
     """
@@ -6,7 +6,8 @@ class ExecuteQuery:
     managing both connection and query execution.
     """
     
-    def __init__(self, query, params=None, db_name='users.db'):
+    def __init__(self, query, params=None, db_name='users.db',
+                 profile=DEFAULT_PROFILE):
         """
         Initialize the ExecuteQuery context manager.
         
@@ -14,10 +15,13 @@ class ExecuteQuery:
             query: SQL query string to execute
             params: Parameters for the query (tuple, list, or None)
             db_name: Name of the database file (default: 'users.db')
+            profile: Connection profile from connection_profiles
+                (default: 'default', which changes no settings)
         """
         self.query = query
         self.params = params
         self.db_name = db_name
+        self.profile = profile
         self.conn = None
         self.results = None
     
@@ -28,7 +32,7 @@ class ExecuteQuery:
         Returns:
             The query results
         """
-        self.conn = sqlite3.connect(self.db_name)
+        self.conn = connect(self.db_name, self.profile)
         cursor = self.conn.cursor()
         
         # Execute query with parameters if provided
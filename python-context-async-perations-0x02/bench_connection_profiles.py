@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+"""
+Benchmark of the connection profiles on a concurrent read/write workload.
+
+For every profile a fresh users database is created in a scratch
+directory. Reader threads then look users up by id and by age range while
+writer threads update emails, each commit being one small transaction,
+all on their own connections opened with that profile. Reads and writes
+per second are reported, along with the operations that failed because
+the database was locked:
+
+    python3 bench_connection_profiles.py --duration 5 --readers 4 --writers 2
+"""
+
+import argparse
+import os
+import random
+import sqlite3
+import tempfile
+import threading
+import time
+
+from connection_profiles import PROFILES, connect
+
+
+def create_database(path, rows):
+    """
+    Creates a users table with `rows` synthetic users.
+    """
+    conn = sqlite3.connect(path)
+    conn.execute("""
+    CREATE TABLE users (
+        id INTEGER PRIMARY KEY,
+        name TEXT NOT NULL,
+        email TEXT NOT NULL,
+        age INTEGER NOT NULL
+    )
+    """)
+    conn.execute("CREATE INDEX idx_users_age ON users (age)")
+    generator = random.Random(rows)
+    conn.executemany(
+        "INSERT INTO users (name, email, age) VALUES (?, ?, ?)",
+        ((f"User {i}", f"user{i}@example.com", generator.randint(18, 90))
+         for i in range(rows))
+    )
+    conn.commit()
+    conn.close()
+
+
+def _reader(path, profile, rows, stop, counts, seed):
+    conn = connect(path, profile, timeout=1.0)
+    generator = random.Random(seed)
+    reads = errors = 0
+    while not stop.is_set():
+        try:
+            if generator.random() < 0.8:
+                conn.execute("SELECT * FROM users WHERE id = ?",
+                             (generator.randint(1, rows),)).fetchone()
+            else:
+                low = generator.randint(18, 85)
+                conn.execute("SELECT COUNT(*), AVG(age) FROM users "
+                             "WHERE age BETWEEN ? AND ?",
+                             (low, low + 5)).fetchone()
+            reads += 1
+        except sqlite3.OperationalError:
+            errors += 1
+    conn.close()
+    counts.append(('read', reads, errors))
+
+
+def _writer(path, profile, rows, stop, counts, seed):
+    conn = connect(path, profile, timeout=1.0)
+    generator = random.Random(seed)
+    writes = errors = 0
+    while not stop.is_set():
+        user_id = generator.randint(1, rows)
+        try:
+            conn.execute("UPDATE users SET email = ? WHERE id = ?",
+                         (f"user{user_id}.{writes}@example.com", user_id))
+            conn.commit()
+            writes += 1
+        except sqlite3.OperationalError:
+            conn.rollback()
+            errors += 1
+    conn.close()
+    counts.append(('write', writes, errors))
+
+
+def run(profile, workdir, rows, readers, writers, duration):
+    """
+    Runs the workload against a fresh database with one profile.
+
+    Returns:
+        dict: reads/s, writes/s and locked-database errors
+    """
+    path = os.path.join(workdir, f"users_{profile}.db")
+    create_database(path, rows)
+    stop = threading.Event()
+    counts = []
+    threads = [threading.Thread(target=_reader,
+                                args=(path, profile, rows, stop, counts, i))
+               for i in range(readers)]
+    threads += [threading.Thread(target=_writer,
+                                 args=(path, profile, rows, stop, counts, -i - 1))
+                for i in range(writers)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    time.sleep(duration)
+    stop.set()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    reads = sum(n for kind, n, _ in counts if kind == 'read')
+    writes = sum(n for kind, n, _ in counts if kind == 'write')
+    return {
+        'reads_per_second': reads / elapsed,
+        'writes_per_second': writes / elapsed,
+        'errors': sum(e for _, _, e in counts),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--profiles', nargs='+', default=list(PROFILES),
+                        choices=list(PROFILES))
+    parser.add_argument('--rows', type=int, default=50000)
+    parser.add_argument('--readers', type=int, default=4)
+    parser.add_argument('--writers', type=int, default=2)
+    parser.add_argument('--duration', type=float, default=5.0,
+                        help='seconds of workload per profile')
+    args = parser.parse_args()
+
+    print(f"{args.readers} readers, {args.writers} writers, {args.rows} rows, "
+          f"{args.duration:g}s per profile")
+    print(f"{'profile':<12} {'reads/s':>10} {'writes/s':>10} {'locked':>8}")
+    with tempfile.TemporaryDirectory() as workdir:
+        for profile in args.profiles:
+            result = run(profile, workdir, args.rows, args.readers,
+                         args.writers, args.duration)
+            print(f"{profile:<12} {result['reads_per_second']:>10.0f} "
+                  f"{result['writes_per_second']:>10.0f} {result['errors']:>8}")
+
+
+if __name__ == "__main__":
+    main()
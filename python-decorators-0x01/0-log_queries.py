@@ -1,13 +1,52 @@
 import sqlite3
 import functools
+import threading
+import time
 from datetime import datetime
 
+from sql_utils import fingerprint, fingerprint_id
+
+# fingerprint -> {'id', 'calls', 'errors', 'seconds', 'max_seconds'}
+query_stats = {}
+_stats_lock = threading.Lock()
+
+
+def _record(text, seconds, failed):
+    with _stats_lock:
+        stats = query_stats.get(text)
+        if stats is None:
+            stats = query_stats[text] = {
+                'id': fingerprint_id(text), 'calls': 0, 'errors': 0,
+                'seconds': 0.0, 'max_seconds': 0.0}
+        stats['calls'] += 1
+        stats['errors'] += failed
+        stats['seconds'] += seconds
+        stats['max_seconds'] = max(stats['max_seconds'], seconds)
+
+
+def print_query_stats():
+    """
+    Prints the calls and timings of the logged queries, grouped by
+    statement fingerprint, slowest in total first.
+    """
+    with _stats_lock:
+        rows = sorted(query_stats.items(), key=lambda item: -item[1]['seconds'])
+    for text, stats in rows:
+        average = stats['seconds'] / stats['calls']
+        print(f"{stats['id']} calls={stats['calls']} errors={stats['errors']} "
+              f"avg={average * 1000:.2f}ms max={stats['max_seconds'] * 1000:.2f}ms "
+              f"{text}")
+
 #### decorator to log SQL queries
 
 def log_queries(func):
     """
     Decorator that logs SQL queries before executing them.
     
+    Each call is also timed and counted in query_stats under the query's
+    fingerprint, so variants of one statement that differ only in literals,
+    whitespace or case are grouped together.
+    
     Args:
         func: The function to be decorated
         
@@ -20,12 +59,23 @@ def log_queries(func):
         query = kwargs.get('query') or (args[0] if args else None)
         
         # Log the query if it exists
-        if query:
-            timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-            print(f"[{timestamp}] Executing query: {query}")
+        if not query:
+            return func(*args, **kwargs)
+        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        print(f"[{timestamp}] Executing query: {query}")
+        if not isinstance(query, str):
+            # Only SQL text can be fingerprinted for the statistics
+            return func(*args, **kwargs)
         
-        # Execute the original function
-        return func(*args, **kwargs)
+        # Execute the original function, timing it for the statistics
+        start = time.perf_counter()
+        failed = True
+        try:
+            result = func(*args, **kwargs)
+            failed = False
+            return result
+        finally:
+            _record(fingerprint(query)[0], time.perf_counter() - start, failed)
     
     return wrapper
 
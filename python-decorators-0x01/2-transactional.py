@@ -1,12 +1,16 @@
-import sqlite3 
 import functools
 
+from cache_invalidation import tracked_writes
+from connection_pool import get_pool
+
 def with_db_connection(func):
     """
     Decorator that automatically handles opening and closing database connections.
     
-    Opens a database connection, passes it to the function as the first argument,
-    and closes it after the function completes.
+    Borrows a connection from the shared pool for users.db, passes it to the
+    function as the first argument, and returns it to the pool after the
+    function completes. Writes the function commits invalidate cached query
+    results that read the same tables; uncommitted writes are rolled back.
     
     Args:
         func: The function to be decorated
@@ -16,14 +20,17 @@ def with_db_connection(func):
     """
     @functools.wraps(func)
     def wrapper(*args, **kwargs):
-        # Open database connection
-        conn = sqlite3.connect('users.db')
+        # Borrow a database connection from the pool
+        pool = get_pool('users.db')
+        conn = pool.acquire()
         try:
-            # Call the function with connection as first argument
-            return func(conn, *args, **kwargs)
+            # Call the function with connection as first argument; committed
+            # writes evict the cached results of the tables they touched
+            with tracked_writes(conn):
+                return func(conn, *args, **kwargs)
         finally:
-            # Always close the connection, even if an error occurs
-            conn.close()
+            # Always give the connection back, even if an error occurs
+            pool.release(conn)
     
     return wrapper
 
@@ -32,7 +39,8 @@ def transactional(func):
     Decorator that manages database transactions by automatically committing or rolling back changes.
     
     If the function raises an error, the transaction is rolled back.
-    If the function completes successfully, the transaction is committed.
+    If the function completes successfully, the transaction is committed,
+    and cached query results reading the tables it wrote are invalidated.
     
     Args:
         func: The function to be decorated
@@ -45,16 +53,19 @@ def transactional(func):
         # The connection should be the first argument (conn)
         conn = args[0] if args else None
         
-        try:
-            # Execute the function
-            result = func(*args, **kwargs)
-            # If successful, commit the transaction
-            conn.commit()
+        with tracked_writes(conn) as writes:
+            try:
+                # Execute the function
+                result = func(*args, **kwargs)
+                # If successful, commit the transaction
+                conn.commit()
+            except Exception as e:
+                # If an error occurs, rollback the transaction
+                conn.rollback()
+                raise e
+            # Evict cached results of the tables this transaction wrote
+            writes.flush()
             return result
-        except Exception as e:
-            # If an error occurs, rollback the transaction
-            conn.rollback()
-            raise e
     
     return wrapper
 
@@ -1,13 +1,17 @@
 import time
-import sqlite3 
 import functools
 
+from cache_invalidation import tracked_writes
+from connection_pool import get_pool
+
 def with_db_connection(func):
     """
     Decorator that automatically handles opening and closing database connections.
     
-    Opens a database connection, passes it to the function as the first argument,
-    and closes it after the function completes.
+    Borrows a connection from the shared pool for users.db, passes it to the
+    function as the first argument, and returns it to the pool after the
+    function completes. Writes the function commits invalidate cached query
+    results that read the same tables; uncommitted writes are rolled back.
     
     Args:
         func: The function to be decorated
@@ -17,14 +21,17 @@ def with_db_connection(func):
     """
     @functools.wraps(func)
     def wrapper(*args, **kwargs):
-        # Open database connection
-        conn = sqlite3.connect('users.db')
+        # Borrow a database connection from the pool
+        pool = get_pool('users.db')
+        conn = pool.acquire()
         try:
-            # Call the function with connection as first argument
-            return func(conn, *args, **kwargs)
+            # Call the function with connection as first argument; committed
+            # writes evict the cached results of the tables they touched
+            with tracked_writes(conn):
+                return func(conn, *args, **kwargs)
         finally:
-            # Always close the connection, even if an error occurs
-            conn.close()
+            # Always give the connection back, even if an error occurs
+            pool.release(conn)
     
     return wrapper
 
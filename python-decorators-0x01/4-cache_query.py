@@ -1,15 +1,278 @@
+import sys
 import time
-import sqlite3 
 import functools
+import threading
+from collections import OrderedDict
 
-query_cache = {}
+from cache_invalidation import register_cache, tracked_writes
+from connection_pool import get_pool
+from sql_utils import ALL_TABLES, cache_key, fingerprint, tables_read
+
+_MISSING = object()
+
+DEFAULT_MAXSIZE = 128
+DEFAULT_MAX_BYTES = 32 * 1024 * 1024
+DEFAULT_TTL = 300
+
+
+def _result_size(result):
+    """
+    Estimates the memory held by a query result (a row list or one row).
+    """
+    size = sys.getsizeof(result)
+    if isinstance(result, (list, tuple)):
+        for row in result:
+            size += sys.getsizeof(row)
+            if isinstance(row, (list, tuple)):
+                size += sum(sys.getsizeof(value) for value in row)
+    return size
+
+
+class QueryCache:
+    """
+    Bounded cache of query results with LRU eviction and per-entry TTL.
+    
+    Entries are evicted, least recently used first, when there are more
+    than maxsize of them or their estimated size exceeds max_bytes. An
+    entry older than ttl seconds is treated as a miss and dropped.
+    
+    Entries are tagged with the tables their query reads; when a write to
+    one of those tables is committed (see cache_invalidation), they are
+    invalidated. Each invalidation also bumps the tables' generation, so a
+    result computed while a write committed can be refused by put().
+    
+    Hits, misses and the time spent computing results are also counted per
+    statement fingerprint (see sql_utils.fingerprint).
+    
+    Attributes:
+        hits, misses, evictions, expirations, invalidations (int): Counters
+            since creation or the last clear()
+    """
+    
+    def __init__(self, maxsize=DEFAULT_MAXSIZE, max_bytes=DEFAULT_MAX_BYTES,
+                 ttl=DEFAULT_TTL):
+        """
+        Args:
+            maxsize: Maximum number of cached results (None for no limit)
+            max_bytes: Maximum estimated size of all results (None for no limit)
+            ttl: Seconds a result stays valid (None to never expire)
+        """
+        self.maxsize = maxsize
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        # key -> (result, size, expiry time or None, tables), oldest use first
+        self._entries = OrderedDict()
+        # table -> keys of the entries that read it
+        self._by_table = {}
+        # table -> number of invalidations; the counters below count
+        # invalidations of every table and invalidations of any table
+        self._generations = {}
+        self._all_generation = 0
+        self._any_generation = 0
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+        # fingerprint -> {'hits', 'misses', 'seconds'}
+        self._fingerprints = {}
+        register_cache(self)
+    
+    def get(self, key, default=None):
+        """
+        Returns the cached result for key, or default on a miss.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return default
+            result, size, expires, _ = entry
+            if expires is not None and time.monotonic() >= expires:
+                self._remove(key)
+                self.expirations += 1
+                self.misses += 1
+                return default
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return result
+    
+    def _generation(self, tables):
+        any_generation = self._any_generation if ALL_TABLES in tables else None
+        return (self._all_generation, any_generation,
+                tuple(self._generations.get(table, 0) for table in sorted(tables)))
+    
+    def generation(self, tables):
+        """
+        Returns a token that changes whenever any of tables is invalidated.
+        
+        Read it before computing a result and pass it to put(), so a result
+        that a write made stale while it was computed is not stored.
+        
+        Args:
+            tables: Names of the tables a query reads
+        """
+        with self._lock:
+            return self._generation(frozenset(tables))
+    
+    def put(self, key, result, tables=(), generation=None):
+        """
+        Stores a result, evicting least recently used entries to make room.
+        
+        A result larger than max_bytes on its own is not cached, nor is one
+        whose tables were invalidated after generation was read.
+        
+        Args:
+            key: Cache key, usually the query
+            result: Query result
+            tables: Names of the tables the query reads
+            generation: Token from generation(tables) taken before the
+                result was computed, or None to store unconditionally
+        """
+        size = _result_size(result)
+        tables = frozenset(tables)
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            if self.max_bytes is not None and size > self.max_bytes:
+                return
+            if generation is not None and generation != self._generation(tables):
+                return
+            expires = time.monotonic() + self.ttl if self.ttl is not None else None
+            self._entries[key] = (result, size, expires, tables)
+            self._bytes += size
+            for table in tables:
+                self._by_table.setdefault(table, set()).add(key)
+            while self._entries and (
+                (self.maxsize is not None and len(self._entries) > self.maxsize)
+                or (self.max_bytes is not None and self._bytes > self.max_bytes)
+            ):
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self.evictions += 1
+    
+    def _remove(self, key):
+        _, size, _, tables = self._entries.pop(key)
+        self._bytes -= size
+        for table in tables:
+            keys = self._by_table[table]
+            keys.discard(key)
+            if not keys:
+                del self._by_table[table]
+    
+    def invalidate_tables(self, tables):
+        """
+        Drops the cached results whose query read any of the given tables,
+        and those whose tables could not be determined.
+        
+        Args:
+            tables: Table names; ALL_TABLES drops every entry
+        """
+        with self._lock:
+            self._any_generation += 1
+            if ALL_TABLES in tables:
+                self._all_generation += 1
+                keys = list(self._entries)
+            else:
+                # Entries whose tables are unknown go on any write
+                keys = set(self._by_table.get(ALL_TABLES, ()))
+                for table in tables:
+                    self._generations[table] = self._generations.get(table, 0) + 1
+                    keys |= self._by_table.get(table, set())
+            for key in keys:
+                self._remove(key)
+            self.invalidations += len(keys)
+    
+    def invalidate(self, key):
+        """
+        Drops one cached result if present.
+        """
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+    
+    def clear(self):
+        """
+        Drops every cached result and resets the counters.
+        """
+        with self._lock:
+            self._entries.clear()
+            self._by_table.clear()
+            self._fingerprints.clear()
+            self._bytes = 0
+            self.hits = self.misses = self.evictions = self.expirations = 0
+            self.invalidations = 0
+    
+    def __contains__(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            return entry is not None and (
+                entry[2] is None or time.monotonic() < entry[2])
+    
+    def __len__(self):
+        return len(self._entries)
+    
+    def record(self, fingerprint, hit, seconds=0.0):
+        """
+        Counts one lookup for a statement fingerprint.
+        
+        Args:
+            fingerprint: Normalized statement text
+            hit: Whether the result came from the cache
+            seconds: Time spent computing the result on a miss
+        """
+        with self._lock:
+            stats = self._fingerprints.get(fingerprint)
+            if stats is None:
+                stats = self._fingerprints[fingerprint] = {
+                    'hits': 0, 'misses': 0, 'seconds': 0.0}
+            stats['hits' if hit else 'misses'] += 1
+            stats['seconds'] += seconds
+    
+    def fingerprint_stats(self):
+        """
+        Returns the per-fingerprint counters, most used first.
+        
+        Returns:
+            Dictionary of fingerprint -> {'hits', 'misses', 'seconds'}
+        """
+        with self._lock:
+            ordered = sorted(self._fingerprints.items(),
+                             key=lambda item: -(item[1]['hits'] + item[1]['misses']))
+            return {text: dict(stats) for text, stats in ordered}
+    
+    def info(self):
+        """
+        Returns the counters and current usage as a dictionary.
+        """
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+                'invalidations': self.invalidations,
+                'entries': len(self._entries),
+                'bytes': self._bytes,
+                'maxsize': self.maxsize,
+                'max_bytes': self.max_bytes,
+                'ttl': self.ttl,
+            }
+
+
+# Shared cache used by a bare @cache_query
+query_cache = QueryCache()
 
 def with_db_connection(func):
     """
     Decorator that automatically handles opening and closing database connections.
     
-    Opens a database connection, passes it to the function as the first argument,
-    and closes it after the function completes.
+    Borrows a connection from the shared pool for users.db, passes it to the
+    function as the first argument, and returns it to the pool after the
+    function completes. Writes the function commits invalidate cached query
+    results that read the same tables; uncommitted writes are rolled back.
     
     Args:
         func: The function to be decorated
@@ -19,44 +282,93 @@ def with_db_connection(func):
     """
     @functools.wraps(func)
     def wrapper(*args, **kwargs):
-        # Open database connection
-        conn = sqlite3.connect('users.db')
+        # Borrow a database connection from the pool
+        pool = get_pool('users.db')
+        conn = pool.acquire()
         try:
-            # Call the function with connection as first argument
-            return func(conn, *args, **kwargs)
+            # Call the function with connection as first argument; committed
+            # writes evict the cached results of the tables they touched
+            with tracked_writes(conn):
+                return func(conn, *args, **kwargs)
         finally:
-            # Always close the connection, even if an error occurs
-            conn.close()
+            # Always give the connection back, even if an error occurs
+            pool.release(conn)
     
     return wrapper
 
-def cache_query(func):
+def cache_query(func=None, *, maxsize=None, max_bytes=None, ttl=None, cache=None):
     """
     Decorator that caches the results of database queries to avoid redundant calls.
     
-    Caches query results based on the SQL query string. If the same query is executed
-    again, the cached result is returned instead of executing the query again.
+    Caches query results based on the normalized SQL query and the other
+    arguments, such as bound parameters. If the same query is executed again,
+    even with different whitespace or case, the cached result is returned
+    instead of executing the query again, until a committed write to one of
+    the tables the query reads evicts it.
+    
+    Use it bare (@cache_query) to share the module's query_cache, or with
+    limits (@cache_query(maxsize=100, ttl=30)) to give the function its own
+    QueryCache. The cache is available as wrapper.cache, its counters
+    through wrapper.cache_info() and wrapper.fingerprint_stats().
     
     Args:
         func: The function to be decorated
+        maxsize: Maximum number of cached results
+        max_bytes: Maximum estimated size of the cached results
+        ttl: Seconds a cached result stays valid
+        cache: An existing QueryCache to use instead (e.g. one built with
+            ttl=None for results that never expire)
         
     Returns:
         Wrapped function that caches query results
     """
+    if func is None:
+        return functools.partial(cache_query, maxsize=maxsize,
+                                 max_bytes=max_bytes, ttl=ttl, cache=cache)
+    
+    if cache is None:
+        if maxsize is None and max_bytes is None and ttl is None:
+            cache = query_cache
+        else:
+            # Limits left out keep their defaults
+            cache = QueryCache(
+                maxsize if maxsize is not None else DEFAULT_MAXSIZE,
+                max_bytes if max_bytes is not None else DEFAULT_MAX_BYTES,
+                ttl if ttl is not None else DEFAULT_TTL,
+            )
+    
     @functools.wraps(func)
     def wrapper(*args, **kwargs):
         # Extract the query string from kwargs or args
         query = kwargs.get('query') or (args[1] if len(args) > 1 else None)
+        if not isinstance(query, str):
+            return func(*args, **kwargs)
+        
+        # Key on the fingerprint, its literals and every other argument
+        params = (args[2:], tuple(sorted(
+            (name, value) for name, value in kwargs.items() if name != 'query')))
+        key = cache_key(query, params)
+        text = fingerprint(query)[0]
         
         # Check if query result is in cache
-        if query in query_cache:
-            return query_cache[query]
+        result = cache.get(key, _MISSING)
+        if result is not _MISSING:
+            cache.record(text, True)
+            return result
         
-        # Execute the function and cache the result
+        # Execute the function and cache the result, unless a write to its
+        # tables committed in the meantime
+        tables = tables_read(query)
+        generation = cache.generation(tables)
+        start = time.perf_counter()
         result = func(*args, **kwargs)
-        query_cache[query] = result
+        cache.record(text, False, time.perf_counter() - start)
+        cache.put(key, result, tables, generation)
         return result
     
+    wrapper.cache = cache
+    wrapper.cache_info = cache.info
+    wrapper.fingerprint_stats = cache.fingerprint_stats
     return wrapper
 
 @with_db_connection
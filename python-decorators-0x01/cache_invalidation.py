@@ -0,0 +1,106 @@
+import threading
+import weakref
+from contextlib import contextmanager
+
+from sql_utils import tables_written
+
+# Result caches to notify of committed writes; each has invalidate_tables()
+_caches = weakref.WeakSet()
+
+# id(connection) -> WriteTracker of the connections being tracked
+_trackers = {}
+_trackers_lock = threading.Lock()
+
+
+def register_cache(cache):
+    """
+    Registers a cache to be told which tables committed writes touched.
+
+    The cache is held weakly and must provide invalidate_tables(tables).
+    """
+    _caches.add(cache)
+
+
+def invalidate_tables(tables):
+    """
+    Evicts the cached results that read any of the given tables.
+
+    Args:
+        tables: Iterable of table names, or containing ALL_TABLES
+    """
+    tables = set(tables)
+    if not tables:
+        return
+    for cache in list(_caches):
+        cache.invalidate_tables(tables)
+
+
+class WriteTracker:
+    """
+    Records the tables written on a sqlite3 connection.
+
+    Statements are observed through the connection's trace callback. Writes
+    become committed when a COMMIT is traced, or when the connection is
+    found outside a transaction (autocommitted statements), and are dropped
+    on ROLLBACK. flush() evicts the cached results of committed writes.
+    """
+
+    def __init__(self, conn):
+        self.conn = conn
+        self.pending = set()
+        self.committed = set()
+
+    def trace(self, statement):
+        keyword = statement.lstrip()[:8].upper()
+        if keyword.startswith(('COMMIT', 'END')):
+            self.committed |= self.pending
+            self.pending.clear()
+        elif keyword.startswith('ROLLBACK') and 'TO' not in statement.upper().split():
+            self.pending.clear()
+        else:
+            self.pending |= tables_written(statement)
+
+    def flush(self):
+        """
+        Invalidates the tables of every write that has been committed.
+        """
+        if not self.conn.in_transaction:
+            self.committed |= self.pending
+            self.pending.clear()
+        if self.committed:
+            tables, self.committed = self.committed, set()
+            invalidate_tables(tables)
+
+
+@contextmanager
+def tracked_writes(conn):
+    """
+    Context manager tracking the writes made on conn while it is active.
+
+    Committed writes are flushed on exit; writes still uncommitted then
+    are left for the enclosing tracker, if any, or dropped, since closing
+    the connection rolls them back. Nested uses share one tracker. The
+    connection's trace callback is replaced while tracking.
+
+    Yields:
+        The WriteTracker for conn
+    """
+    with _trackers_lock:
+        tracker = _trackers.get(id(conn))
+        owner = tracker is None or tracker.conn is not conn
+        if owner:
+            tracker = WriteTracker(conn)
+            _trackers[id(conn)] = tracker
+    if not owner:
+        yield tracker
+        return
+    conn.set_trace_callback(tracker.trace)
+    try:
+        yield tracker
+    finally:
+        try:
+            tracker.flush()
+        finally:
+            conn.set_trace_callback(None)
+            with _trackers_lock:
+                _trackers.pop(id(conn), None)
@@ -0,0 +1,388 @@
+import atexit
+import os
+import sqlite3
+import threading
+import time
+
+from connection_profiles import DEFAULT_PROFILE, connect
+
+
+# Per-connection settings a borrower might change with PRAGMA. They are
+# read in one statement when a connection opens and again on release; a
+# connection whose settings differ is closed instead of reused.
+_SETTINGS_QUERY = (
+    "SELECT * FROM pragma_synchronous, pragma_cache_size, pragma_temp_store,"
+    " pragma_foreign_keys, pragma_query_only, pragma_busy_timeout,"
+    " pragma_journal_mode, pragma_locking_mode, pragma_recursive_triggers,"
+    " pragma_automatic_index"
+)
+
+
+class _Pooled:
+    """
+    A pooled connection and its bookkeeping.
+    """
+
+    __slots__ = ('conn', 'created', 'last_used', 'isolation_level',
+                 'settings')
+
+    def __init__(self, conn):
+        self.conn = conn
+        self.created = self.last_used = time.monotonic()
+        self.isolation_level = conn.isolation_level
+        self.settings = conn.execute(_SETTINGS_QUERY).fetchone()
+
+
+class ConnectionPool:
+    """
+    Thread-safe pool of sqlite3 connections to one database.
+
+    Connections are opened with check_same_thread=False so they can be
+    handed to any thread, but each thread gets back the connection it last
+    released when that one is idle. Between min_size and max_size
+    connections are kept; acquire() waits when all max_size are in use.
+    A connection idle for longer than health_check_after seconds is checked
+    with SELECT 1 before it is handed out, and connections older than
+    max_lifetime seconds are replaced. Opening and checking connections
+    happen outside the pool's lock, on a slot reserved under it.
+
+    Released connections are rolled back and get their row_factory,
+    text_factory, isolation_level and callbacks reset, so nothing a
+    borrower did leaks to the next one; connections whose PRAGMA settings
+    were changed are closed instead.
+
+    New connections are configured with a connection profile (see
+    connection_profiles); the default one leaves SQLite's settings alone.
+    """
+
+    def __init__(self, database='users.db', min_size=1, max_size=8,
+                 max_lifetime=300.0, health_check_after=30.0, timeout=10.0,
+                 profile=DEFAULT_PROFILE, **connect_kwargs):
+        """
+        Args:
+            database: Path of the SQLite database
+            min_size: Connections opened up front and kept open
+            max_size: Most connections open at once
+            max_lifetime: Seconds after which a connection is replaced
+                (None to keep connections forever)
+            health_check_after: Idle seconds after which a connection is
+                checked before use
+            timeout: Default seconds acquire() waits for a free connection
+            profile: Connection profile applied to new connections
+            **connect_kwargs: Further arguments for sqlite3.connect
+        """
+        if not 0 <= min_size <= max_size or max_size < 1:
+            raise ValueError("Need 0 <= min_size <= max_size and max_size >= 1")
+        self.database = database
+        self.min_size = min_size
+        self.max_size = max_size
+        self.max_lifetime = max_lifetime
+        self.health_check_after = health_check_after
+        self.timeout = timeout
+        self.profile = profile
+        self.connect_kwargs = connect_kwargs
+        self._idle = []
+        self._in_use = {}
+        # Slots held by connections being opened, checked or reset
+        self._reserved = 0
+        self._local = threading.local()
+        self._condition = threading.Condition()
+        self._closed = False
+        # Metrics
+        self._started = self._last_change = time.monotonic()
+        self._busy_seconds = 0.0
+        self.acquisitions = 0
+        self.waits = 0
+        self.wait_seconds = 0.0
+        self.max_wait_seconds = 0.0
+        self.affinity_hits = 0
+        self.created = 0
+        self.discarded = 0
+        self.failed_checks = 0
+        self.peak_in_use = 0
+        for _ in range(min_size):
+            self._idle.append(self._open())
+        self.created = min_size
+
+    def _open(self):
+        conn = connect(self.database, self.profile, check_same_thread=False,
+                       **self.connect_kwargs)
+        return _Pooled(conn)
+
+    @staticmethod
+    def _close(pooled):
+        try:
+            pooled.conn.close()
+        except sqlite3.Error:
+            pass
+
+    def _expired(self, pooled, now):
+        return (self.max_lifetime is not None
+                and now - pooled.created >= self.max_lifetime)
+
+    def _healthy(self, pooled, now):
+        if now - pooled.last_used < self.health_check_after:
+            return True
+        try:
+            pooled.conn.execute("SELECT 1").fetchone()
+            return True
+        except sqlite3.Error:
+            return False
+
+    @staticmethod
+    def _reset(pooled):
+        """
+        Undoes what a borrower changed on a connection.
+
+        Returns:
+            bool: False if the connection is broken or its PRAGMA settings
+                differ from when it was opened
+        """
+        conn = pooled.conn
+        try:
+            conn.rollback()
+            conn.row_factory = None
+            conn.text_factory = str
+            conn.isolation_level = pooled.isolation_level
+            conn.set_trace_callback(None)
+            conn.set_authorizer(None)
+            conn.set_progress_handler(None, 0)
+            return conn.execute(_SETTINGS_QUERY).fetchone() == pooled.settings
+        except sqlite3.Error:
+            return False
+
+    def _account(self, now):
+        # Integrates in-use connections over time for utilization()
+        self._busy_seconds += len(self._in_use) * (now - self._last_change)
+        self._last_change = now
+
+    def _take_idle(self):
+        """
+        Pops an idle connection, preferring this thread's last one.
+        """
+        preferred = getattr(self._local, 'pooled', None)
+        if preferred is not None and preferred in self._idle:
+            self._idle.remove(preferred)
+            self.affinity_hits += 1
+            return preferred
+        return self._idle.pop()
+
+    def _reserve(self, start, timeout):
+        """
+        Waits for an idle connection or a free slot; called with the lock.
+
+        Returns:
+            tuple: (idle _Pooled or None for a slot to open, waited)
+        """
+        waited = False
+        while True:
+            if self._closed:
+                raise RuntimeError("Connection pool is closed")
+            if self._idle:
+                pooled = self._take_idle()
+                break
+            if len(self._in_use) + self._reserved < self.max_size:
+                pooled = None
+                break
+            remaining = timeout - (time.monotonic() - start)
+            if remaining <= 0:
+                raise TimeoutError(
+                    f"No connection to {self.database} free after {timeout}s")
+            waited = True
+            self._condition.wait(remaining)
+        self._reserved += 1
+        return pooled, waited
+
+    def acquire(self, timeout=None):
+        """
+        Borrows a connection, waiting up to timeout seconds for one.
+
+        Returns:
+            A sqlite3.Connection to give back with release()
+
+        Raises:
+            TimeoutError: If no connection became free in time
+            RuntimeError: If the pool is closed
+        """
+        timeout = self.timeout if timeout is None else timeout
+        start = time.monotonic()
+        waited = False
+        while True:
+            with self._condition:
+                pooled, waited_now = self._reserve(start, timeout)
+            waited = waited or waited_now
+            # The slot is ours: open or check the connection without
+            # holding up the other borrowers
+            opened = failed = False
+            try:
+                if pooled is None:
+                    pooled = self._open()
+                    opened = True
+                else:
+                    now = time.monotonic()
+                    if self._expired(pooled, now):
+                        self._close(pooled)
+                        pooled = None
+                    elif not self._healthy(pooled, now):
+                        failed = True
+                        self._close(pooled)
+                        pooled = None
+            except BaseException:
+                with self._condition:
+                    self._reserved -= 1
+                    self._condition.notify()
+                raise
+
+            with self._condition:
+                self._reserved -= 1
+                if opened:
+                    self.created += 1
+                if pooled is None:
+                    self.discarded += 1
+                    self.failed_checks += failed
+                    continue
+                if self._closed:
+                    self.discarded += 1
+                    self._close(pooled)
+                    raise RuntimeError("Connection pool is closed")
+                wait = time.monotonic() - start
+                self.acquisitions += 1
+                if waited:
+                    self.waits += 1
+                self.wait_seconds += wait
+                self.max_wait_seconds = max(self.max_wait_seconds, wait)
+                self._account(time.monotonic())
+                self._in_use[id(pooled.conn)] = pooled
+                self.peak_in_use = max(self.peak_in_use, len(self._in_use))
+                self._local.pooled = pooled
+                return pooled.conn
+
+    def release(self, conn):
+        """
+        Gives a borrowed connection back to the pool.
+
+        Uncommitted work is rolled back and the connection's state reset.
+        Broken, expired or reconfigured connections are closed, and
+        replaced if the pool drops below min_size.
+        """
+        with self._condition:
+            if id(conn) not in self._in_use:
+                return
+            now = time.monotonic()
+            self._account(now)
+            pooled = self._in_use.pop(id(conn))
+            # Keeps the slot taken while the connection is reset
+            self._reserved += 1
+
+        keep = self._reset(pooled) and not self._expired(pooled, now)
+        if not keep:
+            self._close(pooled)
+
+        with self._condition:
+            self._reserved -= 1
+            if keep and not self._closed:
+                pooled.last_used = now
+                self._idle.append(pooled)
+                self._condition.notify()
+                return
+            if keep:
+                self._close(pooled)
+            self.discarded += 1
+            replace = (not self._closed and len(self._idle) + len(self._in_use)
+                       + self._reserved < self.min_size)
+            if replace:
+                self._reserved += 1
+            else:
+                self._condition.notify()
+                return
+
+        try:
+            pooled = self._open()
+        except sqlite3.Error:
+            pooled = None
+        with self._condition:
+            self._reserved -= 1
+            if pooled is not None:
+                self.created += 1
+                self._idle.append(pooled)
+            self._condition.notify()
+
+    def close(self):
+        """
+        Closes the idle connections; borrowed ones are closed on release.
+        """
+        with self._condition:
+            self._closed = True
+            idle, self._idle = self._idle, []
+            self.discarded += len(idle)
+            self._condition.notify_all()
+        for pooled in idle:
+            self._close(pooled)
+
+    def utilization(self):
+        """
+        Average fraction of max_size in use since the pool was created.
+        """
+        with self._condition:
+            now = time.monotonic()
+            self._account(now)
+            elapsed = now - self._started
+            return self._busy_seconds / (elapsed * self.max_size) if elapsed else 0.0
+
+    def metrics(self):
+        """
+        Returns the pool's size, wait-time and utilization counters.
+        """
+        utilization = self.utilization()
+        with self._condition:
+            return {
+                'size': len(self._idle) + len(self._in_use),
+                'idle': len(self._idle),
+                'in_use': len(self._in_use),
+                'peak_in_use': self.peak_in_use,
+                'max_size': self.max_size,
+                'utilization': utilization,
+                'acquisitions': self.acquisitions,
+                'waits': self.waits,
+                'wait_seconds': self.wait_seconds,
+                'avg_wait_seconds': (self.wait_seconds / self.acquisitions
+                                     if self.acquisitions else 0.0),
+                'max_wait_seconds': self.max_wait_seconds,
+                'affinity_hits': self.affinity_hits,
+                'created': self.created,
+                'discarded': self.discarded,
+                'failed_checks': self.failed_checks,
+            }
+
+
+# Absolute database path -> shared ConnectionPool
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(database='users.db', **options):
+    """
+    Returns the shared pool for a database, creating it on first use.
+
+    Args:
+        database: Path of the SQLite database, resolved against the
+            current directory
+        **options: ConnectionPool arguments, used when the pool is created
+    """
+    path = os.path.abspath(database)
+    with _pools_lock:
+        pool = _pools.get(path)
+        if pool is None:
+            pool = _pools[path] = ConnectionPool(path, **options)
+        return pool
+
+
+@atexit.register
+def close_pools():
+    """
+    Closes every shared pool.
+    """
+    with _pools_lock:
+        for pool in _pools.values():
+            pool.close()
+        _pools.clear()
@@ -0,0 +1,98 @@
+# The same module lives in python-decorators-0x01 and
+# python-context-async-perations-0x02, which are run standalone like every
+# project directory here; keep the two copies identical.
+
+import sqlite3
+
+# Profile used when a caller does not pick one. It issues no PRAGMAs, so
+# an existing database keeps its journal mode and commit durability; the
+# tuned profiles are opt-in because WAL mode persists on the file and
+# synchronous=NORMAL/OFF can lose the last commits on power failure.
+DEFAULT_PROFILE = 'default'
+
+# name -> PRAGMA settings applied when a connection opens, plus the size of
+# the connection's prepared statement cache. 'default' keeps SQLite's own
+# settings (rollback journal, synchronous=FULL).
+PROFILES = {
+    'default': {
+        'pragmas': [],
+        'cached_statements': 128,
+    },
+    # Many concurrent readers and occasional writes: WAL lets readers run
+    # while a writer commits, and a large mmap/cache serves reads from memory
+    'read_heavy': {
+        'pragmas': [
+            ('journal_mode', 'WAL'),
+            ('synchronous', 'NORMAL'),
+            ('mmap_size', 256 * 1024 * 1024),
+            ('cache_size', -64 * 1024),
+            ('temp_store', 'MEMORY'),
+        ],
+        'cached_statements': 256,
+    },
+    # Frequent small transactions: WAL with synchronous=NORMAL syncs at
+    # checkpoints instead of on every commit
+    'write_heavy': {
+        'pragmas': [
+            ('journal_mode', 'WAL'),
+            ('synchronous', 'NORMAL'),
+            ('mmap_size', 64 * 1024 * 1024),
+            ('cache_size', -32 * 1024),
+            ('temp_store', 'MEMORY'),
+        ],
+        'cached_statements': 128,
+    },
+    # One-off loads that can be redone: no syncs at all, so the last
+    # transactions may be lost on power failure
+    'bulk_load': {
+        'pragmas': [
+            ('journal_mode', 'WAL'),
+            ('synchronous', 'OFF'),
+            ('mmap_size', 256 * 1024 * 1024),
+            ('cache_size', -256 * 1024),
+            ('temp_store', 'MEMORY'),
+        ],
+        'cached_statements': 32,
+    },
+}
+
+
+def _settings(profile):
+    try:
+        return PROFILES[profile]
+    except KeyError:
+        raise ValueError(f"Unknown connection profile: {profile!r}; "
+                         f"choose from {', '.join(PROFILES)}") from None
+
+
+def apply_profile(conn, profile=DEFAULT_PROFILE):
+    """
+    Applies a profile's PRAGMA settings to an open connection.
+
+    Args:
+        conn: sqlite3.Connection, outside a transaction
+        profile: Name of a profile in PROFILES
+
+    Returns:
+        The connection
+    """
+    for name, value in _settings(profile)['pragmas']:
+        conn.execute(f"PRAGMA {name} = {value}").fetchall()
+    return conn
+
+
+def connect(database='users.db', profile=DEFAULT_PROFILE, **kwargs):
+    """
+    Opens a sqlite3 connection configured with a named profile.
+
+    Args:
+        database: Path of the SQLite database
+        profile: Name of a profile in PROFILES
+        **kwargs: Further arguments for sqlite3.connect
+
+    Returns:
+        sqlite3.Connection
+    """
+    settings = _settings(profile)
+    kwargs.setdefault('cached_statements', settings['cached_statements'])
+    return apply_profile(sqlite3.connect(database, **kwargs), profile)
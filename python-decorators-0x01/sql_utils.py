@@ -0,0 +1,269 @@
+import functools
+import hashlib
+import re
+
+# Returned when the tables of a statement cannot be determined
+ALL_TABLES = '*'
+
+_NAME = r'(?:main\.|temp\.)?["`\[]?(\w+)["`\]]?'
+
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+_COMMENT = re.compile(r'--[^\n]*|/\*.*?\*/', re.DOTALL)
+
+# Identifiers (quoted or dotted), then any other single character
+_READ_TOKEN = re.compile(r'"(?:[^"]|"")*"|`[^`]*`|\[[^\]]*\]|\w+(?:\.\w+)*|\S')
+
+_JOIN_WORDS = {'JOIN', 'NATURAL', 'LEFT', 'RIGHT', 'FULL', 'OUTER', 'INNER',
+               'CROSS'}
+_CLAUSE_END = {'WHERE', 'GROUP', 'ORDER', 'LIMIT', 'HAVING', 'UNION',
+               'INTERSECT', 'EXCEPT', 'WINDOW', 'OFFSET', 'RETURNING'}
+_NOT_ALIAS = _JOIN_WORDS | _CLAUSE_END | {'ON', 'USING', 'AS', 'INDEXED',
+                                         'NOT', 'SELECT', 'VALUES'}
+
+_WRITE_PATTERNS = [
+    re.compile(r'\b(?:INSERT|REPLACE)\s+(?:OR\s+\w+\s+)?INTO\s+' + _NAME,
+               re.IGNORECASE),
+    re.compile(r'\bUPDATE\s+(?:OR\s+\w+\s+)?' + _NAME, re.IGNORECASE),
+    re.compile(r'\bDELETE\s+FROM\s+' + _NAME, re.IGNORECASE),
+    re.compile(r'\b(?:CREATE|DROP|ALTER)\s+(?:TEMP\w*\s+)?TABLE\s+'
+               r'(?:IF\s+(?:NOT\s+)?EXISTS\s+)?' + _NAME, re.IGNORECASE),
+]
+
+_WRITE_KEYWORD = re.compile(r'\b(?:INSERT|REPLACE|UPDATE|DELETE|CREATE|DROP|ALTER)\b',
+                            re.IGNORECASE)
+
+
+def _strip(query):
+    """
+    Removes comments and string literals so their words are not read as SQL.
+    """
+    return _STRING_LITERAL.sub("''", _COMMENT.sub(' ', query))
+
+
+def _is_name(token):
+    return token[0] in '"`[' or token[0].isalpha() or token[0] == '_'
+
+
+def _table_name(token):
+    if token[0] in '"`[':
+        return token[1:-1].lower()
+    return token.rsplit('.', 1)[-1].lower()
+
+
+def _skip_parens(tokens, i):
+    """
+    Returns the index after the parenthesis closing the one at i, or None.
+    """
+    depth = 0
+    for j in range(i, len(tokens)):
+        if tokens[j] == '(':
+            depth += 1
+        elif tokens[j] == ')':
+            depth -= 1
+            if depth == 0:
+                return j + 1
+    return None
+
+
+def _skip_constraint(tokens, i):
+    """
+    Returns the index of the token ending the ON/USING expression at i.
+    """
+    depth = 0
+    while i < len(tokens):
+        token = tokens[i]
+        if token == '(':
+            depth += 1
+        elif token == ')':
+            if depth == 0:
+                break
+            depth -= 1
+        elif depth == 0 and (token in (',', ';')
+                             or token.upper() in _JOIN_WORDS | _CLAUSE_END):
+            break
+        i += 1
+    return i
+
+
+def _parse_from(tokens, i, tables):
+    """
+    Adds the tables of the FROM clause starting at tokens[i] to tables.
+
+    Subqueries are skipped here, since their own FROM is parsed separately.
+
+    Returns:
+        False if the clause has a shape that is not understood
+    """
+    while True:
+        if i >= len(tokens):
+            return False
+        token = tokens[i]
+        if token == '(':
+            i = _skip_parens(tokens, i)
+            if i is None:
+                return False
+        elif _is_name(token) and token.upper() not in _NOT_ALIAS:
+            if i + 1 < len(tokens) and tokens[i + 1] == '(':
+                # Table-valued function
+                return False
+            tables.add(_table_name(token))
+            i += 1
+        else:
+            return False
+        # Alias
+        if i < len(tokens) and tokens[i].upper() == 'AS':
+            i += 2
+        elif (i < len(tokens) and _is_name(tokens[i])
+              and tokens[i].upper() not in _NOT_ALIAS):
+            i += 1
+        if i < len(tokens) and tokens[i].upper() in ('ON', 'USING'):
+            i = _skip_constraint(tokens, i + 1)
+        # What follows the item: the end of the clause or another item
+        if (i >= len(tokens) or tokens[i] in (')', ';')
+                or tokens[i].upper() in _CLAUSE_END):
+            return True
+        if tokens[i] == ',':
+            i += 1
+        elif tokens[i].upper() in _JOIN_WORDS:
+            while i < len(tokens) and tokens[i].upper() in _JOIN_WORDS:
+                i += 1
+        else:
+            return False
+
+
+def tables_read(query):
+    """
+    Returns the tables a statement reads from.
+
+    Every FROM clause is parsed, including those of subqueries, with its
+    comma-separated and joined tables; names are lowercased. Views and CTE
+    names are returned as they appear. When a FROM clause has a shape that
+    is not understood, {ALL_TABLES} is returned, so callers invalidate on
+    any write instead of missing a table.
+
+    Args:
+        query: SQL statement
+
+    Returns:
+        Set of table names
+    """
+    tokens = _READ_TOKEN.findall(_strip(query))
+    tables = set()
+    for i, token in enumerate(tokens):
+        if token.upper() == 'FROM' and not _parse_from(tokens, i + 1, tables):
+            return {ALL_TABLES}
+    return tables
+
+
+def tables_written(query):
+    """
+    Returns the tables a statement writes to.
+
+    Args:
+        query: SQL statement
+
+    Returns:
+        Set of table names; empty for statements that do not write, and
+        {ALL_TABLES} for writes whose table could not be determined
+    """
+    query = _strip(query)
+    tables = set()
+    for pattern in _WRITE_PATTERNS:
+        tables.update(name.lower() for name in pattern.findall(query))
+    if not tables and _WRITE_KEYWORD.search(query):
+        # Better to evict too much than to serve stale results
+        tables.add(ALL_TABLES)
+    return tables
+
+
+_TOKEN = re.compile(r"""
+    (?P<comment>--[^\n]*|/\*.*?\*/)
+  | (?P<string>'(?:[^']|'')*')
+  | (?P<quoted>"(?:[^"]|"")*"|`[^`]*`|\[[^\]]*\])
+  | (?P<number>(?<![\w.])\d+(?:\.\d+)?(?:[eE][-+]?\d+)?(?![\w.]))
+""", re.VERBOSE | re.DOTALL)
+
+_OPERATOR = re.compile(r'(<=|>=|<>|!=|==|=|<|>)')
+
+_IN_LIST = re.compile(r'\bin ?\(\?(?:, \?)*\)')
+
+
+@functools.lru_cache(maxsize=1024)
+def fingerprint(query):
+    """
+    Normalizes a statement into a fingerprint shared by all its variants.
+
+    Comments are dropped, whitespace is collapsed (and comparison
+    operators get one space on each side), everything but quoted
+    identifiers is lowercased, string and number literals become ``?``
+    and lists of values in IN (...) collapse to ``in (...)``. So
+    ``SELECT * FROM users WHERE id IN (1, 2)`` and
+    ``select *  from USERS where id in (3,4,5)`` share one fingerprint.
+
+    Args:
+        query: SQL statement
+
+    Returns:
+        Tuple (fingerprint, literals), where literals are the source text
+        of the replaced literals in order
+    """
+    pieces = []
+    quoted = []
+    literals = []
+    position = 0
+    for match in _TOKEN.finditer(query):
+        pieces.append(query[position:match.start()].lower())
+        kind = match.lastgroup
+        if kind == 'comment':
+            pieces.append(' ')
+        elif kind == 'quoted':
+            # Kept verbatim, behind a marker the normalization leaves alone
+            pieces.append(f'\x00{len(quoted)}\x00')
+            quoted.append(match.group())
+        else:
+            pieces.append('?')
+            literals.append(match.group())
+        position = match.end()
+    pieces.append(query[position:].lower())
+
+    text = _OPERATOR.sub(r' \1 ', ''.join(pieces))
+    text = ' '.join(text.split())
+    text = re.sub(r'\s*,\s*', ', ', text)
+    text = re.sub(r'\(\s*', '(', text)
+    text = re.sub(r'\s*\)', ')', text)
+    text = _IN_LIST.sub('in (...)', text).rstrip('; ')
+    text = re.sub('\x00(\\d+)\x00', lambda m: quoted[int(m.group(1))], text)
+    return text, tuple(literals)
+
+
+def fingerprint_id(text):
+    """
+    Returns a short stable identifier for a fingerprint, for logs.
+    """
+    return hashlib.blake2b(text.encode('utf-8'), digest_size=6).hexdigest()
+
+
+def cache_key(query, params=None):
+    """
+    Builds a compact cache key from a statement and its bound parameters.
+
+    Statements that differ only in whitespace, case or comments share a
+    key when their literals and parameters are equal; any difference in
+    literals or parameters gives a different key.
+
+    Args:
+        query: SQL statement
+        params: Sequence or mapping of bound parameters, or None
+
+    Returns:
+        Hex digest string
+    """
+    text, literals = fingerprint(query)
+    if params is None:
+        params = ()
+    elif isinstance(params, dict):
+        params = tuple(sorted(params.items()))
+    else:
+        params = tuple(params)
+    payload = repr((text, literals, params)).encode('utf-8')
+    return hashlib.blake2b(payload, digest_size=16).hexdigest()
@@ -0,0 +1,291 @@
+#!/usr/bin/env python3
+"""Tests for table-aware invalidation between transactional and cache_query"""
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from sql_utils import (  # noqa: E402
+    ALL_TABLES, cache_key, fingerprint, tables_read, tables_written)
+
+
+def _create_database(path):
+    """Creates users.db with a users and an orders table"""
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE users (id INTEGER PRIMARY KEY, name TEXT, "
+                 "email TEXT, age INTEGER)")
+    conn.execute("CREATE TABLE orders (id INTEGER PRIMARY KEY, "
+                 "user_id INTEGER, total INTEGER)")
+    conn.executemany("INSERT INTO users (name, email, age) VALUES (?, ?, ?)",
+                     [(f"user{i}", f"user{i}@example.com", 20 + i)
+                      for i in range(20)])
+    conn.executemany("INSERT INTO orders (user_id, total) VALUES (?, ?)",
+                     [(i % 20 + 1, i) for i in range(40)])
+    conn.commit()
+    conn.close()
+
+
+class TestSqlUtils(unittest.TestCase):
+    """Test class for the table extraction helpers"""
+
+    def test_tables_read(self):
+        """Test tables are read from FROM and JOIN clauses"""
+        self.assertEqual(tables_read("SELECT * FROM users"), {"users"})
+        self.assertEqual(
+            tables_read("select u.name from Users u join orders o "
+                        "on o.user_id = u.id where u.name = 'from x'"),
+            {"users", "orders"})
+        self.assertEqual(
+            tables_read("SELECT * FROM users u, orders o "
+                        "WHERE u.id = o.user_id"), {"users", "orders"})
+        self.assertEqual(
+            tables_read("SELECT * FROM (SELECT id FROM users) s, orders"),
+            {"users", "orders"})
+        self.assertEqual(tables_read("SELECT * FROM json_each('[1]')"),
+                         {ALL_TABLES})
+
+    def test_tables_written(self):
+        """Test written tables are found for each kind of write"""
+        self.assertEqual(tables_written("UPDATE users SET email = ?"),
+                         {"users"})
+        self.assertEqual(tables_written("INSERT OR REPLACE INTO orders "
+                                        "VALUES (1, 1, 1)"), {"orders"})
+        self.assertEqual(tables_written("DELETE FROM orders"), {"orders"})
+        self.assertEqual(tables_written("SELECT * FROM users"), set())
+        self.assertEqual(tables_written("SELECT 'update users'"), set())
+
+    def test_fingerprint(self):
+        """Test variants of a statement share one fingerprint"""
+        text, literals = fingerprint("SELECT *  FROM Users\nWHERE id IN (1, 2)")
+        self.assertEqual(text, "select * from users where id in (...)")
+        self.assertEqual(literals, ("1", "2"))
+        self.assertEqual(
+            fingerprint("select * from users where name = 'A b' -- note")[0],
+            "select * from users where name = ?")
+
+    def test_fingerprint_normalization(self):
+        """Test whitespace, case, comments and literals are normalized"""
+        expected = "select name from users where age > ? and email = ?"
+        for query in ("SELECT name FROM users WHERE age > 25 AND email = 'a'",
+                      "select  name\n\tfrom USERS where AGE>30 and "
+                      "email='b' /* hint */",
+                      "SELECT name FROM users WHERE age > 1.5e1 "
+                      "AND email = 'it''s';"):
+            self.assertEqual(fingerprint(query)[0], expected)
+        self.assertEqual(
+            fingerprint("SELECT * FROM users WHERE id IN (1,2,3)")[0],
+            fingerprint("select * from users where id in ( 4 )")[0])
+        # Identifiers containing digits and quoted names are kept
+        self.assertEqual(fingerprint('SELECT col1 FROM "Users2"')[0],
+                         'select col1 from "Users2"')
+
+    def test_cache_key(self):
+        """Test keys follow literals and parameters, not formatting"""
+        query = "SELECT name FROM users WHERE id = ?"
+        self.assertEqual(cache_key(query, (1,)),
+                         cache_key("select name\n from users where id = ?",
+                                   [1]))
+        self.assertNotEqual(cache_key(query, (1,)), cache_key(query, (2,)))
+        self.assertNotEqual(cache_key(query, (1,)), cache_key(query, ("1",)))
+        self.assertNotEqual(cache_key(query), cache_key(query, (None,)))
+        self.assertNotEqual(cache_key("SELECT 5"), cache_key("SELECT '5'"))
+        self.assertNotEqual(cache_key("SELECT * FROM users WHERE id = 1"),
+                            cache_key("SELECT * FROM users WHERE id = 2"))
+        named = "SELECT name FROM users WHERE id = :id AND age > :age"
+        self.assertEqual(cache_key(named, {"id": 1, "age": 2}),
+                         cache_key(named, {"age": 2, "id": 1}))
+        self.assertNotEqual(cache_key(named, {"id": 1, "age": 2}),
+                            cache_key(named, {"id": 2, "age": 1}))
+
+
+class TestCacheInvalidation(unittest.TestCase):
+    """Test class for cache invalidation on committed writes"""
+
+    @classmethod
+    def setUpClass(cls):
+        """Imports the decorator modules inside a scratch users.db"""
+        cls.cwd = os.getcwd()
+        cls.tmp = tempfile.TemporaryDirectory()
+        os.chdir(cls.tmp.name)
+        _create_database("users.db")
+        cls.transactional = __import__("2-transactional")
+        cls.caching = __import__("4-cache_query")
+
+    @classmethod
+    def tearDownClass(cls):
+        """Restores the working directory"""
+        os.chdir(cls.cwd)
+        cls.tmp.cleanup()
+
+    def setUp(self):
+        """Builds a cached reader and writers with their own cache"""
+        caching = self.caching
+        transactional = self.transactional
+
+        @caching.with_db_connection
+        @caching.cache_query(maxsize=1000, ttl=3600)
+        def fetch(conn, query):
+            return conn.execute(query).fetchall()
+
+        @caching.with_db_connection
+        @caching.cache_query(maxsize=1000, ttl=3600)
+        def fetch_with(conn, query, params=()):
+            return conn.execute(query, params).fetchall()
+
+        @transactional.with_db_connection
+        @transactional.transactional
+        def write(conn, query, params=()):
+            conn.execute(query, params)
+
+        @transactional.with_db_connection
+        @transactional.transactional
+        def failing_write(conn, query, params=()):
+            conn.execute(query, params)
+            raise RuntimeError("abort")
+
+        @caching.with_db_connection
+        def write_and_commit(conn, query, params=()):
+            conn.execute(query, params)
+            conn.commit()
+
+        self.fetch = fetch
+        self.fetch_with = fetch_with
+        self.write = write
+        self.failing_write = failing_write
+        self.write_and_commit = write_and_commit
+
+    def _fresh(self, query):
+        """Reads the database directly, bypassing every cache"""
+        conn = sqlite3.connect("users.db")
+        try:
+            return conn.execute(query).fetchall()
+        finally:
+            conn.close()
+
+    def test_transactional_commit_invalidates(self):
+        """Test a committed update evicts the cached users query"""
+        query = "SELECT email FROM users WHERE id = 1"
+        before = self.fetch(query=query)
+        self.assertEqual(self.fetch(query=query), before)
+        self.write(query="UPDATE users SET email = ? WHERE id = 1",
+                   params=("changed@example.com",))
+        self.assertEqual(self.fetch(query=query),
+                         [("changed@example.com",)])
+
+    def test_other_table_is_kept(self):
+        """Test a write to orders keeps cached users results"""
+        query = "SELECT COUNT(*) FROM users"
+        self.fetch(query=query)
+        self.write(query="UPDATE orders SET total = total + 1")
+        hits = self.fetch.cache_info()["hits"]
+        self.fetch(query=query)
+        self.assertEqual(self.fetch.cache_info()["hits"], hits + 1)
+
+    def test_rollback_keeps_entries(self):
+        """Test a rolled back write evicts nothing"""
+        query = "SELECT name FROM users WHERE id = 2"
+        self.fetch(query=query)
+        with self.assertRaises(RuntimeError):
+            self.failing_write(query="UPDATE users SET name = 'x' "
+                                     "WHERE id = 2")
+        self.assertEqual(self.fetch.cache_info()["invalidations"], 0)
+        self.assertEqual(self.fetch(query=query), self._fresh(query))
+
+    def test_with_db_connection_commit_invalidates(self):
+        """Test a write committed inside with_db_connection evicts entries"""
+        query = "SELECT total FROM orders WHERE id = 1"
+        self.fetch(query=query)
+        self.write_and_commit(query="UPDATE orders SET total = 999 "
+                                    "WHERE id = 1")
+        self.assertEqual(self.fetch(query=query), [(999,)])
+
+    def test_parameters_are_part_of_the_key(self):
+        """Test bound parameters select different cached results"""
+        query = "SELECT name FROM users WHERE id = ?"
+        self.assertEqual(self.fetch_with(query=query, params=(5,)),
+                         self._fresh("SELECT name FROM users WHERE id = 5"))
+        self.assertEqual(self.fetch_with(query=query, params=(6,)),
+                         self._fresh("SELECT name FROM users WHERE id = 6"))
+        self.fetch_with(query=query.lower(), params=(5,))
+        stats = self.fetch_with.fingerprint_stats()
+        self.assertEqual(stats["select name from users where id = ?"],
+                         {"hits": 1, "misses": 2,
+                          "seconds": stats["select name from users "
+                                           "where id = ?"]["seconds"]})
+
+    def test_write_during_miss_is_not_cached(self):
+        """Test a result made stale by a write committed meanwhile is dropped"""
+        caching = self.caching
+        write = self.write
+
+        @caching.with_db_connection
+        @caching.cache_query(maxsize=10)
+        def slow_fetch(conn, query):
+            rows = conn.execute(query).fetchall()
+            # Another connection commits before the result is stored
+            write(query="UPDATE users SET name = 'late' WHERE id = 7")
+            return rows
+
+        query = "SELECT name FROM users WHERE id = 7"
+        stale = slow_fetch(query=query)
+        self.assertNotEqual(stale, [("late",)])
+        self.assertEqual(len(slow_fetch.cache), 0)
+
+    def test_comma_join_invalidates(self):
+        """Test a write to the second table of a FROM list evicts entries"""
+        query = ("SELECT o.total FROM users u, orders o "
+                 "WHERE u.id = o.user_id AND o.id = 2")
+        self.fetch(query=query)
+        self.write(query="UPDATE orders SET total = 777 WHERE id = 2")
+        self.assertEqual(self.fetch(query=query), [(777,)])
+
+    def test_unknown_reads_are_invalidated_by_any_write(self):
+        """Test entries with unknown tables go on a write to any table"""
+        cache = self.fetch.cache
+        cache.put("q", [(1,)], {ALL_TABLES})
+        cache.invalidate_tables({"orders"})
+        self.assertNotIn("q", cache)
+
+    def test_unknown_write_invalidates_everything(self):
+        """Test entries are dropped for writes without a known table"""
+        cache = self.fetch.cache
+        cache.put("q", [(1,)], {"users"})
+        cache.invalidate_tables({ALL_TABLES})
+        self.assertNotIn("q", cache)
+
+    def test_mixed_workload(self):
+        """Test results stay fresh and most reads hit under reads/writes"""
+        reads = ["SELECT * FROM users WHERE age > 25",
+                 "SELECT COUNT(*) FROM users",
+                 "SELECT name FROM users WHERE id = 3",
+                 "SELECT * FROM orders WHERE total > 10",
+                 "SELECT SUM(total) FROM orders",
+                 "SELECT o.total FROM orders o JOIN users u "
+                 "ON u.id = o.user_id WHERE u.id = 4"]
+        generator = random.Random(0)
+        writes = 0
+        for step in range(2000):
+            if generator.random() < 0.05:
+                # Writes only ever touch orders
+                self.write(query="UPDATE orders SET total = ? WHERE id = ?",
+                           params=(generator.randrange(100),
+                                   generator.randrange(1, 41)))
+                writes += 1
+                continue
+            query = generator.choice(reads)
+            self.assertEqual(self.fetch(query=query), self._fresh(query))
+
+        info = self.fetch.cache_info()
+        hit_rate = info["hits"] / (info["hits"] + info["misses"])
+        self.assertGreater(writes, 0)
+        self.assertGreater(info["invalidations"], 0)
+        # users-only reads survive the orders writes
+        self.assertGreater(hit_rate, 0.8)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,215 @@
+#!/usr/bin/env python3
+"""Tests for the connection pool behind with_db_connection"""
+import os
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from connection_pool import ConnectionPool  # noqa: E402
+
+
+class TestConnectionPool(unittest.TestCase):
+    """Test class for ConnectionPool"""
+
+    def setUp(self):
+        """Creates a scratch database with a users table"""
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "users.db")
+        conn = sqlite3.connect(self.path)
+        conn.execute("CREATE TABLE users (id INTEGER PRIMARY KEY, name TEXT)")
+        conn.execute("INSERT INTO users (name) VALUES ('a')")
+        conn.commit()
+        conn.close()
+
+    def tearDown(self):
+        """Removes the scratch database"""
+        self.tmp.cleanup()
+
+    def test_reuses_connections(self):
+        """Test a released connection is handed out again"""
+        pool = ConnectionPool(self.path, min_size=1, max_size=2)
+        first = pool.acquire()
+        pool.release(first)
+        self.assertIs(pool.acquire(), first)
+        self.assertEqual(pool.metrics()["created"], 1)
+
+    def test_thread_affinity(self):
+        """Test each thread gets back the connection it released"""
+        pool = ConnectionPool(self.path, min_size=0, max_size=4)
+        seen = {}
+
+        def borrow(name):
+            conns = []
+            for _ in range(3):
+                conn = pool.acquire()
+                conns.append(conn)
+                time.sleep(0.01)
+                pool.release(conn)
+            seen[name] = conns
+
+        threads = [threading.Thread(target=borrow, args=(i,))
+                   for i in range(2)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        for conns in seen.values():
+            self.assertTrue(all(conn is conns[0] for conn in conns))
+        self.assertGreaterEqual(pool.metrics()["affinity_hits"], 4)
+
+    def test_max_size_and_timeout(self):
+        """Test acquire waits for a release and times out otherwise"""
+        pool = ConnectionPool(self.path, min_size=0, max_size=1)
+        conn = pool.acquire()
+        with self.assertRaises(TimeoutError):
+            pool.acquire(timeout=0.05)
+        threading.Timer(0.05, pool.release, args=(conn,)).start()
+        self.assertIs(pool.acquire(timeout=2), conn)
+        metrics = pool.metrics()
+        self.assertEqual(metrics["waits"], 1)
+        self.assertGreater(metrics["max_wait_seconds"], 0.02)
+
+    def test_release_rolls_back(self):
+        """Test uncommitted work does not leak to the next borrower"""
+        pool = ConnectionPool(self.path, min_size=1, max_size=1)
+        conn = pool.acquire()
+        conn.execute("UPDATE users SET name = 'b'")
+        pool.release(conn)
+        conn = pool.acquire()
+        self.assertFalse(conn.in_transaction)
+        self.assertEqual(conn.execute("SELECT name FROM users").fetchone(),
+                         ("a",))
+
+    def test_release_resets_state(self):
+        """Test borrower settings are undone or the connection is dropped"""
+        pool = ConnectionPool(self.path, min_size=1, max_size=1)
+        conn = pool.acquire()
+        conn.row_factory = sqlite3.Row
+        conn.isolation_level = None
+        conn.set_trace_callback(print)
+        pool.release(conn)
+        self.assertIs(pool.acquire(), conn)
+        self.assertIsNone(conn.row_factory)
+        self.assertEqual(conn.isolation_level, "")
+        self.assertIsInstance(conn.execute("SELECT name FROM users")
+                              .fetchone(), tuple)
+        conn.execute("PRAGMA foreign_keys = ON")
+        pool.release(conn)
+        replacement = pool.acquire()
+        self.assertIsNot(replacement, conn)
+        self.assertEqual(replacement.execute("PRAGMA foreign_keys")
+                         .fetchone(), (0,))
+        self.assertEqual(pool.metrics()["discarded"], 1)
+
+    def test_open_does_not_block_borrowers(self):
+        """Test a slow connection open leaves idle connections available"""
+        pool = ConnectionPool(self.path, min_size=1, max_size=2)
+        idle = pool.acquire()
+        pool.release(idle)
+        open_connection = pool._open
+        opening = threading.Event()
+
+        def slow_open():
+            opening.set()
+            time.sleep(0.3)
+            return open_connection()
+
+        pool._open = slow_open
+        held = pool.acquire()
+        thread = threading.Thread(target=pool.acquire)
+        thread.start()
+        self.assertTrue(opening.wait(1))
+        pool.release(held)
+        started = time.monotonic()
+        self.assertIs(pool.acquire(timeout=1), held)
+        self.assertLess(time.monotonic() - started, 0.2)
+        thread.join()
+
+    def test_broken_and_expired_connections_are_replaced(self):
+        """Test closed or too old connections are discarded"""
+        pool = ConnectionPool(self.path, min_size=1, max_size=2,
+                              max_lifetime=0.05, health_check_after=0)
+        conn = pool.acquire()
+        conn.close()
+        pool.release(conn)
+        replacement = pool.acquire()
+        self.assertIsNot(replacement, conn)
+        pool.release(replacement)
+        time.sleep(0.06)
+        self.assertIsNot(pool.acquire(), replacement)
+        self.assertGreaterEqual(pool.metrics()["discarded"], 2)
+
+    def test_profile_is_applied(self):
+        """Test new connections get the settings of their profile"""
+        pool = ConnectionPool(self.path, min_size=0, max_size=1,
+                              profile="write_heavy")
+        conn = pool.acquire()
+        self.assertEqual(conn.execute("PRAGMA journal_mode").fetchone(),
+                         ("wal",))
+        self.assertEqual(conn.execute("PRAGMA synchronous").fetchone(), (1,))
+        with self.assertRaises(ValueError):
+            ConnectionPool(self.path, profile="no_such_profile")
+
+    def test_default_profile_keeps_settings(self):
+        """Test the default profile leaves journal mode and syncs alone"""
+        pool = ConnectionPool(self.path, min_size=0, max_size=1)
+        conn = pool.acquire()
+        self.assertEqual(conn.execute("PRAGMA journal_mode").fetchone(),
+                         ("delete",))
+        self.assertEqual(conn.execute("PRAGMA synchronous").fetchone(), (2,))
+
+    def test_utilization(self):
+        """Test utilization reflects the time connections are borrowed"""
+        pool = ConnectionPool(self.path, min_size=0, max_size=1)
+        conn = pool.acquire()
+        time.sleep(0.05)
+        pool.release(conn)
+        time.sleep(0.05)
+        self.assertGreater(pool.utilization(), 0.3)
+        self.assertLess(pool.utilization(), 0.7)
+
+
+class TestPooledDecorator(unittest.TestCase):
+    """Test class for with_db_connection on top of the pool"""
+
+    def test_calls_share_connections(self):
+        """Test decorated calls reuse pooled connections across threads"""
+        cwd = os.getcwd()
+        with tempfile.TemporaryDirectory() as tmp:
+            os.chdir(tmp)
+            try:
+                conn = sqlite3.connect("users.db")
+                conn.execute("CREATE TABLE users (id INTEGER PRIMARY KEY, "
+                             "name TEXT, email TEXT)")
+                conn.execute("INSERT INTO users (name, email) "
+                             "VALUES ('a', 'a@example.com')")
+                conn.commit()
+                conn.close()
+                module = __import__("1-with_db_connection")
+                results = []
+
+                def call():
+                    for _ in range(50):
+                        results.append(module.get_user_by_id(user_id=1))
+
+                threads = [threading.Thread(target=call) for _ in range(4)]
+                for thread in threads:
+                    thread.start()
+                for thread in threads:
+                    thread.join()
+                metrics = module.get_pool("users.db").metrics()
+            finally:
+                os.chdir(cwd)
+        self.assertEqual(len(results), 200)
+        self.assertTrue(all(row[1] == "a" for row in results))
+        self.assertLessEqual(metrics["created"], 4)
+        self.assertEqual(metrics["in_use"], 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
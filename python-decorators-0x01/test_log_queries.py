@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""Tests for the per-fingerprint statistics of log_queries"""
+import contextlib
+import io
+import os
+import sqlite3
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+
+class TestLogQueries(unittest.TestCase):
+    """Test class for log_queries and query_stats"""
+
+    @classmethod
+    def setUpClass(cls):
+        """Imports 0-log_queries inside a scratch users.db"""
+        cls.cwd = os.getcwd()
+        cls.tmp = tempfile.TemporaryDirectory()
+        os.chdir(cls.tmp.name)
+        conn = sqlite3.connect("users.db")
+        conn.execute("CREATE TABLE users (id INTEGER PRIMARY KEY, name TEXT)")
+        conn.executemany("INSERT INTO users (name) VALUES (?)",
+                         [("a",), ("b",), ("c",)])
+        conn.commit()
+        conn.close()
+        with contextlib.redirect_stdout(io.StringIO()):
+            cls.module = __import__("0-log_queries")
+
+    @classmethod
+    def tearDownClass(cls):
+        """Restores the working directory"""
+        os.chdir(cls.cwd)
+        cls.tmp.cleanup()
+
+    def setUp(self):
+        """Starts every test with empty statistics"""
+        self.module.query_stats.clear()
+
+    def _run(self, func, *args, **kwargs):
+        with contextlib.redirect_stdout(io.StringIO()):
+            return func(*args, **kwargs)
+
+    def test_variants_are_grouped(self):
+        """Test statements differing in literals and layout share stats"""
+        fetch = self.module.fetch_all_users
+        self._run(fetch, query="SELECT * FROM users WHERE id = 1")
+        self._run(fetch, query="select *\n  from USERS where id = 2")
+        self._run(fetch, query="SELECT name FROM users")
+        stats = self.module.query_stats
+        self.assertEqual(stats["select * from users where id = ?"]["calls"], 2)
+        self.assertEqual(stats["select name from users"]["calls"], 1)
+
+    def test_errors_are_counted(self):
+        """Test failing calls are counted and the error propagates"""
+        fetch = self.module.fetch_all_users
+        with self.assertRaises(sqlite3.OperationalError):
+            self._run(fetch, query="SELECT * FROM missing")
+        stats = self.module.query_stats["select * from missing"]
+        self.assertEqual((stats["calls"], stats["errors"]), (1, 1))
+
+    def test_non_string_query_passes_through(self):
+        """Test a non-SQL first argument is logged but not fingerprinted"""
+        @self.module.log_queries
+        def run(conn, query):
+            return conn.execute(query).fetchall()
+
+        conn = sqlite3.connect("users.db")
+        try:
+            self.assertEqual(self._run(run, conn, "SELECT 1"), [(1,)])
+        finally:
+            conn.close()
+        self.assertEqual(self.module.query_stats, {})
+
+    def test_print_query_stats(self):
+        """Test the report lists each fingerprint once with its calls"""
+        fetch = self.module.fetch_all_users
+        for user_id in range(3):
+            self._run(fetch, query=f"SELECT * FROM users WHERE id = {user_id}")
+        output = io.StringIO()
+        with contextlib.redirect_stdout(output):
+            self.module.print_query_stats()
+        lines = output.getvalue().splitlines()
+        self.assertEqual(len(lines), 1)
+        self.assertIn("calls=3", lines[0])
+        self.assertTrue(lines[0].endswith("select * from users where id = ?"))
+
+
+if __name__ == "__main__":
+    unittest.main()
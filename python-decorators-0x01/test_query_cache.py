@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+"""Tests for the bounds, expiry and counters of QueryCache"""
+import os
+import sqlite3
+import sys
+import tempfile
+import unittest
+from unittest import mock
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+
+class FakeClock:
+    """Stands in for time.monotonic, advanced by hand"""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestQueryCache(unittest.TestCase):
+    """Test class for QueryCache"""
+
+    @classmethod
+    def setUpClass(cls):
+        """Imports 4-cache_query inside a scratch users.db"""
+        cls.cwd = os.getcwd()
+        cls.tmp = tempfile.TemporaryDirectory()
+        os.chdir(cls.tmp.name)
+        conn = sqlite3.connect("users.db")
+        conn.execute("CREATE TABLE users (id INTEGER PRIMARY KEY, name TEXT)")
+        conn.execute("INSERT INTO users (name) VALUES ('a')")
+        conn.commit()
+        conn.close()
+        cls.caching = __import__("4-cache_query")
+
+    @classmethod
+    def tearDownClass(cls):
+        """Restores the working directory"""
+        os.chdir(cls.cwd)
+        cls.tmp.cleanup()
+
+    def setUp(self):
+        """Runs every test against a fake clock"""
+        self.clock = FakeClock()
+        patcher = mock.patch.object(self.caching.time, "monotonic", self.clock)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_lru_eviction_order(self):
+        """Test the least recently used entry is evicted first"""
+        cache = self.caching.QueryCache(maxsize=3, max_bytes=None, ttl=None)
+        for key in ("a", "b", "c"):
+            cache.put(key, [(key,)])
+        cache.get("a")
+        cache.put("d", [("d",)])
+        self.assertNotIn("b", cache)
+        for key in ("a", "c", "d"):
+            self.assertIn(key, cache)
+        cache.get("c")
+        cache.put("e", [("e",)])
+        self.assertNotIn("a", cache)
+        self.assertEqual(cache.info()["evictions"], 2)
+        self.assertEqual(len(cache), 3)
+
+    def test_max_bytes(self):
+        """Test entries are evicted to keep the total size under max_bytes"""
+        row = [("x" * 100,)]
+        size = self.caching._result_size(row)
+        cache = self.caching.QueryCache(maxsize=None, max_bytes=size * 2,
+                                        ttl=None)
+        cache.put("a", row)
+        cache.put("b", row)
+        self.assertEqual(cache.info()["bytes"], size * 2)
+        cache.put("c", row)
+        self.assertNotIn("a", cache)
+        self.assertIn("c", cache)
+        self.assertLessEqual(cache.info()["bytes"], size * 2)
+        self.assertEqual(cache.info()["evictions"], 1)
+
+    def test_oversized_result_is_not_cached(self):
+        """Test a result larger than max_bytes is dropped, evicting nothing"""
+        cache = self.caching.QueryCache(maxsize=None, max_bytes=1000, ttl=None)
+        cache.put("small", [(1,)])
+        cache.put("big", [("x" * 2000,)])
+        self.assertNotIn("big", cache)
+        self.assertIn("small", cache)
+        self.assertEqual(cache.info()["evictions"], 0)
+        # Replacing a cached key with an oversized result drops the old one
+        cache.put("small", [("x" * 2000,)])
+        self.assertNotIn("small", cache)
+        self.assertEqual(cache.info()["bytes"], 0)
+
+    def test_ttl_expiry(self):
+        """Test entries become misses once ttl seconds have passed"""
+        cache = self.caching.QueryCache(maxsize=10, max_bytes=None, ttl=30)
+        cache.put("a", [(1,)])
+        self.clock.now += 29.9
+        self.assertEqual(cache.get("a"), [(1,)])
+        self.clock.now += 0.1
+        self.assertIsNone(cache.get("a"))
+        self.assertEqual(len(cache), 0)
+        info = cache.info()
+        self.assertEqual((info["hits"], info["misses"], info["expirations"]),
+                         (1, 1, 1))
+
+    def test_counters(self):
+        """Test hits, misses, evictions and clear() through the decorator"""
+        calls = []
+
+        @self.caching.cache_query(maxsize=2, ttl=60)
+        def fetch(conn, query):
+            calls.append(query)
+            return [(len(calls),)]
+
+        fetch(None, "SELECT 1")
+        fetch(None, "select 1")
+        fetch(None, "SELECT 2")
+        fetch(None, "SELECT 3")
+        fetch(None, "SELECT 1")
+        info = fetch.cache_info()
+        self.assertEqual(len(calls), 4)
+        self.assertEqual((info["hits"], info["misses"], info["evictions"]),
+                         (1, 4, 2))
+        self.assertEqual(info["entries"], 2)
+        fetch.cache.clear()
+        info = fetch.cache_info()
+        self.assertEqual((info["hits"], info["misses"], info["entries"]),
+                         (0, 0, 0))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -6,17 +6,42 @@ Generator function to stream rows from user_data table one by one.
 import mysql.connector
 from mysql.connector import Error
 
+from rows import make_decoder
 
-def stream_users():
+
+def stream_users(unbuffered=False, fetch_size=1000, row_format='dict',
+                 resume_after=None):
     """
     Generator function that streams rows from the user_data table one by one.
-    
+
+    By default the cursor is buffered: the whole result set is read into
+    client memory when the query runs, so memory grows with the table.
+    With ``unbuffered=True`` the rows are read from the server while
+    iterating, at most ``fetch_size`` at a time, so client memory stays
+    flat however large the table grows, and a consumer that stops early
+    drops the connection instead of draining the remaining rows.
+
+    Args:
+        unbuffered (bool): Stream the result set from the server instead of
+            buffering it on the client
+        fetch_size (int): Maximum number of rows held in memory at once in
+            unbuffered mode, and rows decoded at a time in record format
+        row_format (str): 'dict' for dictionaries, or 'record' for compact
+            rows.UserRow objects with age already converted to int
+        resume_after (str): Scan in user_id order, starting after this
+            user_id ('' starts from the beginning); the user_id of the last
+            row consumed is the position to resume from after a crash.
+            Database errors are raised rather than printed in this mode, so
+            a dropped connection is not mistaken for the end of the table
+
     Yields:
         dict: Dictionary containing user_id, name, email, and age
+            (a UserRow in record format)
     """
     connection = None
     cursor = None
-    
+    exhausted = False
+
     try:
         # Connect to ALX_prodev database
         connection = mysql.connector.connect(
@@ -26,21 +51,69 @@ def stream_users():
             database='ALX_prodev',
             port=3306
         )
-        
+
         if connection.is_connected():
-            # Use dictionary cursor to return rows as dictionaries
-            cursor = connection.cursor(dictionary=True)
-            cursor.execute("SELECT user_id, name, email, age FROM user_data")
-            
-            # Single loop to yield rows one by one
-            for row in cursor:
-                yield row
-    
+            record = row_format == 'record'
+            # Dictionary cursor for dict rows; records are decoded from
+            # plain tuples. Unbuffered mode streams from the server.
+            cursor = connection.cursor(
+                dictionary=not record,
+                buffered=not unbuffered
+            )
+            if resume_after is None:
+                cursor.execute(
+                    "SELECT user_id, name, email, age FROM user_data"
+                )
+            else:
+                cursor.execute(
+                    "SELECT user_id, name, email, age FROM user_data "
+                    "WHERE user_id > %s ORDER BY user_id",
+                    (resume_after,)
+                )
+
+            if unbuffered or record:
+                decode = make_decoder(cursor.column_names) if record else None
+                while True:
+                    rows = cursor.fetchmany(fetch_size)
+                    if not rows:
+                        break
+                    if decode:
+                        rows = decode(rows)
+                    for row in rows:
+                        yield row
+            else:
+                # Single loop to yield rows one by one
+                for row in cursor:
+                    yield row
+            exhausted = True
+
     except Error as e:
+        if resume_after is not None:
+            raise
         print(f"Error: {e}")
     finally:
-        if cursor:
-            cursor.close()
-        if connection and connection.is_connected():
-            connection.close()
+        if unbuffered and not exhausted:
+            # The consumer stopped early: dropping the connection discards
+            # the unread rows instead of draining them over the network
+            _close_quietly(connection)
+            _close_quietly(cursor)
+        else:
+            if cursor:
+                cursor.close()
+            if connection and connection.is_connected():
+                connection.close()
+
+
+def _close_quietly(resource):
+    """
+    Closes a cursor or connection, ignoring errors about unread results.
 
+    Args:
+        resource: MySQL cursor or connection object, or None
+    """
+    if resource is None:
+        return
+    try:
+        resource.close()
+    except Error:
+        pass
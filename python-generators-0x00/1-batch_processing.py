@@ -6,17 +6,43 @@ Batch processing functions to fetch and process user data in batches.
 import mysql.connector
 from mysql.connector import Error
 import sys
+import time
 
+from columnar import ColumnBatch
+from pushdown import apply_residual, compile_select
+from rows import make_decoder
 
-def stream_users_in_batches(batch_size):
+
+def stream_users_in_batches(batch_size, columns=None, where=None,
+                            pushdown=True, row_format='dict',
+                            resume_after=None, adaptive=None):
     """
     Generator function that fetches rows from user_data table in batches.
-    
+
+    Filters and the column list are pushed into the query where possible
+    (see pushdown.py); anything that cannot be translated is applied to
+    each fetched batch in Python, and batches left empty are skipped.
+
     Args:
         batch_size (int): Number of rows to fetch per batch
-    
+        columns (sequence): Columns to select, or None for all of them
+        where (sequence): Filters, as (column, op, value) tuples or callables
+        pushdown (bool): Compile filters into SQL when possible
+        row_format (str): 'dict' for a list of row dictionaries per batch,
+            'record' for a list of compact rows.UserRow objects, or
+            'columnar' for a ColumnBatch with one array per column
+        resume_after (str): Scan in user_id order, starting after this
+            user_id ('' starts from the beginning); None keeps the
+            unordered scan. Database errors are raised rather than printed
+            when resuming, so a dropped connection does not look like the
+            end of the scan
+        adaptive (AdaptiveBatchSizer): Tune the fetch size from measured
+            fetch time and row size, starting at batch_size; the chosen
+            sizes are kept on the sizer as telemetry
+
     Yields:
         list: List of dictionaries containing user data for each batch
+            (UserRows or a ColumnBatch in the other formats)
     """
     connection = None
     cursor = None
@@ -32,18 +58,43 @@ def stream_users_in_batches(batch_size):
         )
         
         if connection.is_connected():
-            # Use dictionary cursor to return rows as dictionaries
-            cursor = connection.cursor(dictionary=True)
-            cursor.execute("SELECT user_id, name, email, age FROM user_data")
+            # Push the projection and translatable filters into SQL
+            query, params, residual = compile_select(
+                columns, where or (), pushdown=pushdown,
+                after_user_id=resume_after
+            )
+            columnar = row_format == 'columnar'
+            record = row_format == 'record'
+            # Use dictionary cursor to return rows as dictionaries; records
+            # and columnar batches are built from plain tuples instead
+            cursor = connection.cursor(dictionary=not (columnar or record))
+            cursor.execute(query, params)
+            decode = make_decoder(cursor.column_names) if record else None
             
+            if adaptive is not None:
+                adaptive.start(batch_size)
+
             # Single loop to yield batches
             while True:
-                batch = cursor.fetchmany(batch_size)
+                if adaptive is None:
+                    batch = cursor.fetchmany(batch_size)
+                else:
+                    started = time.perf_counter()
+                    batch = cursor.fetchmany(adaptive.next_size())
+                    adaptive.observe(batch, time.perf_counter() - started)
                 if not batch:
                     break
-                yield batch
+                if columnar:
+                    batch = ColumnBatch.from_rows(batch, cursor.column_names)
+                elif record:
+                    batch = decode(batch)
+                batch = apply_residual(batch, residual)
+                if batch:
+                    yield batch
     
     except Error as e:
+        if resume_after is not None:
+            raise
         print(f"Error: {e}", file=sys.stderr)
     finally:
         if cursor:
@@ -52,20 +103,38 @@ def stream_users_in_batches(batch_size):
             connection.close()
 
 
-def batch_processing(batch_size):
+def batch_processing(batch_size, columns=None, pushdown=True,
+                     row_format='dict', resume_after=None):
     """
     Generator function that processes batches to filter users over age 25.
+
+    The age filter is evaluated by the database unless pushdown is False.
+    In that case columnar batches are filtered with one vectorized
+    comparison per batch instead of one per row.
     
     Args:
         batch_size (int): Number of rows to fetch per batch
+        columns (sequence): Columns the caller needs, or None for all
+        pushdown (bool): Filter in SQL rather than in Python
+        row_format (str): 'dict' or 'record' to yield users one by one,
+            or 'columnar' to yield each filtered batch as a ColumnBatch
+        resume_after (str): Resume a user_id-ordered scan after this
+            user_id, as for stream_users_in_batches
     
     Yields:
         dict: Dictionary containing user data for users with age > 25
+            (a ColumnBatch per batch in columnar format)
     """
+    where = [('age', '>', 25)]
+    batches = stream_users_in_batches(batch_size, columns, where,
+                                      pushdown=pushdown,
+                                      row_format=row_format,
+                                      resume_after=resume_after)
+    if row_format == 'columnar':
+        yield from batches
+        return
     # Loop over batches
-    for batch in stream_users_in_batches(batch_size):
-        # Loop over users in batch to filter
+    for batch in batches:
+        # Loop over users in batch
         for user in batch:
-            if user['age'] > 25:
-                yield user
-
+            yield user
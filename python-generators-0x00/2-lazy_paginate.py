@@ -3,53 +3,280 @@
 Lazy pagination function to fetch paginated data from user_data table.
 """
 
+import base64
+import json
+
+from mysql.connector import Error, InterfaceError, OperationalError
+
 import seed
 
 
-def paginate_users(page_size, offset):
+class Page(list):
+    """
+    A page of users that also carries the token for the following page.
+
+    Attributes:
+        next_token (str): Opaque continuation token; pass it back to
+            lazy_paginate to resume the walk after this page
+    """
+
+    def __init__(self, rows, next_token):
+        super().__init__(rows)
+        self.next_token = next_token
+
+
+def encode_page_token(position):
+    """
+    Encodes a pagination position as an opaque, URL-safe token.
+
+    Args:
+        position (dict): Either {'after': <user_id>} or {'offset': <int>}
+
+    Returns:
+        str: Continuation token
+    """
+    raw = json.dumps(position, separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii')
+
+
+def decode_page_token(token):
+    """
+    Decodes a token produced by encode_page_token.
+
+    Args:
+        token (str): Continuation token
+
+    Returns:
+        dict: The pagination position
+
+    Raises:
+        ValueError: If the token is malformed
+    """
+    try:
+        position = json.loads(base64.urlsafe_b64decode(token.encode('ascii')))
+    except (ValueError, TypeError) as e:
+        raise ValueError(f"Invalid page token: {token!r}") from e
+    if not isinstance(position, dict):
+        raise ValueError(f"Invalid page token: {token!r}")
+    if 'after' in position:
+        valid = isinstance(position['after'], str)
+    elif 'offset' in position:
+        offset = position['offset']
+        # bool is an int subclass, but True is no offset
+        valid = (isinstance(offset, int) and not isinstance(offset, bool)
+                 and offset >= 0)
+    else:
+        valid = False
+    if not valid:
+        raise ValueError(f"Invalid page token: {token!r}")
+    return position
+
+
+def _cached_page(cache, key, fetch):
+    """
+    Returns the page for key from cache, fetching and storing it on a miss.
+    """
+    if cache is None:
+        return fetch()
+    rows = cache.get(key)
+    if rows is None:
+        rows = fetch()
+        if rows:
+            cache.put(key, rows)
+    return rows
+
+
+def paginate_users(page_size, offset, connection=None, cache=None):
     """
     Fetches a page of users from the database.
-    
+
     Args:
         page_size (int): Number of rows to fetch per page
         offset (int): Offset for pagination
-    
+        connection: Open MySQL connection to reuse; when omitted a new
+            connection is opened and closed for this page only
+        cache (PageCache): Serve the page from this cache when possible
+
     Returns:
         list: List of dictionaries containing user data
     """
-    connection = seed.connect_to_prodev()
+    if cache is not None:
+        return _cached_page(
+            cache, ('offset', offset, page_size),
+            lambda: paginate_users(page_size, offset, connection)
+        )
+    owns_connection = connection is None
+    if owns_connection:
+        connection = seed.connect_to_prodev()
     cursor = connection.cursor(dictionary=True)
-    cursor.execute(f"SELECT * FROM user_data LIMIT {page_size} OFFSET {offset}")
+    cursor.execute(
+        "SELECT * FROM user_data LIMIT %s OFFSET %s", (page_size, offset)
+    )
     rows = cursor.fetchall()
     cursor.close()
-    connection.close()
+    if owns_connection:
+        connection.close()
     return rows
 
 
-def lazy_paginate(page_size):
+def paginate_users_after(page_size, after_user_id=None, connection=None,
+                         cache=None):
+    """
+    Fetches the page of users that follows after_user_id in key order.
+
+    Seeks on the user_id primary key instead of skipping rows, so the cost
+    of a page does not depend on how deep into the table it is.
+
+    Args:
+        page_size (int): Number of rows to fetch per page
+        after_user_id (str): Last user_id of the previous page, or None
+            for the first page
+        connection: Open MySQL connection to reuse; when omitted a new
+            connection is opened and closed for this page only
+        cache (PageCache): Serve the page from this cache when possible
+
+    Returns:
+        list: List of dictionaries containing user data
+    """
+    if cache is not None:
+        return _cached_page(
+            cache, ('after', after_user_id, page_size),
+            lambda: paginate_users_after(page_size, after_user_id, connection)
+        )
+    owns_connection = connection is None
+    if owns_connection:
+        connection = seed.connect_to_prodev()
+    cursor = connection.cursor(dictionary=True)
+    if after_user_id is None:
+        cursor.execute(
+            "SELECT * FROM user_data ORDER BY user_id LIMIT %s", (page_size,)
+        )
+    else:
+        cursor.execute(
+            "SELECT * FROM user_data WHERE user_id > %s "
+            "ORDER BY user_id LIMIT %s",
+            (after_user_id, page_size)
+        )
+    rows = cursor.fetchall()
+    cursor.close()
+    if owns_connection:
+        connection.close()
+    return rows
+
+
+def _fetch_page(fetch, connection, stats, *args):
+    """
+    Runs a page query on the walk's connection, reconnecting if it dropped.
+
+    Args:
+        fetch: paginate_users or paginate_users_after
+        connection: The connection held by the walk, or None
+        stats (dict): Walk metrics, updated in place
+        *args: Positional arguments for fetch
+
+    Returns:
+        tuple: (rows, connection) where connection may be a new one
+
+    Raises:
+        Error: If no connection to ALX_prodev can be opened
+    """
+    if connection is None:
+        connection = seed.connect_to_prodev()
+        if connection is None:
+            # An empty page would end the walk as if the table were done
+            raise Error("Could not connect to ALX_prodev")
+        stats['connects'] += 1
+    try:
+        return fetch(*args, connection=connection), connection
+    except (InterfaceError, OperationalError):
+        # The server went away between pages: reconnect once and retry
+        connection.reconnect(attempts=3, delay=1)
+        stats['connects'] += 1
+        stats['reconnects'] += 1
+        return fetch(*args, connection=connection), connection
+
+
+def lazy_paginate(page_size, keyset=False, page_token=None, stats=None,
+                  cache=None):
     """
     Generator function that implements lazy pagination, fetching pages only when needed.
-    
+
+    In keyset mode pages are ordered by user_id and each one seeks past the
+    last key of the previous page. Every yielded page carries a
+    ``next_token``; passing it back as ``page_token`` resumes the walk from
+    the following page (the token also selects the mode it was made in).
+
+    One connection is held for the whole walk and re-established if it
+    drops between pages. With a PageCache, cached pages are served without
+    touching the database at all.
+
     Args:
         page_size (int): Number of rows to fetch per page
-    
+        keyset (bool): Seek on user_id instead of using OFFSET
+        page_token (str): Continuation token from a previously yielded page
+        stats (dict): Optional dict filled with the walk's ``connects``,
+            ``reconnects``, ``pages`` and ``cache_hits`` counts
+        cache (PageCache): Optional page cache shared between walks
+
     Yields:
-        list: List of dictionaries containing user data for each page
+        Page: List of dictionaries containing user data for each page
+
+    Raises:
+        Error: If the walk cannot connect to ALX_prodev
     """
     offset = 0
-    
-    # Single loop to fetch and yield pages lazily
-    while True:
-        page = paginate_users(page_size, offset)
-        
-        # If no more data, stop
-        if not page:
-            break
-        
-        yield page
-        offset += page_size
+    after_user_id = None
+    if page_token is not None:
+        position = decode_page_token(page_token)
+        keyset = 'after' in position
+        after_user_id = position.get('after')
+        offset = position.get('offset', 0)
+
+    if stats is None:
+        stats = {}
+    stats.update(connects=0, reconnects=0, pages=0, cache_hits=0)
+    connection = None
+
+    try:
+        # Single loop to fetch and yield pages lazily
+        while True:
+            if keyset:
+                key = ('after', after_user_id, page_size)
+            else:
+                key = ('offset', offset, page_size)
+            page = cache.get(key) if cache is not None else None
+
+            if page is not None:
+                stats['cache_hits'] += 1
+            else:
+                if keyset:
+                    page, connection = _fetch_page(
+                        paginate_users_after, connection, stats,
+                        page_size, after_user_id
+                    )
+                else:
+                    page, connection = _fetch_page(
+                        paginate_users, connection, stats, page_size, offset
+                    )
+                if page and cache is not None:
+                    cache.put(key, page)
+
+            # If no more data, stop
+            if not page:
+                break
+
+            stats['pages'] += 1
+            if keyset:
+                after_user_id = page[-1]['user_id']
+                next_token = encode_page_token({'after': after_user_id})
+            else:
+                offset += page_size
+                next_token = encode_page_token({'offset': offset})
+            yield Page(page, next_token)
+    finally:
+        if connection is not None:
+            connection.close()
 
 
 # Alias for test compatibility
 lazy_pagination = lazy_paginate
-
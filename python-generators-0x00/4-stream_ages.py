@@ -3,7 +3,10 @@
 Memory-efficient aggregation using generators: stream ages and compute average.
 """
 
+from itertools import islice
+
 import seed
+from streaming_stats import StreamingStats
 
 
 def stream_user_ages():
@@ -32,15 +35,21 @@ def stream_user_ages():
             connection.close() 
 
 
-def compute_and_print_average_age():
+def compute_and_print_average_age(ages=None):
     """
     Consumes the stream_user_ages generator to compute and print the average age
     without loading all rows into memory. Uses at most one loop here.
+
+    Args:
+        ages (iterable): Ages to use instead of a new stream_user_ages()
+            scan, e.g. when fed from a shared scan
     """
+    if ages is None:
+        ages = stream_user_ages()
     total_age = 0
     count = 0
     # Loop 2: single pass aggregation
-    for age in stream_user_ages():
+    for age in ages:
         total_age += age
         count += 1 
 
@@ -57,5 +66,50 @@ def compute_and_print_average_age():
     print(f"Average age of users: {avg_str}")
 
 
+def compute_age_statistics(batch_size=1000, stats=None, ages=None):
+    """
+    Consumes stream_user_ages in batches and accumulates full statistics.
+
+    Memory stays constant: only one batch and the accumulator are held.
+    Pass an existing accumulator to continue it, or merge the returned one
+    with the partial results of other workers.
+
+    Args:
+        batch_size (int): Number of ages folded in per update
+        stats (StreamingStats): Accumulator to update, or None for a new one
+        ages (iterable): Ages to use instead of a new stream_user_ages() scan
+
+    Returns:
+        StreamingStats: count, mean, variance, min, max, histogram and
+            approximate percentiles of the ages
+    """
+    if stats is None:
+        stats = StreamingStats()
+    ages = iter(ages) if ages is not None else stream_user_ages()
+    while True:
+        batch = list(islice(ages, batch_size))
+        if not batch:
+            break
+        stats.update_batch(batch)
+    return stats
+
+
+def print_age_statistics(batch_size=1000):
+    """
+    Prints the summary produced by compute_age_statistics.
+    """
+    stats = compute_age_statistics(batch_size)
+    if stats.count == 0:
+        print("No users found")
+        return
+    print(f"Users: {stats.count}")
+    print(f"Min/max age: {stats.min}/{stats.max}")
+    print(f"Mean age: {stats.mean:.2f} (stddev {stats.stddev:.2f})")
+    print(f"p50/p95/p99: {stats.percentile(50)}/{stats.percentile(95)}/"
+          f"{stats.percentile(99)}")
+    for bucket, count in sorted(stats.histogram.items()):
+        print(f"  {bucket:>3}-{bucket + stats.bin_width - 1:<3} {count}")
+
+
 if __name__ == "__main__":
     compute_and_print_average_age()
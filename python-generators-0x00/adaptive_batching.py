@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+"""
+Adaptive batch sizing for stream_users_in_batches.
+
+Instead of guessing a batch size, callers give a target fetch latency per
+batch, a memory budget per batch, or both. AdaptiveBatchSizer measures the
+time and size of each fetched batch and picks the next fetchmany size so
+that both limits are met:
+
+    sizer = AdaptiveBatchSizer(target_latency=0.05, memory_budget=8 << 20)
+    for batch in stream_users_in_batches(1000, adaptive=sizer):
+        ...
+    print(sizer.sizes)
+"""
+
+import sys
+
+
+def row_bytes(row):
+    """
+    Estimates the memory held by one fetched row.
+    """
+    if isinstance(row, dict):
+        values = row.values()
+    elif hasattr(row, 'as_tuple'):
+        values = row.as_tuple()
+    else:
+        values = row
+    return sys.getsizeof(row) + sum(sys.getsizeof(v) for v in values)
+
+
+class AdaptiveBatchSizer:
+    """
+    Chooses fetchmany sizes from measured per-row fetch time and row size.
+
+    Per-row cost and size are tracked as exponentially weighted averages,
+    and each new size may differ from the previous one by at most a factor
+    of max_growth, so a single slow fetch does not collapse the batch.
+
+    Attributes:
+        sizes (list): Every batch size handed out, in order (telemetry)
+        seconds_per_row (float): Smoothed fetch time per row
+        bytes_per_row (float): Smoothed memory per row
+    """
+
+    def __init__(self, target_latency=None, memory_budget=None,
+                 min_size=1, max_size=100000, smoothing=0.3,
+                 max_growth=2.0, sample_rows=16):
+        """
+        Args:
+            target_latency (float): Desired seconds per fetchmany call
+            memory_budget (int): Desired bytes per batch
+            min_size (int): Smallest batch size allowed
+            max_size (int): Largest batch size allowed
+            smoothing (float): Weight of the newest measurement, in (0, 1]
+            max_growth (float): Largest factor between consecutive sizes
+            sample_rows (int): Rows per batch sampled for the size estimate
+
+        Raises:
+            ValueError: If neither a latency target nor a budget is given
+        """
+        if target_latency is None and memory_budget is None:
+            raise ValueError("Give a target_latency, a memory_budget or both")
+        self.target_latency = target_latency
+        self.memory_budget = memory_budget
+        self.min_size = min_size
+        self.max_size = max_size
+        self.smoothing = smoothing
+        self.max_growth = max_growth
+        self.sample_rows = sample_rows
+        self.size = None
+        self.sizes = []
+        self.seconds_per_row = None
+        self.bytes_per_row = None
+
+    def start(self, initial_size):
+        """
+        Sets the first batch size unless a previous scan already tuned it.
+        """
+        if self.size is None:
+            self.size = self._clamp(initial_size)
+
+    def next_size(self):
+        """
+        Returns the size for the next fetchmany call and records it.
+        """
+        self.sizes.append(self.size)
+        return self.size
+
+    def observe(self, rows, seconds):
+        """
+        Feeds back the result of a fetch and adjusts the next size.
+
+        Args:
+            rows (list): Rows returned by the fetch
+            seconds (float): Time the fetch took
+        """
+        if not rows:
+            return
+        sample = rows[:self.sample_rows]
+        sample_bytes = sum(row_bytes(row) for row in sample) / len(sample)
+        row_seconds = seconds / len(rows)
+        self.seconds_per_row = self._smooth(self.seconds_per_row, row_seconds)
+        self.bytes_per_row = self._smooth(self.bytes_per_row, sample_bytes)
+
+        limits = []
+        if self.target_latency is not None and self.seconds_per_row > 0:
+            limits.append(self.target_latency / self.seconds_per_row)
+        if self.memory_budget is not None and self.bytes_per_row > 0:
+            limits.append(self.memory_budget / self.bytes_per_row)
+        if not limits:
+            return
+        ideal = min(limits)
+        ideal = max(self.size / self.max_growth,
+                    min(ideal, self.size * self.max_growth))
+        self.size = self._clamp(ideal)
+
+    def _smooth(self, average, value):
+        if average is None:
+            return value
+        return average + self.smoothing * (value - average)
+
+    def _clamp(self, size):
+        return int(max(self.min_size, min(self.max_size, size)))
+
+    def telemetry(self):
+        """
+        Returns the sizing history and current estimates as a dictionary.
+        """
+        return {
+            'sizes': list(self.sizes),
+            'current_size': self.size,
+            'seconds_per_row': self.seconds_per_row,
+            'bytes_per_row': self.bytes_per_row,
+        }
@@ -0,0 +1,186 @@
+#!/usr/bin/env python3
+"""
+Reads of the incrementally maintained user_age_aggregates table.
+
+seed.insert_data keeps a row count, age sum and sum of squared ages per
+age bucket in the same transaction as the rows it inserts, so the average,
+variance and histogram of all ages are read from a dozen rows instead of
+a scan of user_data:
+
+    summary = age_summary()
+    print(summary['mean'], summary['variance'], summary['histogram'])
+
+Run as a script to rebuild the table from scratch or to check it against
+user_data:
+
+    python3 age_aggregates.py show
+    python3 age_aggregates.py verify
+    python3 age_aggregates.py rebuild
+"""
+
+import argparse
+import math
+import sys
+
+import seed
+
+
+def _fetch_buckets(cursor, query, params=()):
+    cursor.execute(query, params)
+    return {int(bucket): (int(count), int(age_sum), int(age_sum_sq))
+            for bucket, count, age_sum, age_sum_sq in cursor.fetchall()}
+
+
+def read_buckets(connection):
+    """
+    Returns the stored aggregates.
+
+    Args:
+        connection: MySQL connection object
+
+    Returns:
+        dict: bucket -> (row_count, age_sum, age_sum_sq)
+    """
+    cursor = connection.cursor()
+    try:
+        return _fetch_buckets(cursor, """
+        SELECT bucket, row_count, age_sum, age_sum_sq
+        FROM user_age_aggregates
+        WHERE row_count <> 0
+        """)
+    finally:
+        cursor.close()
+
+
+def scan_buckets(connection):
+    """
+    Computes the aggregates from user_data with a full scan, without
+    writing them.
+
+    Returns:
+        dict: bucket -> (row_count, age_sum, age_sum_sq)
+    """
+    cursor = connection.cursor()
+    try:
+        return _fetch_buckets(cursor, """
+        SELECT FLOOR(age / %s) * %s, COUNT(*), SUM(age), SUM(age * age)
+        FROM user_data
+        GROUP BY FLOOR(age / %s) * %s
+        """, (seed.AGE_BUCKET_WIDTH,) * 4)
+    finally:
+        cursor.close()
+
+
+def summarize(buckets):
+    """
+    Turns per-bucket totals into summary statistics.
+
+    Args:
+        buckets (dict): bucket -> (row_count, age_sum, age_sum_sq)
+
+    Returns:
+        dict: count, mean, population variance, stddev and histogram
+            (bucket -> row count)
+    """
+    count = sum(b[0] for b in buckets.values())
+    total = sum(b[1] for b in buckets.values())
+    total_sq = sum(b[2] for b in buckets.values())
+    mean = total / count if count else 0.0
+    # Integer sums keep this exact before the one division
+    variance = (total_sq * count - total * total) / (count * count) if count else 0.0
+    return {
+        'count': count,
+        'mean': mean,
+        'variance': variance,
+        'stddev': math.sqrt(variance),
+        'histogram': {bucket: b[0] for bucket, b in sorted(buckets.items())},
+    }
+
+
+def age_summary(connection=None):
+    """
+    Returns age statistics from user_age_aggregates without scanning
+    user_data.
+
+    Args:
+        connection: MySQL connection object, or None to open one
+
+    Returns:
+        dict: See summarize(), or None if the connection fails
+    """
+    own = connection is None
+    if own:
+        connection = seed.connect_to_prodev()
+        if not connection:
+            return None
+    try:
+        return summarize(read_buckets(connection))
+    finally:
+        if own:
+            connection.close()
+
+
+def rebuild(connection):
+    """
+    Recomputes user_age_aggregates from user_data and commits.
+    """
+    cursor = connection.cursor()
+    try:
+        seed.rebuild_age_aggregates(cursor)
+        connection.commit()
+    except Exception:
+        connection.rollback()
+        raise
+    finally:
+        cursor.close()
+
+
+def verify(connection):
+    """
+    Compares the stored aggregates with a fresh scan of user_data.
+
+    Returns:
+        list: (bucket, stored, scanned) for every bucket that differs
+    """
+    stored = read_buckets(connection)
+    scanned = scan_buckets(connection)
+    return [(bucket, stored.get(bucket), scanned.get(bucket))
+            for bucket in sorted(set(stored) | set(scanned))
+            if stored.get(bucket) != scanned.get(bucket)]
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Show, verify or rebuild user_age_aggregates."
+    )
+    parser.add_argument('command', choices=['show', 'verify', 'rebuild'])
+    args = parser.parse_args()
+
+    connection = seed.connect_to_prodev()
+    if not connection:
+        return 1
+    try:
+        if args.command == 'rebuild':
+            rebuild(connection)
+            print("user_age_aggregates rebuilt from user_data")
+        elif args.command == 'verify':
+            mismatches = verify(connection)
+            for bucket, stored, scanned in mismatches:
+                print(f"bucket {bucket}: stored {stored}, scanned {scanned}")
+            if mismatches:
+                print(f"{len(mismatches)} bucket(s) differ; run 'rebuild'")
+                return 1
+            print("user_age_aggregates matches user_data")
+        summary = summarize(read_buckets(connection))
+        print(f"Users: {summary['count']}")
+        print(f"Mean age: {summary['mean']:.2f} "
+              f"(stddev {summary['stddev']:.2f})")
+        for bucket, count in summary['histogram'].items():
+            print(f"  {bucket:>3}-{bucket + seed.AGE_BUCKET_WIDTH - 1:<3} {count}")
+        return 0
+    finally:
+        connection.close()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
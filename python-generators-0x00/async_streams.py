@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+"""
+Async generator versions of the user-streaming pipelines.
+
+These mirror stream_users, stream_users_in_batches and lazy_paginate but
+use aiomysql, so many streams can run concurrently on one event loop
+without blocking it:
+
+    async for user in async_stream_users():
+        ...
+
+As with any async generator, wrap it in contextlib.aclosing() when you may
+stop early, so its connection is closed right away rather than when the
+generator is garbage collected.
+"""
+
+from contextlib import aclosing
+
+import aiomysql
+
+lazy_paginate = __import__('2-lazy_paginate')
+
+CONNECTION_SETTINGS = {
+    'host': 'localhost',
+    'user': 'root',
+    'password': '',
+    'db': 'ALX_prodev',
+    'port': 3306,
+}
+
+
+async def connect_to_prodev_async():
+    """
+    Connects to the ALX_prodev database without blocking the event loop.
+
+    Returns:
+        connection: aiomysql connection object
+    """
+    return await aiomysql.connect(**CONNECTION_SETTINGS)
+
+
+async def async_stream_users(fetch_size=1000):
+    """
+    Async generator that streams rows from the user_data table one by one.
+
+    Rows are read from the server with an unbuffered cursor, at most
+    fetch_size at a time. Stopping early closes the connection instead of
+    draining the remaining rows.
+
+    Args:
+        fetch_size (int): Maximum number of rows held in memory at once
+
+    Yields:
+        dict: Dictionary containing user_id, name, email, and age
+    """
+    async with aclosing(async_stream_users_in_batches(fetch_size)) as batches:
+        async for batch in batches:
+            for row in batch:
+                yield row
+
+
+async def async_stream_users_in_batches(batch_size):
+    """
+    Async generator that fetches rows from user_data table in batches.
+
+    Args:
+        batch_size (int): Number of rows to fetch per batch
+
+    Yields:
+        list: List of dictionaries containing user data for each batch
+    """
+    connection = await connect_to_prodev_async()
+    try:
+        cursor = await connection.cursor(aiomysql.SSDictCursor)
+        await cursor.execute("SELECT user_id, name, email, age FROM user_data")
+        while True:
+            batch = await cursor.fetchmany(batch_size)
+            if not batch:
+                break
+            yield batch
+    finally:
+        # Closing the socket discards unread rows when the caller stops early
+        connection.close()
+
+
+async def async_paginate_users(connection, page_size, offset=0,
+                               after_user_id=None, keyset=False):
+    """
+    Fetches one page of users on an open aiomysql connection.
+
+    Args:
+        connection: aiomysql connection object
+        page_size (int): Number of rows to fetch per page
+        offset (int): Offset for OFFSET pagination
+        after_user_id (str): Last user_id of the previous page (keyset)
+        keyset (bool): Seek on user_id instead of using OFFSET
+
+    Returns:
+        list: List of dictionaries containing user data
+    """
+    async with connection.cursor(aiomysql.DictCursor) as cursor:
+        if not keyset:
+            await cursor.execute(
+                "SELECT * FROM user_data LIMIT %s OFFSET %s",
+                (page_size, offset)
+            )
+        elif after_user_id is None:
+            await cursor.execute(
+                "SELECT * FROM user_data ORDER BY user_id LIMIT %s",
+                (page_size,)
+            )
+        else:
+            await cursor.execute(
+                "SELECT * FROM user_data WHERE user_id > %s "
+                "ORDER BY user_id LIMIT %s",
+                (after_user_id, page_size)
+            )
+        return await cursor.fetchall()
+
+
+async def async_lazy_paginate(page_size, keyset=False, page_token=None):
+    """
+    Async generator that fetches pages of users only when needed.
+
+    Tokens are interchangeable with those of lazy_paginate, and one
+    connection is held for the whole walk.
+
+    Args:
+        page_size (int): Number of rows to fetch per page
+        keyset (bool): Seek on user_id instead of using OFFSET
+        page_token (str): Continuation token from a previously yielded page
+
+    Yields:
+        Page: List of dictionaries containing user data for each page
+    """
+    offset = 0
+    after_user_id = None
+    if page_token is not None:
+        position = lazy_paginate.decode_page_token(page_token)
+        keyset = 'after' in position
+        after_user_id = position.get('after')
+        offset = position.get('offset', 0)
+
+    connection = await connect_to_prodev_async()
+    try:
+        while True:
+            page = await async_paginate_users(
+                connection, page_size, offset, after_user_id, keyset
+            )
+            if not page:
+                break
+            if keyset:
+                after_user_id = page[-1]['user_id']
+                position = {'after': after_user_id}
+            else:
+                offset += page_size
+                position = {'offset': offset}
+            yield lazy_paginate.Page(
+                page, lazy_paginate.encode_page_token(position)
+            )
+    finally:
+        connection.close()
@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""
+Benchmark concurrent full-table streams: asyncio versus threads.
+
+Runs N simultaneous scans of user_data, first as N async generators on a
+single event loop, then as N threads each consuming the synchronous
+stream_users, and reports the wall time and aggregate rows per second.
+
+Usage:
+    python3 bench_async_streams.py [streams]
+"""
+
+import asyncio
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from async_streams import async_stream_users
+
+stream_users = __import__('0-stream_users').stream_users
+
+
+async def _count_async():
+    count = 0
+    async for _ in async_stream_users():
+        count += 1
+    return count
+
+
+async def _run_async(streams):
+    return await asyncio.gather(*(_count_async() for _ in range(streams)))
+
+
+def _count_sync():
+    return sum(1 for _ in stream_users(unbuffered=True))
+
+
+def run_async(streams):
+    """
+    Returns (total rows, seconds) for `streams` async scans on one loop.
+    """
+    start = time.perf_counter()
+    counts = asyncio.run(_run_async(streams))
+    return sum(counts), time.perf_counter() - start
+
+
+def run_threaded(streams):
+    """
+    Returns (total rows, seconds) for `streams` scans on worker threads.
+    """
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=streams) as pool:
+        counts = list(pool.map(lambda _: _count_sync(), range(streams)))
+    return sum(counts), time.perf_counter() - start
+
+
+def main(streams):
+    print(f"{'mode':<9} {'streams':>8} {'rows':>10} {'seconds':>9} {'rows/s':>12}")
+    for label, run in (('asyncio', run_async), ('threads', run_threaded)):
+        rows, elapsed = run(streams)
+        print(f"{label:<9} {streams:>8} {rows:>10} {elapsed:>9.2f} "
+              f"{rows / elapsed:>12.0f}")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 16)
@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""
+Benchmark predicate and projection push-down in batch_processing.
+
+Each variant is run over the same table and the bytes the server sent are
+read from the global Bytes_sent counter through a separate connection, so
+the figures are only meaningful on an otherwise idle server.
+
+Usage:
+    python3 bench_batch_processing.py [rows] [batch_size]
+"""
+
+import sys
+import time
+
+import seed
+from bench_stream_users import grow_table, remove_synthetic_rows
+
+batch_processing = __import__('1-batch_processing').batch_processing
+
+VARIANTS = [
+    ('filter in Python', {'pushdown': False}),
+    ('WHERE push-down', {'pushdown': True}),
+    ('WHERE + 2 columns', {'pushdown': True, 'columns': ('user_id', 'age')}),
+]
+
+
+def bytes_sent(connection):
+    """
+    Returns the server's global Bytes_sent counter.
+
+    Args:
+        connection: MySQL connection object used for monitoring
+    """
+    cursor = connection.cursor()
+    cursor.execute("SHOW GLOBAL STATUS LIKE 'Bytes_sent'")
+    value = int(cursor.fetchone()[1])
+    cursor.close()
+    return value
+
+
+def main(rows, batch_size):
+    connection = seed.connect_to_prodev()
+    if not connection:
+        return
+    try:
+        grow_table(connection, rows)
+        print(f"{'variant':<20} {'rows out':>10} {'MB sent':>10} {'seconds':>9}")
+        for label, options in VARIANTS:
+            before = bytes_sent(connection)
+            start = time.perf_counter()
+            count = sum(1 for _ in batch_processing(batch_size, **options))
+            elapsed = time.perf_counter() - start
+            sent = (bytes_sent(connection) - before) / 1e6
+            print(f"{label:<20} {count:>10} {sent:>10.2f} {elapsed:>9.2f}")
+    finally:
+        remove_synthetic_rows(connection)
+        connection.close()
+
+
+if __name__ == "__main__":
+    args = [int(arg) for arg in sys.argv[1:]]
+    main(args[0] if args else 1000000, args[1] if len(args) > 1 else 1000)
@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+Benchmark the cost of late pages with OFFSET and keyset pagination.
+
+The table is grown to the requested size with synthetic rows, then pages
+at increasing depths are fetched both ways. The keyset anchor (the user_id
+just before each page) is looked up once outside the timed section, as a
+caller resuming from a continuation token would already have it. Every
+page is fetched on the benchmark's open connection, so connecting is not
+part of the timings.
+
+Usage:
+    python3 bench_lazy_paginate.py [rows] [page_size]
+"""
+
+import sys
+import time
+
+import seed
+from bench_stream_users import grow_table, remove_synthetic_rows
+
+lazy_paginate = __import__('2-lazy_paginate')
+
+REPEATS = 5
+
+
+def anchor_for(connection, position):
+    """
+    Returns the user_id of the row just before position in key order.
+
+    Args:
+        connection: MySQL connection object
+        position (int): Zero-based row position of the page start
+
+    Returns:
+        str: user_id to seek past, or None for the first page
+    """
+    if position == 0:
+        return None
+    cursor = connection.cursor()
+    cursor.execute(
+        "SELECT user_id FROM user_data ORDER BY user_id LIMIT 1 OFFSET %s",
+        (position - 1,)
+    )
+    row = cursor.fetchone()
+    cursor.close()
+    return row[0]
+
+
+def best_of(func, *args, **kwargs):
+    """
+    Runs func several times and returns the fastest wall time in ms.
+    """
+    timings = []
+    for _ in range(REPEATS):
+        start = time.perf_counter()
+        func(*args, **kwargs)
+        timings.append(time.perf_counter() - start)
+    return min(timings) * 1000
+
+
+def main(rows, page_size):
+    connection = seed.connect_to_prodev()
+    if not connection:
+        return
+    try:
+        grow_table(connection, rows)
+        print(f"{'page start':>12} {'OFFSET (ms)':>12} {'keyset (ms)':>12}")
+        for fraction in (0.0, 0.25, 0.5, 0.75, 0.99):
+            position = int(rows * fraction)
+            anchor = anchor_for(connection, position)
+            offset_ms = best_of(
+                lazy_paginate.paginate_users, page_size, position,
+                connection=connection
+            )
+            keyset_ms = best_of(
+                lazy_paginate.paginate_users_after, page_size, anchor,
+                connection=connection
+            )
+            print(f"{position:>12} {offset_ms:>12.2f} {keyset_ms:>12.2f}")
+    finally:
+        remove_synthetic_rows(connection)
+        connection.close()
+
+
+if __name__ == "__main__":
+    args = [int(arg) for arg in sys.argv[1:]]
+    main(args[0] if args else 1000000, args[1] if len(args) > 1 else 100)
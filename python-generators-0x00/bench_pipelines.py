@@ -0,0 +1,306 @@
+#!/usr/bin/env python3
+"""
+Offline benchmark suite for the generator pipelines.
+
+Synthetic user_data tables are generated into local SQLite files and every
+pipeline is run against them through a small stand-in for the parts of
+mysql-connector the generators use, so no MySQL server is needed. For each
+pipeline and table size the suite records throughput, latency to the
+first row and peak memory, and writes the results as JSON so that runs can
+be compared:
+
+    python3 bench_pipelines.py --sizes 1000 100000 --output run.json
+    python3 bench_pipelines.py --sizes 1000 100000 --compare run.json
+
+Each measurement runs in its own subprocess so that peak RSS belongs to
+that pipeline alone. SQLite returns age as an int rather than a Decimal.
+"""
+
+import argparse
+import json
+import os
+import platform
+import random
+import sqlite3
+import subprocess
+import sys
+import time
+import uuid
+
+# name -> (module, function, arguments, row-count limit or None)
+PIPELINES = {
+    'stream_users': ('0-stream_users', 'stream_users', {}, None),
+    'stream_users_unbuffered': (
+        '0-stream_users', 'stream_users', {'unbuffered': True}, None
+    ),
+    'stream_users_in_batches': (
+        '1-batch_processing', 'stream_users_in_batches',
+        {'batch_size': 1000}, None
+    ),
+    'batch_processing': (
+        '1-batch_processing', 'batch_processing', {'batch_size': 1000}, None
+    ),
+    # OFFSET pagination is quadratic; keep it to sizes that finish
+    'lazy_paginate': (
+        '2-lazy_paginate', 'lazy_paginate', {'page_size': 1000}, 100000
+    ),
+    'lazy_paginate_keyset': (
+        '2-lazy_paginate', 'lazy_paginate',
+        {'page_size': 1000, 'keyset': True}, None
+    ),
+    'stream_user_ages': ('4-stream_ages', 'stream_user_ages', {}, None),
+}
+
+DEFAULT_SIZES = [1000, 10000, 100000, 1000000]
+
+
+class StandInCursor:
+    """
+    The subset of a mysql-connector cursor used by the pipelines.
+    """
+
+    def __init__(self, connection, dictionary):
+        self._cursor = connection.cursor()
+        self._dictionary = dictionary
+        self.rowcount = -1
+
+    @property
+    def column_names(self):
+        return tuple(d[0] for d in self._cursor.description)
+
+    def _convert(self, rows):
+        if not self._dictionary:
+            return rows
+        names = self.column_names
+        return [dict(zip(names, row)) for row in rows]
+
+    def execute(self, query, params=()):
+        self._cursor.execute(query.replace('%s', '?'), tuple(params or ()))
+        self.rowcount = self._cursor.rowcount
+
+    def fetchone(self):
+        row = self._cursor.fetchone()
+        return None if row is None else self._convert([row])[0]
+
+    def fetchmany(self, size=1):
+        return self._convert(self._cursor.fetchmany(size))
+
+    def fetchall(self):
+        return self._convert(self._cursor.fetchall())
+
+    def __iter__(self):
+        while True:
+            rows = self.fetchmany(1000)
+            if not rows:
+                return
+            yield from rows
+
+    def close(self):
+        self._cursor.close()
+
+
+class StandInConnection:
+    """
+    A SQLite connection behaving like a mysql-connector connection.
+    """
+
+    def __init__(self, path):
+        self._connection = sqlite3.connect(path)
+        self._open = True
+
+    def cursor(self, dictionary=False, buffered=None):
+        return StandInCursor(self._connection, dictionary)
+
+    def is_connected(self):
+        return self._open
+
+    def reconnect(self, attempts=1, delay=0):
+        pass
+
+    def commit(self):
+        self._connection.commit()
+
+    def rollback(self):
+        self._connection.rollback()
+
+    def close(self):
+        if self._open:
+            self._connection.close()
+            self._open = False
+
+
+def generate_table(path, rows, batch_size=10000):
+    """
+    Creates a SQLite user_data table with `rows` synthetic users.
+
+    An existing file with the right row count is reused.
+
+    Args:
+        path (str): SQLite database file
+        rows (int): Number of users to generate
+        batch_size (int): Rows per insert statement
+    """
+    if os.path.exists(path):
+        connection = sqlite3.connect(path)
+        try:
+            count = connection.execute(
+                "SELECT COUNT(*) FROM user_data").fetchone()[0]
+        except sqlite3.Error:
+            count = None
+        connection.close()
+        if count == rows:
+            return
+        os.remove(path)
+
+    connection = sqlite3.connect(path)
+    # WITHOUT ROWID clusters rows on the key, like InnoDB does
+    connection.execute("""
+    CREATE TABLE user_data (
+        user_id VARCHAR(36) PRIMARY KEY,
+        name VARCHAR(255) NOT NULL,
+        email VARCHAR(255) NOT NULL,
+        age INTEGER NOT NULL
+    ) WITHOUT ROWID
+    """)
+    generator = random.Random(rows)
+    remaining = rows
+    while remaining > 0:
+        batch = []
+        for _ in range(min(batch_size, remaining)):
+            user_id = str(uuid.UUID(int=generator.getrandbits(128), version=4))
+            number = generator.randrange(10 ** 6)
+            batch.append((user_id, f"User {number}",
+                          f"user{number}@example.com",
+                          generator.randint(18, 120)))
+        connection.executemany(
+            "INSERT INTO user_data VALUES (?, ?, ?, ?)", batch
+        )
+        remaining -= len(batch)
+    connection.commit()
+    connection.close()
+
+
+def run_child(pipeline, path):
+    """
+    Runs one pipeline against the SQLite file and prints its metrics.
+    """
+    import resource
+    import mysql.connector
+
+    mysql.connector.connect = lambda **kwargs: StandInConnection(path)
+    module, function, arguments, _ = PIPELINES[pipeline]
+    generator = getattr(__import__(module), function)(**arguments)
+
+    rows_out = 0
+    first_row = None
+    start = time.perf_counter()
+    for item in generator:
+        if first_row is None:
+            first_row = time.perf_counter() - start
+        rows_out += len(item) if isinstance(item, list) else 1
+    seconds = time.perf_counter() - start
+
+    peak_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    if sys.platform == 'darwin':
+        peak_kb //= 1024
+    print(json.dumps({
+        'rows_out': rows_out,
+        'seconds': seconds,
+        'first_row_seconds': first_row,
+        'peak_rss_kb': peak_kb,
+    }))
+
+
+def measure(pipeline, path):
+    output = subprocess.run(
+        [sys.executable, os.path.abspath(__file__), '--child', pipeline, path],
+        capture_output=True, text=True, check=True,
+        cwd=os.path.dirname(os.path.abspath(__file__))
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def compare(results, baseline_path, threshold):
+    """
+    Prints throughput changes against a previous run.
+
+    Returns:
+        int: Number of results slower than the threshold allows
+    """
+    with open(baseline_path, 'r', encoding='utf-8') as file:
+        baseline = {(r['pipeline'], r['rows']): r
+                    for r in json.load(file)['results']}
+    regressions = 0
+    print(f"\n{'pipeline':<26} {'rows':>9} {'before':>12} {'after':>12} {'change':>8}")
+    for result in results:
+        old = baseline.get((result['pipeline'], result['rows']))
+        if not old or not old['rows_per_second']:
+            continue
+        change = result['rows_per_second'] / old['rows_per_second'] - 1
+        flag = ''
+        if change < -threshold:
+            flag = '  REGRESSION'
+            regressions += 1
+        print(f"{result['pipeline']:<26} {result['rows']:>9} "
+              f"{old['rows_per_second']:>12.0f} "
+              f"{result['rows_per_second']:>12.0f} {change:>+8.1%}{flag}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=DEFAULT_SIZES)
+    parser.add_argument('--pipelines', nargs='+', default=list(PIPELINES),
+                        choices=list(PIPELINES))
+    parser.add_argument('--workdir', default='bench_data',
+                        help='directory for the generated SQLite files')
+    parser.add_argument('--output', default='bench_results.json')
+    parser.add_argument('--compare', metavar='PREVIOUS_JSON')
+    parser.add_argument('--threshold', type=float, default=0.10,
+                        help='throughput drop reported as a regression')
+    parser.add_argument('--child', nargs=2, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        run_child(*args.child)
+        return 0
+
+    os.makedirs(args.workdir, exist_ok=True)
+    results = []
+    print(f"{'pipeline':<26} {'rows':>9} {'rows/s':>12} {'first row ms':>13} {'peak RSS KB':>12}")
+    for size in sorted(args.sizes):
+        path = os.path.abspath(os.path.join(args.workdir, f"user_data_{size}.db"))
+        generate_table(path, size)
+        for pipeline in args.pipelines:
+            limit = PIPELINES[pipeline][3]
+            if limit is not None and size > limit:
+                continue
+            metrics = measure(pipeline, path)
+            seconds = metrics['seconds']
+            result = {
+                'pipeline': pipeline,
+                'rows': size,
+                'rows_per_second': metrics['rows_out'] / seconds if seconds else 0,
+                **metrics,
+            }
+            results.append(result)
+            first_ms = (metrics['first_row_seconds'] or 0) * 1000
+            print(f"{pipeline:<26} {size:>9} {result['rows_per_second']:>12.0f} "
+                  f"{first_ms:>13.2f} {metrics['peak_rss_kb']:>12}")
+
+    with open(args.output, 'w', encoding='utf-8') as file:
+        json.dump({
+            'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'results': results,
+        }, file, indent=2)
+    print(f"\nResults written to {args.output}")
+
+    if args.compare:
+        return 1 if compare(results, args.compare, args.threshold) else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
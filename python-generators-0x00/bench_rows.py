@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+Compare dictionary rows with compact UserRow records.
+
+Memory per row and decode throughput are measured offline on synthetic
+cursor tuples shaped like the ones mysql-connector returns (age as a
+Decimal). With --live, rows per second of stream_users in both formats
+are measured against the ALX_prodev database as well.
+
+Usage:
+    python3 bench_rows.py [rows] [--live]
+"""
+
+import sys
+import time
+import tracemalloc
+import uuid
+from decimal import Decimal
+
+from rows import USER_FIELDS, make_decoder
+
+
+def synthetic_tuples(count):
+    """
+    Returns cursor-style tuples for count users.
+    """
+    return [(str(uuid.uuid4()), f"User {i}", f"user{i}@example.com",
+             Decimal(18 + i % 100)) for i in range(count)]
+
+
+def as_dicts(rows):
+    return [dict(zip(USER_FIELDS, row)) for row in rows]
+
+
+def bytes_per_row(build, rows):
+    """
+    Measures the memory allocated by build(rows), per row.
+    """
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    built = build(rows)
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del built
+    return (after - before) / len(rows)
+
+
+def rows_per_second(build, rows):
+    start = time.perf_counter()
+    build(rows)
+    return len(rows) / (time.perf_counter() - start)
+
+
+def live_rows_per_second(row_format):
+    stream_users = __import__('0-stream_users').stream_users
+    start = time.perf_counter()
+    count = sum(1 for _ in stream_users(row_format=row_format))
+    return count / (time.perf_counter() - start), count
+
+
+def main(count, live):
+    rows = synthetic_tuples(count)
+    decode = make_decoder(USER_FIELDS)
+    print(f"{'format':<8} {'bytes/row':>10} {'decode rows/s':>15}")
+    for label, build in (('dict', as_dicts), ('record', decode)):
+        print(f"{label:<8} {bytes_per_row(build, rows):>10.0f} "
+              f"{rows_per_second(build, rows):>15.0f}")
+
+    if live:
+        print(f"\n{'format':<8} {'rows':>10} {'stream rows/s':>15}")
+        for label in ('dict', 'record'):
+            rate, streamed = live_rows_per_second(label)
+            print(f"{label:<8} {streamed:>10} {rate:>15.0f}")
+
+
+if __name__ == "__main__":
+    args = [arg for arg in sys.argv[1:] if arg != '--live']
+    main(int(args[0]) if args else 100000, '--live' in sys.argv[1:])
@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""
+Benchmark peak client memory of stream_users as the user_data table grows.
+
+Synthetic rows (user_id prefixed with 'bench-') are added to user_data for
+each table size, then stream_users is run in a fresh subprocess per mode
+(the default buffered cursor, and unbuffered=True) so that the reported
+peak RSS belongs to that run alone. The synthetic rows are removed again
+when the benchmark finishes.
+
+Usage:
+    python3 bench_stream_users.py [size ...]
+"""
+
+import random
+import subprocess
+import sys
+import uuid
+
+import seed
+
+BENCH_PREFIX = 'bench-'
+DEFAULT_SIZES = [10000, 100000, 1000000]
+
+# Runs inside the child process; prints "<rows> <peak_rss_kb>"
+CHILD_SCRIPT = """
+import resource, sys
+stream_users = __import__('0-stream_users').stream_users
+unbuffered = sys.argv[1] == 'unbuffered'
+count = 0
+for _ in stream_users(unbuffered=unbuffered):
+    count += 1
+print(count, resource.getrusage(resource.RUSAGE_SELF).ru_maxrss)
+"""
+
+
+def grow_table(connection, target_rows, batch_size=10000):
+    """
+    Adds synthetic users until user_data holds at least target_rows rows.
+
+    Args:
+        connection: MySQL connection object
+        target_rows (int): Desired total row count
+        batch_size (int): Number of rows inserted per statement
+    """
+    cursor = connection.cursor()
+    cursor.execute("SELECT COUNT(*) FROM user_data")
+    missing = target_rows - cursor.fetchone()[0]
+    ages = random.Random(0)
+    insert_query = """
+    INSERT INTO user_data (user_id, name, email, age)
+    VALUES (%s, %s, %s, %s)
+    """
+    while missing > 0:
+        rows = []
+        for _ in range(min(batch_size, missing)):
+            user_id = BENCH_PREFIX + uuid.uuid4().hex[:29]
+            age = ages.randint(18, 120)
+            rows.append((user_id, 'Bench User', 'bench@example.com', age))
+        cursor.executemany(insert_query, rows)
+        seed.apply_age_deltas(cursor, seed.age_bucket_deltas(r[3] for r in rows))
+        connection.commit()
+        missing -= len(rows)
+    cursor.close()
+
+
+def remove_synthetic_rows(connection):
+    """
+    Deletes every row added by grow_table.
+
+    Args:
+        connection: MySQL connection object
+    """
+    cursor = connection.cursor()
+    cursor.execute(
+        "DELETE FROM user_data WHERE user_id LIKE %s", (BENCH_PREFIX + '%',)
+    )
+    seed.rebuild_age_aggregates(cursor)
+    connection.commit()
+    cursor.close()
+
+
+def measure(mode):
+    """
+    Streams the whole table in a subprocess and reports its peak RSS.
+
+    Args:
+        mode (str): 'buffered' or 'unbuffered'
+
+    Returns:
+        tuple: (rows streamed, peak RSS in kilobytes)
+    """
+    output = subprocess.run(
+        [sys.executable, '-c', CHILD_SCRIPT, mode],
+        capture_output=True, text=True, check=True
+    ).stdout.split()
+    return int(output[0]), int(output[1])
+
+
+def main(sizes):
+    connection = seed.connect_to_prodev()
+    if not connection:
+        return
+    try:
+        print(f"{'rows':>10} {'buffered RSS (KB)':>18} {'unbuffered RSS (KB)':>20}")
+        for size in sorted(sizes):
+            grow_table(connection, size)
+            rows, buffered_rss = measure('buffered')
+            _, unbuffered_rss = measure('unbuffered')
+            print(f"{rows:>10} {buffered_rss:>18} {unbuffered_rss:>20}")
+    finally:
+        remove_synthetic_rows(connection)
+        connection.close()
+
+
+if __name__ == "__main__":
+    main([int(arg) for arg in sys.argv[1:]] or DEFAULT_SIZES)
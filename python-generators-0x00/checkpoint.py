@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+Resumable, checkpointed scans over user_data.
+
+stream_users, stream_users_in_batches and batch_processing accept a
+resume_after user_id and then scan in user_id order, so the last user_id a
+consumer finished with is a durable position. checkpointed() persists that
+position to a local file every N rows; after a crash, running the same
+job again only redoes the rows after the last checkpoint:
+
+    stream_users = __import__('0-stream_users').stream_users
+    for user in checkpointed(stream_users, 'export.ckpt', every=10000):
+        export(user)
+"""
+
+import json
+import os
+
+
+class Checkpoint:
+    """
+    A scan position stored in a small JSON file.
+
+    Writes go to a temporary file that is fsynced and then renamed over
+    the checkpoint, so a crash never leaves a half-written position.
+    """
+
+    def __init__(self, path):
+        """
+        Args:
+            path (str): Location of the checkpoint file
+        """
+        self.path = path
+
+    def load(self):
+        """
+        Returns the saved user_id, or None when there is no checkpoint.
+        """
+        try:
+            with open(self.path, 'r', encoding='utf-8') as file:
+                return json.load(file)['user_id']
+        except FileNotFoundError:
+            return None
+
+    def save(self, user_id, rows=0):
+        """
+        Durably records user_id as the last fully processed row.
+
+        Args:
+            user_id (str): Position to resume after
+            rows (int): Rows processed so far, kept for reference
+        """
+        temporary = self.path + '.tmp'
+        with open(temporary, 'w', encoding='utf-8') as file:
+            json.dump({'user_id': user_id, 'rows': rows}, file)
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(temporary, self.path)
+
+    def clear(self):
+        """
+        Removes the checkpoint so the next run starts from the beginning.
+        """
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
+
+
+def checkpointed(stream, path, every=1000, **kwargs):
+    """
+    Generator that runs a resumable stream and checkpoints its position.
+
+    A row counts as processed once the consumer asks for the next one.
+    The position is saved every ``every`` processed rows, when the
+    consumer stops early and when the stream fails (the resumable streams
+    raise database errors instead of ending quietly). The checkpoint is
+    removed only once the stream is exhausted, so the next run after a
+    complete scan is a fresh one.
+
+    Args:
+        stream: Generator function accepting resume_after, such as
+            stream_users or batch_processing, yielding rows with a user_id
+        path (str): Checkpoint file
+        every (int): Rows between checkpoints
+        **kwargs: Further arguments for stream
+
+    Yields:
+        The rows of stream, starting after the last checkpoint
+    """
+    checkpoint = Checkpoint(path)
+    position = checkpoint.load()
+    processed = 0
+    # '' still asks the stream for a user_id-ordered scan on a fresh run
+    resume_after = position if position is not None else ''
+
+    try:
+        for row in stream(resume_after=resume_after, **kwargs):
+            yield row
+            # The consumer came back for more, so this row is done
+            position = row['user_id']
+            processed += 1
+            if processed % every == 0:
+                checkpoint.save(position, processed)
+    except BaseException:
+        # Stopped early (GeneratorExit), interrupted or failed: keep the
+        # position so the next run resumes from it
+        if position is not None:
+            checkpoint.save(position, processed)
+        raise
+    checkpoint.clear()
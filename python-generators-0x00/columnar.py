@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""
+Columnar batches for the user_data generators.
+
+A ColumnBatch holds one array per field instead of one dict per row.
+Integer columns such as age are stored as typed integer arrays (NumPy when
+it is installed, the stdlib array module otherwise) rather than Decimal
+objects, so filters can be evaluated over a whole batch at once.
+"""
+
+from array import array
+from itertools import compress
+
+try:
+    import numpy
+except ImportError:  # pragma: no cover - NumPy is optional
+    numpy = None
+
+from pushdown import OPERATORS
+
+INTEGER_COLUMNS = frozenset({'age'})
+
+
+def _integer_column(values):
+    if numpy is not None:
+        return numpy.fromiter(map(int, values), dtype=numpy.int64,
+                              count=len(values))
+    return array('q', map(int, values))
+
+
+def _object_column(values):
+    if numpy is not None:
+        column = numpy.empty(len(values), dtype=object)
+        column[:] = values
+        return column
+    return list(values)
+
+
+def _as_list(values):
+    # NumPy and stdlib arrays convert back to plain Python values
+    return values.tolist() if hasattr(values, 'tolist') else values
+
+
+class ColumnBatch:
+    """
+    A batch of rows stored column by column.
+
+    Attributes:
+        names (tuple): Column names in select order
+        columns (dict): Column name -> array of values
+    """
+
+    def __init__(self, names, columns, length):
+        self.names = tuple(names)
+        self.columns = columns
+        self._length = length
+
+    @classmethod
+    def from_rows(cls, rows, names):
+        """
+        Pivots cursor tuples into columns.
+
+        Args:
+            rows (list): Tuples as returned by a non-dictionary cursor
+            names (sequence): Column names matching the tuple positions
+
+        Returns:
+            ColumnBatch: The same rows in columnar form
+        """
+        pivoted = list(zip(*rows)) if rows else [()] * len(names)
+        columns = {}
+        for name, values in zip(names, pivoted):
+            if name in INTEGER_COLUMNS:
+                columns[name] = _integer_column(values)
+            else:
+                columns[name] = _object_column(values)
+        return cls(names, columns, len(rows))
+
+    def __len__(self):
+        return self._length
+
+    def __getitem__(self, name):
+        return self.columns[name]
+
+    def mask(self, column, op, value):
+        """
+        Evaluates ``column <op> value`` for every row of the batch.
+
+        Args:
+            column (str): Column name
+            op (str): Operator as accepted by pushdown.OPERATORS
+            value: Right-hand side of the comparison
+
+        Returns:
+            Boolean NumPy array or list of bools, one per row
+        """
+        values = self.columns[column]
+        if numpy is not None:
+            if op == 'in':
+                return numpy.isin(values, list(value))
+            return OPERATORS[op](values, value)
+        compare = OPERATORS[op]
+        return [compare(v, value) for v in values]
+
+    def filter(self, mask):
+        """
+        Returns a new batch holding only the rows where mask is true.
+        """
+        if numpy is not None:
+            mask = numpy.asarray(mask, dtype=bool)
+            columns = {name: values[mask]
+                       for name, values in self.columns.items()}
+            return ColumnBatch(self.names, columns, int(mask.sum()))
+        columns = {}
+        for name, values in self.columns.items():
+            kept = list(compress(values, mask))
+            if isinstance(values, array):
+                kept = array(values.typecode, kept)
+            columns[name] = kept
+        return ColumnBatch(self.names, columns, sum(1 for m in mask if m))
+
+    def rows(self):
+        """
+        Converts the batch back to a list of per-row dictionaries.
+        """
+        columns = [_as_list(self.columns[name]) for name in self.names]
+        return [dict(zip(self.names, values)) for values in zip(*columns)]
@@ -0,0 +1,348 @@
+#!/usr/bin/env python3
+"""
+File-backed user source reading user_data.csv directly, without MySQL.
+
+The CSV file is memory-mapped. Streaming walks the mapping line by line
+and hands out memoryview slices of it, so nothing is copied until a row is
+actually decoded. A user_id -> byte offset index is built on first use and
+saved next to the file, which makes single-user lookups O(1):
+
+    source = CsvUserSource('user_data.csv')
+    for user in source.stream_users():
+        ...
+    for batch in source.stream_users_in_batches(100, where=[('age', '>', 25)]):
+        ...
+    user = source.get('00234e50-34eb-4ce2-94ec-26e3fa749796')
+
+Rows look like the ones the MySQL generators return: dictionaries with a
+Decimal age, or rows.UserRow objects with row_format='record'. user_ids
+are matched as the user_data primary key compares them, ignoring case,
+and as with INSERT IGNORE in seed.py the first of repeated user_ids wins.
+Fields containing line breaks are not supported.
+"""
+
+import csv
+import json
+import mmap
+import os
+from decimal import Decimal, ROUND_HALF_UP
+
+from pushdown import USER_DATA_COLUMNS, compile_select
+from rows import UserRow
+
+INDEX_SUFFIX = '.idx'
+# Bumped whenever the saved index changes meaning, so old files are rebuilt
+INDEX_VERSION = 2
+
+
+def user_key(user_id):
+    """
+    Returns user_id as the user_data primary key compares it.
+
+    The key uses the table's default, case-insensitive collation, so ids
+    differing only by case are the same row. user_ids are ASCII UUIDs,
+    for which lower() matches MySQL's LOWER().
+    """
+    return user_id.lower()
+
+
+def _split(line):
+    """
+    Splits one CSV line (bytes) into stripped fields.
+    """
+    text = line.decode('utf-8')
+    if '"' in text:
+        fields = next(csv.reader([text]))
+    else:
+        fields = text.split(',')
+    return [field.strip() for field in fields]
+
+
+def _stored_age(age):
+    # DECIMAL(10, 0) rounds half away from zero
+    return Decimal(age).quantize(Decimal(1), rounding=ROUND_HALF_UP)
+
+
+class CsvUserSource:
+    """
+    Streams and looks up users in a user_data CSV file.
+
+    The source opens lazily and can be used as a context manager; close()
+    unmaps the file. Memoryviews from iter_raw() must not be used after
+    that.
+    """
+
+    def __init__(self, path='user_data.csv', index_path=None):
+        """
+        Args:
+            path (str): CSV file with a user_id,name,email,age header
+            index_path (str): Where to keep the offset index, by default
+                next to the CSV file
+        """
+        self.path = path
+        self.index_path = index_path or path + INDEX_SUFFIX
+        self.columns = None
+        self._file = None
+        self._map = None
+        self._data_start = 0
+        self._index = None
+
+    def open(self):
+        """
+        Maps the file and reads its header. Called automatically.
+        """
+        if self._map is not None:
+            return
+        self._file = open(self.path, 'rb')
+        if os.fstat(self._file.fileno()).st_size == 0:
+            self._file.close()
+            self._file = None
+            raise ValueError(f"{self.path} is empty")
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        end = self._map.find(b'\n')
+        if end < 0:
+            end = len(self._map)
+        self.columns = tuple(_split(self._map[:end].rstrip(b'\r')))
+        for column in USER_DATA_COLUMNS:
+            if column not in self.columns:
+                self.close()
+                raise ValueError(f"{self.path} has no {column} column")
+        self._data_start = end + 1
+
+    def close(self):
+        """
+        Unmaps and closes the file.
+        """
+        if self._map is not None:
+            try:
+                self._map.close()
+            except BufferError:
+                # Views handed out by iter_raw are still alive; the mapping
+                # goes away with the last of them
+                pass
+            self._map = None
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def __enter__(self):
+        self.open()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def _lines(self):
+        """
+        Yields (start, end) byte positions of the non-empty data lines.
+        """
+        self.open()
+        data = self._map
+        size = len(data)
+        start = self._data_start
+        while start < size:
+            end = data.find(b'\n', start)
+            if end < 0:
+                end = size
+            stop = end
+            if stop > start and data[stop - 1] == 13:  # '\r'
+                stop -= 1
+            if stop > start:
+                yield start, stop
+            start = end + 1
+
+    def iter_raw(self):
+        """
+        Generator yielding every data line as a memoryview of the mapping.
+
+        Yields:
+            memoryview: The bytes of one line, without its line break
+        """
+        self.open()
+        view = memoryview(self._map)
+        for start, stop in self._lines():
+            yield view[start:stop]
+
+    def _line_at(self, offset):
+        data = self._map
+        end = data.find(b'\n', offset)
+        if end < 0:
+            end = len(data)
+        return data[offset:end].rstrip(b'\r')
+
+    # Index
+
+    def _file_signature(self):
+        status = os.stat(self.path)
+        return status.st_size, status.st_mtime_ns
+
+    def _build_index(self):
+        """
+        Maps every user_key() to the offset of its first line.
+        """
+        position = self.columns.index('user_id')
+        data = self._map
+        index = {}
+        for start, stop in self._lines():
+            if position == 0 and data[start] != 34:  # no leading '"'
+                comma = data.find(b',', start, stop)
+                user_id = data[start:comma if comma >= 0 else stop]
+                user_id = user_id.decode('utf-8').strip()
+            else:
+                user_id = _split(data[start:stop])[position]
+            index.setdefault(user_key(user_id), start)
+        return index
+
+    def _load_index(self):
+        """
+        Reads the saved index, or returns None if it is missing or stale.
+        """
+        try:
+            with open(self.index_path, 'r', encoding='utf-8') as file:
+                saved = json.load(file)
+        except (OSError, ValueError):
+            return None
+        size, mtime_ns = self._file_signature()
+        if (saved.get('version') != INDEX_VERSION
+                or saved.get('size') != size
+                or saved.get('mtime_ns') != mtime_ns):
+            return None
+        return saved['offsets']
+
+    def _save_index(self, index):
+        size, mtime_ns = self._file_signature()
+        temporary = self.index_path + '.tmp'
+        with open(temporary, 'w', encoding='utf-8') as file:
+            json.dump({'version': INDEX_VERSION, 'size': size,
+                       'mtime_ns': mtime_ns, 'offsets': index}, file)
+        os.replace(temporary, self.index_path)
+
+    def index(self):
+        """
+        Returns the user_key -> byte offset index, loading or building it.
+
+        A saved index is reused only while the CSV file keeps the size and
+        modification time it was built for.
+
+        Returns:
+            dict: user_key(user_id) -> offset of the first line with that
+                user_id in the file
+        """
+        if self._index is None:
+            self.open()
+            index = self._load_index()
+            if index is None:
+                index = self._build_index()
+                try:
+                    self._save_index(index)
+                except OSError as e:
+                    print(f"Error saving index {self.index_path}: {e}")
+            self._index = index
+        return self._index
+
+    # Decoding
+
+    def decode(self, line, row_format='dict'):
+        """
+        Decodes one line into a row.
+
+        Args:
+            line: bytes or memoryview from iter_raw()
+            row_format (str): 'dict' for a dictionary with a Decimal age,
+                'record' for a rows.UserRow with an int age
+
+        Returns:
+            dict or UserRow
+        """
+        values = dict(zip(self.columns, _split(bytes(line))))
+        age = _stored_age(values['age'])
+        if row_format == 'record':
+            return UserRow(values['user_id'], values['name'],
+                           values['email'], int(age))
+        return {'user_id': values['user_id'], 'name': values['name'],
+                'email': values['email'], 'age': age}
+
+    def get(self, user_id, row_format='dict'):
+        """
+        Looks up one user by user_id, ignoring case, through the offset
+        index.
+
+        Returns:
+            dict or UserRow, or None if there is no such user
+        """
+        offset = self.index().get(user_key(user_id))
+        if offset is None:
+            return None
+        return self.decode(self._line_at(offset), row_format)
+
+    # Streaming, with the interface of the MySQL generators
+
+    def stream_users(self, row_format='dict', resume_after=None):
+        """
+        Generator yielding the users in the file one at a time.
+
+        Args:
+            row_format (str): 'dict' or 'record', as for stream_users
+            resume_after (str): Yield in user_key() order, starting after
+                this user_id; None keeps file order
+
+        Yields:
+            dict or UserRow: One user per iteration
+        """
+        index = self.index()
+        if resume_after is not None:
+            # Same order and seek semantics as the MySQL resume_after scans
+            after = user_key(resume_after)
+            for key in sorted(index):
+                if key > after:
+                    yield self.decode(self._line_at(index[key]), row_format)
+            return
+        view = memoryview(self._map)
+        for start, stop in self._lines():
+            row = self.decode(view[start:stop], row_format)
+            # Skip later copies of a user_id, as INSERT IGNORE would
+            if index[user_key(row['user_id'])] == start:
+                yield row
+
+    def stream_users_in_batches(self, batch_size, columns=None, where=None,
+                                row_format='dict', resume_after=None):
+        """
+        Generator yielding lists of users, like stream_users_in_batches.
+
+        Filters use the same (column, op, value) tuples and callables as
+        pushdown.py; they all run in Python here. Batches left empty by
+        the filters are skipped.
+
+        Args:
+            batch_size (int): Number of rows read per batch
+            columns (sequence): Columns to keep in dictionary rows, or None
+                for all of them
+            where (sequence): Filters
+            row_format (str): 'dict' or 'record'
+            resume_after (str): As for stream_users
+
+        Yields:
+            list: Rows of each batch
+        """
+        _, _, predicates = compile_select(columns, where or (), pushdown=False)
+        keep = list(columns) if columns else None
+        batch = []
+        for row in self.stream_users(row_format, resume_after):
+            batch.append(row)
+            if len(batch) >= batch_size:
+                batch = self._finish(batch, predicates, keep, row_format)
+                if batch:
+                    yield batch
+                batch = []
+        batch = self._finish(batch, predicates, keep, row_format)
+        if batch:
+            yield batch
+
+    @staticmethod
+    def _finish(batch, predicates, keep, row_format):
+        if predicates:
+            batch = [row for row in batch
+                     if all(check(row) for check in predicates)]
+        if keep is not None and row_format == 'dict':
+            batch = [{column: row[column] for column in keep} for row in batch]
+        return batch
@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""
+Shared-scan fan-out: one pass over user_data feeding several consumers.
+
+Each registered consumer is a function that takes an iterator of rows and
+returns a result. It runs on its own thread with its own bounded buffer;
+the scan blocks when a buffer is full, so the slowest consumer sets the
+pace and the result set is never held in memory:
+
+    stream_users = __import__('0-stream_users').stream_users
+    ages = __import__('4-stream_ages')
+
+    scan = SharedScan(lambda: stream_users(unbuffered=True))
+    scan.register('stats', lambda rows: ages.compute_age_statistics(
+        ages=(int(row['age']) for row in rows)))
+    scan.register('adults', lambda rows: sum(1 for r in rows if r['age'] > 25))
+    results = scan.run()
+"""
+
+import queue
+import threading
+
+_END = object()
+
+
+class _Consumer:
+    """
+    A registered consumer with its buffer and thread.
+    """
+
+    def __init__(self, name, function, buffer_size):
+        self.name = name
+        self.function = function
+        self.buffer = queue.Queue(maxsize=buffer_size)
+        self.result = None
+        self.error = None
+        self.thread = threading.Thread(target=self._run, name=f"fanout-{name}",
+                                       daemon=True)
+
+    def _rows(self):
+        while True:
+            chunk = self.buffer.get()
+            if chunk is _END:
+                return
+            yield from chunk
+
+    def _run(self):
+        try:
+            self.result = self.function(self._rows())
+        except BaseException as e:
+            self.error = e
+
+    def offer(self, chunk):
+        """
+        Blocks until the chunk is buffered; returns False if the consumer
+        has already stopped reading.
+        """
+        while self.thread.is_alive():
+            try:
+                self.buffer.put(chunk, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+
+class SharedScan:
+    """
+    Runs one scan and feeds every row to all registered consumers.
+    """
+
+    def __init__(self, source, chunk_size=500):
+        """
+        Args:
+            source: Zero-argument callable returning an iterator of rows,
+                e.g. stream_users, called once per run()
+            chunk_size (int): Rows handed to the consumers per buffer slot
+        """
+        self.source = source
+        self.chunk_size = chunk_size
+        self._consumers = []
+
+    def register(self, name, function, buffer_size=8):
+        """
+        Adds a consumer.
+
+        Args:
+            name (str): Key of the consumer's result in run()'s output
+            function: Callable taking an iterator of rows
+            buffer_size (int): Chunks that may wait for this consumer
+        """
+        if any(spec[0] == name for spec in self._consumers):
+            raise ValueError(f"Consumer {name!r} is already registered")
+        self._consumers.append((name, function, buffer_size))
+
+    def run(self):
+        """
+        Scans the source once, feeding every consumer.
+
+        Consumers that return before the end of the scan simply stop
+        receiving rows. If a consumer raises, the scan carries on for the
+        others and the first error is re-raised at the end.
+
+        Returns:
+            dict: Consumer name -> the value its function returned
+        """
+        consumers = [_Consumer(*spec) for spec in self._consumers]
+        for consumer in consumers:
+            consumer.thread.start()
+
+        live = list(consumers)
+        chunk = []
+        rows = self.source()
+        try:
+            for row in rows:
+                chunk.append(row)
+                if len(chunk) >= self.chunk_size:
+                    live = [c for c in live if c.offer(chunk)]
+                    chunk = []
+                    if not live:
+                        break
+            if chunk and live:
+                live = [c for c in live if c.offer(chunk)]
+        finally:
+            close = getattr(rows, 'close', None)
+            if close is not None:
+                close()
+            for consumer in live:
+                consumer.offer(_END)
+            for consumer in consumers:
+                consumer.thread.join()
+
+        for consumer in consumers:
+            if consumer.error is not None:
+                raise consumer.error
+        return {consumer.name: consumer.result for consumer in consumers}
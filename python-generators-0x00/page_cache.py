@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""
+Bounded LRU page cache for lazy_paginate.
+
+Pages are cached by their position (offset or keyset anchor) and page
+size, expire after a TTL, and are evicted least recently used first once
+either the page count or the estimated byte size is over its cap. Every
+cache registers itself with seed, so insert_data invalidates it after
+writing to user_data.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+
+import seed
+from adaptive_batching import row_bytes
+
+
+class PageCache:
+    """
+    Thread-safe LRU cache of user_data pages with TTL and size caps.
+
+    Cached pages are shared between callers and must be treated as
+    read-only.
+
+    Attributes:
+        hits (int): Lookups served from the cache
+        misses (int): Lookups that had to go to the database
+        evictions (int): Pages dropped to stay under the caps
+    """
+
+    def __init__(self, max_pages=256, max_bytes=32 * 1024 * 1024, ttl=60.0):
+        """
+        Args:
+            max_pages (int): Maximum number of cached pages
+            max_bytes (int): Maximum estimated size of all cached pages
+            ttl (float): Seconds a page stays valid, or None for no expiry
+        """
+        self.max_pages = max_pages
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._pages = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        seed.register_write_listener(self._on_write)
+
+    def __len__(self):
+        return len(self._pages)
+
+    def get(self, key):
+        """
+        Returns the cached rows for key, or None on a miss or expiry.
+        """
+        with self._lock:
+            entry = self._pages.get(key)
+            if entry is not None:
+                expires, size, rows = entry
+                if expires is None or expires > time.monotonic():
+                    self._pages.move_to_end(key)
+                    self.hits += 1
+                    return rows
+                self._drop(key)
+            self.misses += 1
+            return None
+
+    def put(self, key, rows):
+        """
+        Caches rows under key, evicting older pages as needed.
+
+        Pages larger than max_bytes on their own are not cached.
+        """
+        size = sum(row_bytes(row) for row in rows)
+        if size > self.max_bytes:
+            return
+        expires = None if self.ttl is None else time.monotonic() + self.ttl
+        with self._lock:
+            if key in self._pages:
+                self._drop(key)
+            self._pages[key] = (expires, size, rows)
+            self._bytes += size
+            while (len(self._pages) > self.max_pages
+                   or self._bytes > self.max_bytes):
+                self._drop(next(iter(self._pages)))
+                self.evictions += 1
+
+    def invalidate(self):
+        """
+        Drops every cached page.
+        """
+        with self._lock:
+            self._pages.clear()
+            self._bytes = 0
+
+    def _drop(self, key):
+        _, size, _ = self._pages.pop(key)
+        self._bytes -= size
+
+    def _on_write(self, table):
+        if table == 'user_data':
+            self.invalidate()
+
+    def stats(self):
+        """
+        Returns the counters and current occupancy as a dictionary.
+        """
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'pages': len(self._pages),
+            'bytes': self._bytes,
+        }
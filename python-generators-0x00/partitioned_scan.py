@@ -0,0 +1,240 @@
+#!/usr/bin/env python3
+"""
+Parallel partitioned scan of the user_data table.
+
+The table is split into disjoint user_id ranges and each range is streamed
+from its own connection in its own worker process. Per-row work (row_fn)
+runs in the workers, so CPU-heavy processing scales with the number of
+partitions; results come back in batches over bounded queues.
+"""
+
+import multiprocessing
+import queue
+import traceback
+
+import seed
+
+_DONE = '__done__'
+
+
+def compute_boundaries(connection, partitions):
+    """
+    Splits user_data into key ranges holding roughly equal row counts.
+
+    Args:
+        connection: MySQL connection object
+        partitions (int): Number of ranges wanted
+
+    Returns:
+        list: (low, high) tuples in key order, low inclusive and high
+            exclusive, with None for an open end
+    """
+    cursor = connection.cursor()
+    cursor.execute("SELECT COUNT(*) FROM user_data")
+    total = cursor.fetchone()[0]
+    cuts = []
+    for i in range(1, partitions):
+        cursor.execute(
+            "SELECT user_id FROM user_data ORDER BY user_id LIMIT 1 OFFSET %s",
+            (i * total // partitions,)
+        )
+        row = cursor.fetchone()
+        if row and (not cuts or row[0] > cuts[-1]):
+            cuts.append(row[0])
+    cursor.close()
+    bounds = [None] + cuts + [None]
+    return list(zip(bounds[:-1], bounds[1:]))
+
+
+def _scan_range(index, low, high, row_fn, batch_size, out):
+    """
+    Worker process body: streams one key range into the out queue.
+    """
+    connection = None
+    try:
+        connection = seed.connect_to_prodev()
+        if connection is None:
+            raise RuntimeError("could not connect to ALX_prodev")
+        clauses = []
+        params = []
+        if low is not None:
+            clauses.append("user_id >= %s")
+            params.append(low)
+        if high is not None:
+            clauses.append("user_id < %s")
+            params.append(high)
+        query = "SELECT user_id, name, email, age FROM user_data"
+        if clauses:
+            query += " WHERE " + " AND ".join(clauses)
+        query += " ORDER BY user_id"
+
+        cursor = connection.cursor(dictionary=True, buffered=False)
+        cursor.execute(query, tuple(params))
+        while True:
+            rows = cursor.fetchmany(batch_size)
+            if not rows:
+                break
+            if row_fn is not None:
+                # A row_fn returning None drops the row
+                rows = [r for r in map(row_fn, rows) if r is not None]
+            if rows:
+                out.put((index, rows))
+        cursor.close()
+        out.put((index, _DONE))
+    except BaseException:
+        out.put((index, traceback.format_exc()))
+    finally:
+        if connection is not None:
+            connection.close()
+
+
+class PartitionedScan:
+    """
+    Streams user_data from several worker processes at once.
+
+    Use either merged() for a single iterator or partitions() for one
+    iterator per key range, not both. The workers start on first use and
+    are stopped by close() (or leaving the with block), including when the
+    consumer stops iterating early.
+    """
+
+    def __init__(self, partitions=4, row_fn=None, batch_size=1000,
+                 queue_depth=8):
+        """
+        Args:
+            partitions (int): Number of key ranges and worker processes
+            row_fn: Picklable function applied to every row in the
+                workers; rows for which it returns None are dropped
+            batch_size (int): Rows per fetch and per queue message
+            queue_depth (int): Batches a worker may queue before it blocks
+        """
+        self.partition_count = partitions
+        self.row_fn = row_fn
+        self.batch_size = batch_size
+        self.queue_depth = queue_depth
+        self.bounds = None
+        self._context = multiprocessing.get_context()
+        self._workers = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+        return False
+
+    def _start(self, queues):
+        if self._workers:
+            raise RuntimeError("PartitionedScan can only be consumed once")
+        connection = seed.connect_to_prodev()
+        if connection is None:
+            raise RuntimeError("could not connect to ALX_prodev")
+        try:
+            self.bounds = compute_boundaries(connection, self.partition_count)
+        finally:
+            connection.close()
+        for index, (low, high) in enumerate(self.bounds):
+            out = queues[index % len(queues)]
+            worker = self._context.Process(
+                target=_scan_range,
+                args=(index, low, high, self.row_fn, self.batch_size, out),
+                daemon=True
+            )
+            worker.start()
+            self._workers.append(worker)
+
+    def _read(self, source, indexes):
+        """
+        Yields rows from a queue until the given partitions have finished.
+
+        Raises:
+            RuntimeError: If a worker failed, or died without finishing
+                and left nothing in the queue
+        """
+        pending = set(indexes)
+        while pending:
+            try:
+                index, payload = source.get(timeout=1)
+            except queue.Empty:
+                # Only this queue's own workers matter: others may be
+                # alive but blocked on queues nobody is reading yet
+                for owner in sorted(pending):
+                    worker = self._workers[owner]
+                    if not worker.is_alive() and source.empty():
+                        raise RuntimeError(
+                            f"partition {owner} worker exited with code "
+                            f"{worker.exitcode} before finishing")
+                continue
+            if payload == _DONE:
+                pending.discard(index)
+            elif isinstance(payload, str):
+                raise RuntimeError(f"partition {index} failed:\n{payload}")
+            else:
+                yield from payload
+
+    def merged(self, ordered=False):
+        """
+        Yields the rows of every partition through one iterator.
+
+        Args:
+            ordered (bool): Yield rows in user_id order (partition by
+                partition) rather than as soon as any worker produces them
+
+        Yields:
+            dict or row_fn result: Rows from all partitions
+        """
+        try:
+            if ordered:
+                for rows in self.partitions():
+                    yield from rows
+            else:
+                shared = self._context.Queue(
+                    self.queue_depth * self.partition_count
+                )
+                self._start([shared])
+                yield from self._read(shared, range(len(self.bounds)))
+        finally:
+            self.close()
+
+    def partitions(self):
+        """
+        Starts the workers and returns one row iterator per key range.
+
+        Each worker has its own bounded queue, so a partition that is not
+        being consumed only stalls its own worker.
+
+        Returns:
+            list: Iterators in key-range order
+        """
+        queues = [self._context.Queue(self.queue_depth)
+                  for _ in range(self.partition_count)]
+        self._start(queues)
+        return [self._read(queues[index], [index])
+                for index in range(len(self.bounds))]
+
+    def close(self):
+        """
+        Stops any worker that is still running.
+        """
+        for worker in self._workers:
+            if worker.is_alive():
+                worker.terminate()
+            worker.join()
+
+
+def partitioned_scan(partitions=4, row_fn=None, ordered=False,
+                     batch_size=1000):
+    """
+    Generator over the merged output of a PartitionedScan.
+
+    Args:
+        partitions (int): Number of key ranges and worker processes
+        row_fn: Picklable per-row function run in the workers
+        ordered (bool): Preserve user_id order across partitions
+        batch_size (int): Rows per fetch and per queue message
+
+    Yields:
+        dict or row_fn result: Rows from all partitions
+    """
+    with PartitionedScan(partitions, row_fn, batch_size) as scan:
+        yield from scan.merged(ordered=ordered)
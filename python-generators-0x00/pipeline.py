@@ -0,0 +1,194 @@
+#!/usr/bin/env python3
+"""
+Small stage-pipeline library over the batch generators.
+
+A pipeline starts from a source of batches (or of rows, which are
+batched), chains map, filter and window stages, and ends in a sink or in
+plain iteration:
+
+    adults = (Pipeline(stream_users_in_batches(1000))
+              .filter(lambda user: user['age'] > 25)
+              .map(lambda user: user['email']))
+    for email in adults:
+        ...
+
+Adjacent map and filter stages are fused into one function applied to
+each whole batch, which runs every stage over the batch in a list
+comprehension instead of one generator frame switch per row and per
+stage. The saving shows most when the output is consumed by batch
+(batches() or sink()); iterating row by row costs about as much as
+hand-written nested generators. window(n) groups items into lists of n
+and is a boundary between fused segments.
+"""
+
+from itertools import islice
+
+
+def _fuse(stages):
+    """
+    Combines consecutive map/filter stages into one batch function.
+
+    Args:
+        stages (list): ('map' | 'filter', function) pairs
+
+    Returns:
+        function: batch (list) -> list of results
+    """
+    stages = tuple(stages)
+
+    def fused(batch):
+        items = batch
+        for kind, function in stages:
+            if kind == 'map':
+                items = [function(item) for item in items]
+            else:
+                items = [item for item in items if function(item)]
+        return items
+    return fused
+
+
+def _map_rows(function, items):
+    for item in items:
+        yield function(item)
+
+
+def _filter_rows(predicate, items):
+    for item in items:
+        if predicate(item):
+            yield item
+
+
+def _row_stages(stages):
+    """
+    Unfused equivalent of _fuse: one generator per stage, per row.
+    """
+    def run(batch):
+        items = iter(batch)
+        for kind, function in stages:
+            if kind == 'map':
+                items = _map_rows(function, items)
+            else:
+                items = _filter_rows(function, items)
+        return list(items)
+    return run
+
+
+def _apply(run, batches):
+    for batch in batches:
+        yield run(batch)
+
+
+def _windows(batches, size):
+    """
+    Regroups a stream of batches into batches of size-item windows.
+
+    A final, shorter window is emitted for the leftover items.
+    """
+    pending = []
+    for batch in batches:
+        pending.extend(batch)
+        if len(pending) < size:
+            continue
+        cut = len(pending) - len(pending) % size
+        yield [pending[i:i + size] for i in range(0, cut, size)]
+        pending = pending[cut:]
+    if pending:
+        yield [pending]
+
+
+class Pipeline:
+    """
+    A lazily evaluated chain of stages over a source of batches.
+
+    Stage methods return a new Pipeline and leave this one's stages
+    unchanged, but every pipeline derived from it reads the same source of
+    batches. When that source is an iterator, such as a generator, only
+    one of them can be run, and only once.
+    """
+
+    def __init__(self, batches, stages=(), fuse=True):
+        """
+        Args:
+            batches: Iterable of lists, e.g. stream_users_in_batches(1000)
+            stages (tuple): Stages added so far (internal)
+            fuse (bool): Fuse adjacent map/filter stages into one loop
+        """
+        self._batches = batches
+        self._stages = tuple(stages)
+        self.fuse = fuse
+
+    @classmethod
+    def from_rows(cls, rows, batch_size=1000, fuse=True):
+        """
+        Builds a pipeline over a row-at-a-time source such as stream_users.
+        """
+        def batched():
+            iterator = iter(rows)
+            while True:
+                batch = list(islice(iterator, batch_size))
+                if not batch:
+                    return
+                yield batch
+        return cls(batched(), fuse=fuse)
+
+    def _then(self, kind, argument):
+        return Pipeline(self._batches, self._stages + ((kind, argument),),
+                        self.fuse)
+
+    def map(self, function):
+        """
+        Adds a stage replacing every item by function(item).
+        """
+        return self._then('map', function)
+
+    def filter(self, predicate):
+        """
+        Adds a stage keeping only the items for which predicate is true.
+        """
+        return self._then('filter', predicate)
+
+    def window(self, size):
+        """
+        Adds a stage grouping items into lists of size items.
+        """
+        if size < 1:
+            raise ValueError("window size must be at least 1")
+        return self._then('window', size)
+
+    def batches(self):
+        """
+        Runs the pipeline and yields its output one batch at a time.
+        """
+        stream = self._batches
+        segment = []
+        for kind, argument in self._stages + (('end', None),):
+            if kind in ('map', 'filter'):
+                segment.append((kind, argument))
+                continue
+            if segment:
+                run = _fuse(segment) if self.fuse else _row_stages(segment)
+                stream = _apply(run, stream)
+                segment = []
+            if kind == 'window':
+                stream = _windows(stream, argument)
+        for batch in stream:
+            if batch:
+                yield batch
+
+    def __iter__(self):
+        for batch in self.batches():
+            yield from batch
+
+    def sink(self, function):
+        """
+        Runs the pipeline, calling function on every output item.
+
+        Returns:
+            int: Number of items passed to function
+        """
+        count = 0
+        for batch in self.batches():
+            for item in batch:
+                function(item)
+            count += len(batch)
+        return count
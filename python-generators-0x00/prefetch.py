@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+Double-buffered prefetching for the batch generators.
+
+prefetch() runs a generator on a background thread and hands its items
+over through a bounded queue, so batch k+1 is fetched from the database
+while the caller is still working on batch k:
+
+    for batch in prefetch(stream_users_in_batches(1000), depth=2):
+        process(batch)
+"""
+
+import queue
+import threading
+
+_END = object()
+
+
+class _Failure:
+    """
+    Carries an exception from the fetch thread to the consumer.
+    """
+
+    def __init__(self, error):
+        self.error = error
+
+
+def prefetch(iterable, depth=2):
+    """
+    Returns a generator over the items of iterable, fetched ahead on a
+    thread.
+
+    The fetch thread blocks once ``depth`` items are waiting, so at most
+    depth + 1 items (plus the one the caller holds) are in memory. If the
+    caller stops early the thread is told to stop and the source is closed
+    on that thread, which runs its cleanup (closing cursor and connection).
+    Exceptions raised while fetching are re-raised in the caller.
+
+    Args:
+        iterable: Source of items, usually a generator over batches
+        depth (int): Maximum number of items fetched ahead
+
+    Returns:
+        generator: The items of iterable, in order. The thread starts on
+            the first next().
+
+    Raises:
+        ValueError: If depth is smaller than 1, when prefetch is called
+    """
+    if depth < 1:
+        raise ValueError("depth must be at least 1")
+    return _prefetch(iterable, depth)
+
+
+def _prefetch(iterable, depth):
+    buffer = queue.Queue(maxsize=depth)
+    stop = threading.Event()
+
+    def put(item):
+        # Block while the buffer is full, but give up once told to stop
+        while not stop.is_set():
+            try:
+                buffer.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def produce():
+        source = iter(iterable)
+        try:
+            for item in source:
+                if not put(item):
+                    break
+            else:
+                put(_END)
+        except BaseException as e:
+            put(_Failure(e))
+        finally:
+            close = getattr(source, 'close', None)
+            if close is not None:
+                close()
+
+    thread = threading.Thread(target=produce, name='prefetch', daemon=True)
+    thread.start()
+    try:
+        while True:
+            item = buffer.get()
+            if item is _END:
+                return
+            if isinstance(item, _Failure):
+                raise item.error
+            yield item
+    finally:
+        stop.set()
+        thread.join()
@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+"""
+Predicate and projection push-down for the user_data generators.
+
+Generators declare the columns they need and their filters; this module
+compiles what it can into the SQL SELECT list and WHERE clause, and keeps
+the rest as residual predicates to be evaluated in Python.
+
+A filter is either a ``(column, op, value)`` tuple, with op one of
+``=``, ``!=``, ``<``, ``<=``, ``>``, ``>=`` or ``in``, or any callable
+taking a row and returning a bool. Callables are always evaluated in
+Python; rows reaching them only contain the selected columns.
+"""
+
+import operator
+from decimal import Decimal
+
+USER_DATA_COLUMNS = ('user_id', 'name', 'email', 'age')
+
+OPERATORS = {
+    '=': operator.eq,
+    '!=': operator.ne,
+    '<': operator.lt,
+    '<=': operator.le,
+    '>': operator.gt,
+    '>=': operator.ge,
+    'in': lambda value, options: value in options,
+}
+
+_SQL_SCALARS = (int, float, str, Decimal)
+
+
+def _is_bindable(op, value):
+    """
+    Tells whether a comparison value can be sent as a query parameter.
+    """
+    if op == 'in':
+        return (isinstance(value, (list, tuple, set, frozenset))
+                and len(value) > 0
+                and all(isinstance(v, _SQL_SCALARS) for v in value))
+    return isinstance(value, _SQL_SCALARS) and not isinstance(value, bool)
+
+
+class ColumnPredicate:
+    """
+    A (column, op, value) filter evaluated in Python.
+
+    Called with a row it returns a bool; mask() evaluates it over a whole
+    columnar batch at once.
+    """
+
+    def __init__(self, column, op, value):
+        self.column = column
+        self.op = op
+        self.value = value
+        self._compare = OPERATORS[op]
+
+    def __call__(self, row):
+        return self._compare(row[self.column], self.value)
+
+    def mask(self, batch):
+        return batch.mask(self.column, self.op, self.value)
+
+
+def compile_select(columns=None, where=(), table='user_data', pushdown=True,
+                   after_user_id=None):
+    """
+    Compiles a projection and filters into a SELECT statement.
+
+    Args:
+        columns (sequence): Column names to select, or None for all columns
+        where (sequence): Filters as described in the module docstring
+        table (str): Table to select from
+        pushdown (bool): When False every filter is left for Python, which
+            reproduces fetch-everything behaviour for comparisons
+        after_user_id (str): When given, only rows after this user_id are
+            selected, in user_id order ('' selects all rows in that order)
+
+    Returns:
+        tuple: (sql, params, residual) where residual is a list of
+            row -> bool functions that still have to be applied
+
+    Raises:
+        ValueError: For unknown columns or operators
+    """
+    selected = list(columns) if columns else list(USER_DATA_COLUMNS)
+    clauses = []
+    params = []
+    residual = []
+
+    for predicate in where:
+        if callable(predicate):
+            residual.append(predicate)
+            continue
+
+        column, op, value = predicate
+        if column not in USER_DATA_COLUMNS:
+            raise ValueError(f"Unknown column: {column}")
+        if op not in OPERATORS:
+            raise ValueError(f"Unsupported operator: {op}")
+
+        if pushdown and _is_bindable(op, value):
+            if op == 'in':
+                placeholders = ', '.join(['%s'] * len(value))
+                clauses.append(f"{column} IN ({placeholders})")
+                params.extend(value)
+            else:
+                clauses.append(f"{column} {op} %s")
+                params.append(value)
+        else:
+            # Python needs the column even if the caller did not ask for it
+            if column not in selected:
+                selected.append(column)
+            residual.append(ColumnPredicate(column, op, value))
+
+    for column in selected:
+        if column not in USER_DATA_COLUMNS:
+            raise ValueError(f"Unknown column: {column}")
+
+    if after_user_id is not None:
+        # Seek on the primary key so a scan can resume where it stopped
+        clauses.insert(0, "user_id > %s")
+        params.insert(0, after_user_id)
+        if 'user_id' not in selected:
+            selected.append('user_id')
+
+    sql = f"SELECT {', '.join(selected)} FROM {table}"
+    if clauses:
+        sql += " WHERE " + " AND ".join(clauses)
+    if after_user_id is not None:
+        sql += " ORDER BY user_id"
+    return sql, tuple(params), residual
+
+
+def _and_masks(left, right):
+    if isinstance(left, list) or isinstance(right, list):
+        return [a and b for a, b in zip(left, right)]
+    return left & right
+
+
+def apply_residual(rows, residual):
+    """
+    Filters rows with the predicates that could not be pushed down.
+
+    Columnar batches are filtered with one mask per predicate; plain
+    callables still see one dictionary per row.
+
+    Args:
+        rows: List of rows as returned by the cursor, or a ColumnBatch
+        residual (list): Predicates returned by compile_select
+
+    Returns:
+        The rows (or batch) for which every predicate holds
+    """
+    if not residual:
+        return rows
+    if hasattr(rows, 'mask'):
+        keep = None
+        for check in residual:
+            if isinstance(check, ColumnPredicate):
+                mask = check.mask(rows)
+            else:
+                mask = [check(row) for row in rows.rows()]
+            keep = mask if keep is None else _and_masks(keep, mask)
+        return rows.filter(keep)
+    return [row for row in rows if all(check(row) for check in residual)]
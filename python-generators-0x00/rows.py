@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+Compact row type for the user_data generators.
+
+UserRow uses __slots__ instead of a per-row dict, and the decoders turn
+the DECIMAL(10,0) age into an int once, while rows are fetched, so that
+consumers never deal with Decimal objects.
+"""
+
+USER_FIELDS = ('user_id', 'name', 'email', 'age')
+
+
+class UserRow:
+    """
+    One user_data row with attribute access.
+
+    ``row['age']`` also works, so code written against dictionary rows
+    keeps running unchanged. Fields that were not selected are None.
+    """
+
+    __slots__ = USER_FIELDS
+
+    def __init__(self, user_id=None, name=None, email=None, age=None):
+        self.user_id = user_id
+        self.name = name
+        self.email = email
+        self.age = age
+
+    def __getitem__(self, key):
+        try:
+            return getattr(self, key)
+        except (AttributeError, TypeError):
+            raise KeyError(key) from None
+
+    def __eq__(self, other):
+        if not isinstance(other, UserRow):
+            return NotImplemented
+        return self.as_tuple() == other.as_tuple()
+
+    def __repr__(self):
+        return (f"UserRow(user_id={self.user_id!r}, name={self.name!r}, "
+                f"email={self.email!r}, age={self.age!r})")
+
+    def as_tuple(self):
+        return (self.user_id, self.name, self.email, self.age)
+
+    def as_dict(self):
+        return dict(zip(USER_FIELDS, self.as_tuple()))
+
+
+def make_decoder(column_names):
+    """
+    Builds a function turning a list of cursor tuples into UserRows.
+
+    Args:
+        column_names (sequence): Column names of the result set, in order
+
+    Returns:
+        function: rows (list of tuples) -> list of UserRow
+
+    Raises:
+        ValueError: If a column is not a user_data field
+    """
+    names = tuple(column_names)
+    for name in names:
+        if name not in USER_FIELDS:
+            raise ValueError(f"Unknown column: {name}")
+
+    if names == USER_FIELDS:
+        # Fast path for the full row
+        def decode(rows):
+            return [UserRow(user_id, name, email, int(age))
+                    for user_id, name, email, age in rows]
+        return decode
+
+    age_index = names.index('age') if 'age' in names else None
+
+    def decode(rows):
+        records = []
+        for values in rows:
+            fields = dict(zip(names, values))
+            if age_index is not None:
+                fields['age'] = int(values[age_index])
+            records.append(UserRow(**fields))
+        return records
+    return decode
@@ -7,7 +7,58 @@ Creates database, table, and populates with user data from CSV.
 import mysql.connector
 from mysql.connector import Error
 import csv
+import hashlib
 import os
+import time
+import weakref
+from decimal import Decimal, ROUND_HALF_UP
+
+from csv_source import CsvUserSource, user_key
+
+# Callbacks run after rows are written to a table (see insert_data)
+_write_listeners = []
+
+# Width of the age buckets kept in user_age_aggregates
+AGE_BUCKET_WIDTH = 10
+
+
+def register_write_listener(callback):
+    """
+    Registers a callback to run after insert_data writes to a table.
+    
+    Bound methods are held weakly, so registering a cache does not keep it
+    alive.
+    
+    Args:
+        callback: Function called with the table name, e.g. 'user_data'
+    """
+    if hasattr(callback, '__self__'):
+        _write_listeners.append(weakref.WeakMethod(callback))
+    else:
+        _write_listeners.append(lambda: callback)
+
+
+def unregister_write_listener(callback):
+    """
+    Removes a callback added with register_write_listener.
+    """
+    _write_listeners[:] = [ref for ref in _write_listeners
+                           if ref() is not None and ref() != callback]
+
+
+def notify_write(table):
+    """
+    Runs the registered write listeners for table.
+    
+    Args:
+        table (str): Name of the table that was written to
+    """
+    for ref in list(_write_listeners):
+        callback = ref()
+        if callback is None:
+            _write_listeners.remove(ref)
+        else:
+            callback(table)
 
 
 def connect_db():
@@ -47,10 +98,14 @@ def create_database(connection):
         print(f"Error creating database: {e}")
 
 
-def connect_to_prodev():
+def connect_to_prodev(allow_local_infile=False):
     """
     Connects to the ALX_prodev database in MySQL.
     
+    Args:
+        allow_local_infile (bool): Allow LOAD DATA LOCAL INFILE on this
+            connection (needed by insert_data with use_load_data=True)
+    
     Returns:
         connection: MySQL connection object or None if connection fails
     """
@@ -60,7 +115,8 @@ def connect_to_prodev():
             user='root',
             password='',
             database='ALX_prodev',
-            port=3306
+            port=3306,
+            allow_local_infile=allow_local_infile
         )
         if connection.is_connected():
             return connection
@@ -73,6 +129,10 @@ def create_table(connection):
     """
     Creates a table user_data if it does not exist with the required fields.
     
+    Also creates user_age_aggregates, the per-bucket age totals kept up to
+    date by insert_data, and fills it if it is new, and user_data_hashes,
+    the row content hashes used by incremental syncs.
+    
     Args:
         connection: MySQL connection object
     """
@@ -88,6 +148,26 @@ def create_table(connection):
         )
         """
         cursor.execute(create_table_query)
+        create_aggregates_query = """
+        CREATE TABLE IF NOT EXISTS user_age_aggregates (
+            bucket INT PRIMARY KEY,
+            row_count BIGINT NOT NULL,
+            age_sum DECIMAL(30, 0) NOT NULL,
+            age_sum_sq DECIMAL(40, 0) NOT NULL
+        )
+        """
+        cursor.execute(create_aggregates_query)
+        create_hashes_query = """
+        CREATE TABLE IF NOT EXISTS user_data_hashes (
+            user_id VARCHAR(36) PRIMARY KEY,
+            row_hash CHAR(32) NOT NULL
+        )
+        """
+        cursor.execute(create_hashes_query)
+        cursor.execute("SELECT COUNT(*) FROM user_age_aggregates")
+        if cursor.fetchone()[0] == 0:
+            # New aggregates table next to an existing user_data
+            rebuild_age_aggregates(cursor)
         connection.commit()
         cursor.close()
         print("Table user_data created successfully")
@@ -95,48 +175,404 @@ def create_table(connection):
         print(f"Error creating table: {e}")
 
 
-def insert_data(connection, data):
+def stored_age(age):
+    """
+    Returns the integer MySQL stores for age in a DECIMAL(10, 0) column.
+    
+    Raises:
+        ArithmeticError, ValueError: If age is not a finite number
+    """
+    return int(Decimal(str(age)).quantize(Decimal(1), rounding=ROUND_HALF_UP))
+
+
+def row_hash(user_id, name, email, age):
+    """
+    Returns a hex digest of a row's content as it is stored in user_data.
+    """
+    content = '\x1f'.join((user_id, name, email, str(stored_age(age))))
+    return hashlib.blake2b(content.encode('utf-8'), digest_size=16).hexdigest()
+
+
+def age_bucket_deltas(ages, sign=1, deltas=None):
+    """
+    Sums ages into per-bucket changes for user_age_aggregates.
+    
+    Args:
+        ages: Iterable of stored (integer) ages
+        sign (int): 1 for added rows, -1 for removed rows
+        deltas (dict): Changes to add to, or None for a new dictionary
+    
+    Returns:
+        dict: bucket -> [row_count, age_sum, age_sum_sq] changes
+    """
+    if deltas is None:
+        deltas = {}
+    for age in ages:
+        delta = deltas.setdefault(age // AGE_BUCKET_WIDTH * AGE_BUCKET_WIDTH,
+                                  [0, 0, 0])
+        delta[0] += sign
+        delta[1] += sign * age
+        delta[2] += sign * age * age
+    return deltas
+
+
+def apply_age_deltas(cursor, deltas):
+    """
+    Adds per-bucket changes to user_age_aggregates.
+    
+    Runs on the caller's cursor, so the changes commit or roll back with the
+    rows they describe.
+    
+    Args:
+        cursor: Cursor of the connection that wrote the rows
+        deltas (dict): Output of age_bucket_deltas
+    """
+    rows = [(bucket, *delta) for bucket, delta in deltas.items()
+            if any(delta)]
+    if not rows:
+        return
+    upsert_query = """
+    INSERT INTO user_age_aggregates (bucket, row_count, age_sum, age_sum_sq)
+    VALUES (%s, %s, %s, %s)
+    ON DUPLICATE KEY UPDATE
+        row_count = row_count + VALUES(row_count),
+        age_sum = age_sum + VALUES(age_sum),
+        age_sum_sq = age_sum_sq + VALUES(age_sum_sq)
+    """
+    cursor.executemany(upsert_query, rows)
+
+
+def rebuild_age_aggregates(cursor):
+    """
+    Recomputes user_age_aggregates from user_data with one scan.
+    
+    The caller commits, so the rebuild is atomic with whatever else the
+    transaction wrote.
+    
+    Args:
+        cursor: MySQL cursor
+    """
+    cursor.execute("DELETE FROM user_age_aggregates")
+    cursor.execute("""
+    INSERT INTO user_age_aggregates (bucket, row_count, age_sum, age_sum_sq)
+    SELECT FLOOR(age / %s) * %s, COUNT(*), SUM(age), SUM(age * age)
+    FROM user_data
+    GROUP BY FLOOR(age / %s) * %s
+    """, (AGE_BUCKET_WIDTH,) * 4)
+
+
+def _read_csv_rows(data):
+    """
+    Yields (user_id, name, email, age) tuples from the CSV file.
+    
+    Args:
+        data: Path to the CSV file containing user data
+    """
+    with open(data, 'r', encoding='utf-8') as file:
+        csv_reader = csv.DictReader(file)
+        for row in csv_reader:
+            yield (
+                row.get('user_id', '').strip(),
+                row.get('name', '').strip(),
+                row.get('email', '').strip(),
+                row.get('age', '').strip(),
+            )
+
+
+def _insert_batch(cursor, batch):
+    """
+    Inserts one batch with INSERT IGNORE and adds the rows that were new
+    to user_age_aggregates and user_data_hashes.
+    
+    The batch's user_ids are looked up (and locked) with one SELECT, so
+    the aggregates only count rows the insert actually adds.
+    
+    Returns:
+        int: Number of rows inserted
+    
+    Raises:
+        Error: If the insert added other rows than the ones counted
+    """
+    placeholders = ', '.join(['%s'] * len(batch))
+    cursor.execute(
+        f"SELECT user_id FROM user_data WHERE user_id IN ({placeholders}) "
+        "FOR UPDATE",
+        [row[0] for row in batch]
+    )
+    seen = {user_key(row[0]) for row in cursor.fetchall()}
+    new_rows = []
+    for row in batch:
+        # INSERT IGNORE keeps the first of user_ids equal under the key's
+        # collation
+        key = user_key(row[0])
+        if key not in seen:
+            seen.add(key)
+            new_rows.append(row)
+
+    insert_query = """
+    INSERT IGNORE INTO user_data (user_id, name, email, age)
+    VALUES (%s, %s, %s, %s)
+    """
+    cursor.executemany(insert_query, batch)
+    inserted = max(cursor.rowcount, 0)
+    if inserted != len(new_rows):
+        # The caller rolls back rather than commit drifting aggregates
+        raise Error(f"Inserted {inserted} rows but counted {len(new_rows)} "
+                    "new ones")
+    apply_age_deltas(cursor, age_bucket_deltas(
+        stored_age(row[3]) for row in new_rows))
+    if new_rows:
+        # Hashes describe stored content, so only the new rows get one
+        cursor.executemany(
+            "INSERT IGNORE INTO user_data_hashes (user_id, row_hash) "
+            "VALUES (%s, %s)",
+            [(row[0], row_hash(*row)) for row in new_rows]
+        )
+    return inserted
+
+
+def _insert_batches(connection, data, batch_size):
+    """
+    Inserts CSV rows with multi-row INSERT IGNORE statements.
+    
+    Existing user_ids are skipped by the primary key instead of a SELECT
+    per row, and the transaction is committed after every batch, together
+    with the batch's changes to user_age_aggregates. Rows whose age is not
+    a number are skipped and counted.
+    
+    Returns:
+        tuple: (rows read, rows inserted, rows skipped)
+    """
+    cursor = connection.cursor()
+    read = inserted = skipped = 0
+    batch = []
+    try:
+        for row in _read_csv_rows(data):
+            read += 1
+            try:
+                stored_age(row[3])
+            except (ArithmeticError, ValueError):
+                skipped += 1
+                continue
+            batch.append(row)
+            if len(batch) >= batch_size:
+                inserted += _insert_batch(cursor, batch)
+                connection.commit()
+                batch = []
+        if batch:
+            inserted += _insert_batch(cursor, batch)
+            connection.commit()
+    except Exception:
+        # Never commit a batch without its aggregate changes
+        connection.rollback()
+        raise
+    finally:
+        cursor.close()
+    return read, inserted, skipped
+
+
+def _load_data_infile(connection, data):
+    """
+    Loads the whole CSV file with LOAD DATA LOCAL INFILE ... IGNORE.
+    
+    The connection must have been opened with allow_local_infile=True.
+    Fields are loaded as they are in the file, without stripping. The
+    loaded rows are not known individually, so user_age_aggregates is
+    rebuilt in the same transaction; their hashes are filled in by the
+    next incremental sync.
+    
+    Returns:
+        tuple: (rows read, rows inserted)
+    """
+    load_query = """
+    LOAD DATA LOCAL INFILE %s IGNORE INTO TABLE user_data
+    FIELDS TERMINATED BY ',' OPTIONALLY ENCLOSED BY '"'
+    LINES TERMINATED BY '\\n'
+    IGNORE 1 LINES
+    (user_id, name, email, age)
+    """
+    cursor = connection.cursor()
+    cursor.execute(load_query, (os.path.abspath(data),))
+    inserted = max(cursor.rowcount, 0)
+    rebuild_age_aggregates(cursor)
+    connection.commit()
+    cursor.close()
+    with open(data, 'r', encoding='utf-8') as file:
+        read = max(sum(1 for _ in file) - 1, 0)
+    return read, inserted
+
+
+def _stored_rows(connection):
+    """
+    Yields (user_key, row_hash, age) for every stored row in key order.
+    
+    Rows are ordered by the bytes of the lower-cased user_id, whatever the
+    table's character set, which is the order of sorted() over user_key();
+    row_hash is None for rows that have no hash yet.
+    """
+    cursor = connection.cursor()
+    try:
+        cursor.execute("""
+        SELECT d.user_id, h.row_hash, d.age
+        FROM user_data d
+        LEFT JOIN user_data_hashes h ON h.user_id = d.user_id
+        ORDER BY CAST(LOWER(d.user_id) AS BINARY)
+        """)
+        for user_id, stored_hash, age in cursor:
+            yield user_key(user_id), stored_hash, int(age)
+    finally:
+        try:
+            cursor.close()
+        except Error:
+            # Stored rows keyed after the CSV's last row are left unread;
+            # closing the connection discards them
+            pass
+
+
+def _upsert_batch(cursor, batch, deltas):
+    """
+    Writes new and changed rows, their hashes and their aggregate deltas.
+    """
+    cursor.executemany("""
+    INSERT INTO user_data (user_id, name, email, age)
+    VALUES (%s, %s, %s, %s)
+    ON DUPLICATE KEY UPDATE
+        name = VALUES(name), email = VALUES(email), age = VALUES(age)
+    """, [row for row, _ in batch])
+    cursor.executemany("""
+    INSERT INTO user_data_hashes (user_id, row_hash)
+    VALUES (%s, %s)
+    ON DUPLICATE KEY UPDATE row_hash = VALUES(row_hash)
+    """, [(row[0], new_hash) for row, new_hash in batch])
+    apply_age_deltas(cursor, deltas)
+
+
+def _sync_batches(connection, data, batch_size):
+    """
+    Applies new and changed CSV rows, found by a sorted merge.
+    
+    The CSV rows are walked in user_key() order through the csv_source
+    offset index while the stored (key, hash) pairs stream from a second
+    connection in the same order, so each side is read once and no row is
+    looked up on its own. Keys are compared as the primary key compares
+    them, and of CSV rows sharing a key only the first is applied, as with
+    INSERT IGNORE. Rows whose hash differs are upserted in batches, each
+    committed with its changes to user_age_aggregates. Stored rows that
+    are missing from the CSV are left alone, and CSV rows whose age is not
+    a number are skipped.
+    
+    Returns:
+        tuple: (distinct rows read, rows new, rows changed, rows skipped)
+    """
+    reader = connect_to_prodev()
+    if not reader:
+        raise Error("Could not open a reading connection")
+    source = CsvUserSource(data)
+    cursor = connection.cursor()
+    read = new = changed = skipped = 0
+    batch = []
+    deltas = {}
+    stored = _stored_rows(reader)
+    try:
+        current = next(stored, None)
+        # The index keeps only the first CSV row of each key
+        for key in sorted(source.index()):
+            read += 1
+            try:
+                user = source.get(key)
+            except (ArithmeticError, ValueError):
+                skipped += 1
+                continue
+            row = (user['user_id'], user['name'], user['email'], int(user['age']))
+            new_hash = row_hash(*row)
+            while current is not None and current[0] < key:
+                current = next(stored, None)
+            if current is not None and current[0] == key:
+                if current[1] == new_hash:
+                    continue
+                changed += 1
+                age_bucket_deltas([current[2]], -1, deltas)
+            else:
+                new += 1
+            age_bucket_deltas([row[3]], 1, deltas)
+            batch.append((row, new_hash))
+            if len(batch) >= batch_size:
+                _upsert_batch(cursor, batch, deltas)
+                connection.commit()
+                batch = []
+                deltas = {}
+        if batch:
+            _upsert_batch(cursor, batch, deltas)
+            connection.commit()
+    except Exception:
+        connection.rollback()
+        raise
+    finally:
+        try:
+            stored.close()
+            cursor.close()
+            source.close()
+        finally:
+            reader.close()
+    return read, new, changed, skipped
+
+
+def insert_data(connection, data, batch_size=1000, use_load_data=False,
+                incremental=False):
     """
     Inserts data from CSV file into the database if it does not exist.
     
+    Rows are written in batches of batch_size with INSERT IGNORE, so rows
+    whose user_id already exists are skipped without a round-trip each.
+    user_age_aggregates is updated in the same transaction as the rows.
+    
+    With incremental=True, existing rows are compared instead of skipped:
+    each CSV row's content hash is merged against user_data_hashes and only
+    new and changed rows are upserted.
+    
     Args:
         connection: MySQL connection object
         data: Path to the CSV file containing user data
+        batch_size (int): Number of rows per INSERT and per commit
+        use_load_data (bool): Bulk load with LOAD DATA LOCAL INFILE instead
+        incremental (bool): Also apply changes to existing rows
+    
+    Returns:
+        int: Number of rows inserted (or, when incremental, inserted or
+            updated), or None on error
     """
     if not os.path.exists(data):
         print(f"Error: CSV file {data} not found")
         return
     
     try:
-        cursor = connection.cursor()
-        
-        with open(data, 'r', encoding='utf-8') as file:
-            csv_reader = csv.DictReader(file)
-            
-            for row in csv_reader:
-                user_id = row.get('user_id', '').strip()
-                name = row.get('name', '').strip()
-                email = row.get('email', '').strip()
-                age = row.get('age', '').strip()
-                
-                # Check if record already exists
-                check_query = "SELECT user_id FROM user_data WHERE user_id = %s"
-                cursor.execute(check_query, (user_id,))
-                if cursor.fetchone():
-                    continue  # Skip if already exists
-                
-                # Insert new record
-                insert_query = """
-                INSERT INTO user_data (user_id, name, email, age)
-                VALUES (%s, %s, %s, %s)
-                """
-                cursor.execute(insert_query, (user_id, name, email, age))
-        
-        connection.commit()
-        cursor.close()
+        start = time.perf_counter()
+        if incremental:
+            read, inserted, changed, skipped = _sync_batches(
+                connection, data, batch_size)
+            if skipped:
+                print(f"Skipped {skipped} rows with a malformed age")
+        elif use_load_data:
+            read, inserted = _load_data_infile(connection, data)
+        else:
+            read, inserted, skipped = _insert_batches(connection, data,
+                                                      batch_size)
+            if skipped:
+                print(f"Skipped {skipped} rows with a malformed age")
+        elapsed = time.perf_counter() - start
+        rate = read / elapsed if elapsed > 0 else float(read)
         print(f"Data inserted successfully from {data}")
+        if incremental:
+            print(f"{inserted} new and {changed} changed of {read} rows "
+                  f"applied in {elapsed:.2f}s ({rate:.0f} rows/s)")
+            return inserted + changed
+        print(f"{inserted} of {read} rows inserted in {elapsed:.2f}s "
+              f"({rate:.0f} rows/s)")
+        return inserted
     except Error as e:
         print(f"Error inserting data: {e}")
     except Exception as e:
         print(f"Error reading CSV file: {e}")
-
+    finally:
+        # Batches may have been committed even if a later one failed
+        notify_write('user_data')
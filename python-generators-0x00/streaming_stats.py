@@ -0,0 +1,234 @@
+#!/usr/bin/env python3
+"""
+One-pass, constant-memory statistics over a stream of numbers.
+
+StreamingStats keeps count, mean and variance (Welford / Chan et al.),
+min, max, a fixed-width histogram and a KLL quantile sketch. Accumulators
+built by different workers over disjoint parts of a stream can be merged
+into one, and pickle cleanly so they can be returned from subprocesses.
+"""
+
+import math
+import random
+
+
+class KLLSketch:
+    """
+    KLL quantile sketch (Karnin, Lang, Liberty 2016).
+
+    Memory is O(k) items regardless of stream length; rank error is
+    roughly 1.65 / k with high probability.
+    """
+
+    def __init__(self, k=200, seed=None):
+        """
+        Args:
+            k (int): Accuracy parameter, the capacity of the top compactor
+            seed (int): Seed for the compaction coin flips
+        """
+        self.k = k
+        self.count = 0
+        self.compactors = [[]]
+        self._max_size = 0
+        self._rng = random.Random(seed)
+        self._update_max_size()
+
+    def _capacity(self, level):
+        depth = len(self.compactors) - level - 1
+        return max(2, int(math.ceil(self.k * (2 / 3) ** depth)))
+
+    def _update_max_size(self):
+        self._max_size = sum(
+            self._capacity(level) for level in range(len(self.compactors))
+        )
+
+    def _size(self):
+        return sum(len(compactor) for compactor in self.compactors)
+
+    def update(self, value):
+        """
+        Adds one value to the sketch.
+        """
+        self.compactors[0].append(value)
+        self.count += 1
+        if len(self.compactors[0]) >= self._capacity(0):
+            self._compress()
+
+    def _compress(self):
+        while self._size() >= self._max_size:
+            for level, items in enumerate(self.compactors):
+                if len(items) < self._capacity(level):
+                    continue
+                if level + 1 == len(self.compactors):
+                    self.compactors.append([])
+                    self._update_max_size()
+                items.sort()
+                # An odd item out stays behind so no weight is lost
+                leftover = [items.pop()] if len(items) % 2 else []
+                start = self._rng.randint(0, 1)
+                self.compactors[level + 1].extend(items[start::2])
+                self.compactors[level] = leftover
+                break
+
+    def merge(self, other):
+        """
+        Folds another sketch into this one.
+
+        Args:
+            other (KLLSketch): Sketch built over a disjoint part of the stream
+
+        Returns:
+            KLLSketch: self
+        """
+        while len(self.compactors) < len(other.compactors):
+            self.compactors.append([])
+        for level, items in enumerate(other.compactors):
+            self.compactors[level].extend(items)
+        self.count += other.count
+        self._update_max_size()
+        self._compress()
+        return self
+
+    def quantile(self, q):
+        """
+        Returns the approximate q-quantile, for q in [0, 1].
+        """
+        weighted = sorted(
+            (value, 1 << level)
+            for level, items in enumerate(self.compactors)
+            for value in items
+        )
+        if not weighted:
+            return None
+        total = sum(weight for _, weight in weighted)
+        target = q * total
+        seen = 0
+        for value, weight in weighted:
+            seen += weight
+            if seen >= target:
+                return value
+        return weighted[-1][0]
+
+
+class StreamingStats:
+    """
+    Mergeable accumulator for count, mean, variance, min, max, histogram
+    and approximate percentiles of a numeric stream.
+    """
+
+    def __init__(self, bin_width=10, k=200, seed=None):
+        """
+        Args:
+            bin_width (number): Width of each histogram bin
+            k (int): Accuracy parameter of the quantile sketch
+            seed (int): Seed for the quantile sketch
+        """
+        self.bin_width = bin_width
+        self.count = 0
+        self.mean = 0.0
+        self._m2 = 0.0
+        self.min = None
+        self.max = None
+        self.histogram = {}
+        self.sketch = KLLSketch(k=k, seed=seed)
+
+    def update(self, value):
+        """
+        Adds a single value.
+        """
+        self.update_batch((value,))
+
+    def update_batch(self, values):
+        """
+        Adds a batch of values in one pass.
+
+        Args:
+            values (sequence): Numbers to add
+        """
+        values = list(values)
+        n = len(values)
+        if n == 0:
+            return
+
+        batch_mean = sum(values) / n
+        batch_m2 = sum((v - batch_mean) ** 2 for v in values)
+        self._combine(n, batch_mean, batch_m2)
+
+        low, high = min(values), max(values)
+        self.min = low if self.min is None else min(self.min, low)
+        self.max = high if self.max is None else max(self.max, high)
+
+        histogram = self.histogram
+        width = self.bin_width
+        sketch_update = self.sketch.update
+        for value in values:
+            bucket = (value // width) * width
+            histogram[bucket] = histogram.get(bucket, 0) + 1
+            sketch_update(value)
+
+    def _combine(self, n, mean, m2):
+        # Chan et al. parallel update of count, mean and sum of squares
+        total = self.count + n
+        delta = mean - self.mean
+        self.mean += delta * n / total
+        self._m2 += m2 + delta * delta * self.count * n / total
+        self.count = total
+
+    def merge(self, other):
+        """
+        Folds in the partial result of another worker.
+
+        Args:
+            other (StreamingStats): Accumulator with the same bin_width
+
+        Returns:
+            StreamingStats: self
+
+        Raises:
+            ValueError: If the histogram bin widths differ
+        """
+        if other.bin_width != self.bin_width:
+            raise ValueError("Cannot merge histograms with different bin widths")
+        if other.count == 0:
+            return self
+        self._combine(other.count, other.mean, other._m2)
+        self.min = other.min if self.min is None else min(self.min, other.min)
+        self.max = other.max if self.max is None else max(self.max, other.max)
+        for bucket, count in other.histogram.items():
+            self.histogram[bucket] = self.histogram.get(bucket, 0) + count
+        self.sketch.merge(other.sketch)
+        return self
+
+    @property
+    def variance(self):
+        """
+        Population variance of the values seen so far.
+        """
+        return self._m2 / self.count if self.count else 0.0
+
+    @property
+    def stddev(self):
+        return math.sqrt(self.variance)
+
+    def percentile(self, p):
+        """
+        Returns the approximate p-th percentile, for p in [0, 100].
+        """
+        return self.sketch.quantile(p / 100)
+
+    def summary(self):
+        """
+        Returns every statistic as a plain dictionary.
+        """
+        return {
+            'count': self.count,
+            'mean': self.mean,
+            'min': self.min,
+            'max': self.max,
+            'variance': self.variance,
+            'stddev': self.stddev,
+            'p50': self.percentile(50),
+            'p95': self.percentile(95),
+            'p99': self.percentile(99),
+            'histogram': dict(sorted(self.histogram.items())),
+        }
@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""Tests for the memory-mapped CSV user source"""
+import json
+import os
+import sys
+import tempfile
+import unittest
+from decimal import Decimal
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from csv_source import CsvUserSource, user_key  # noqa: E402
+from rows import UserRow  # noqa: E402
+
+CSV_TEXT = (
+    'user_id,name,email,age\n'
+    'c0000000-0000-0000-0000-000000000003,Carol,carol@example.com,40\n'
+    'A0000000-0000-0000-0000-000000000001,Alice,alice@example.com,25.5\n'
+    'b0000000-0000-0000-0000-000000000002,"Bob, Jr.",bob@example.com,19\n'
+    'a0000000-0000-0000-0000-000000000001,Alice Again,alice2@example.com,30\n'
+    'd0000000-0000-0000-0000-000000000004,Dan,dan@example.com,67\n'
+)
+
+
+class TestCsvUserSource(unittest.TestCase):
+    """Test class for CsvUserSource"""
+
+    def setUp(self):
+        """Writes a small CSV with a case-only duplicate user_id"""
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.path = os.path.join(self.tmp.name, 'users.csv')
+        with open(self.path, 'w', encoding='utf-8', newline='') as file:
+            file.write(CSV_TEXT)
+
+    def _source(self):
+        source = CsvUserSource(self.path)
+        self.addCleanup(source.close)
+        return source
+
+    def test_index_dedupes_by_user_key(self):
+        """Test ids differing only by case share the first row's entry"""
+        index = self._source().index()
+        self.assertEqual(len(index), 4)
+        self.assertEqual(set(index), {user_key(line.split(',')[0])
+                                      for line in CSV_TEXT.splitlines()[1:]})
+
+    def test_index_is_saved_and_reused(self):
+        """Test the saved index is loaded by a later source"""
+        index = self._source().index()
+        with open(self.path + '.idx', encoding='utf-8') as file:
+            saved = json.load(file)
+        self.assertEqual(saved['offsets'], index)
+        saved['offsets'] = {key: 0 for key in index}
+        with open(self.path + '.idx', 'w', encoding='utf-8') as file:
+            json.dump(saved, file)
+        # An up-to-date index file is trusted as it is
+        self.assertEqual(set(self._source().index().values()), {0})
+
+    def test_index_is_rebuilt_when_stale(self):
+        """Test a changed CSV or an old index format triggers a rebuild"""
+        first = self._source().index()
+        with open(self.path, 'a', encoding='utf-8') as file:
+            file.write('e0000000-0000-0000-0000-000000000005,Eve,'
+                       'eve@example.com,50\n')
+        self.assertEqual(len(self._source().index()), len(first) + 1)
+
+        with open(self.path + '.idx', encoding='utf-8') as file:
+            saved = json.load(file)
+        del saved['version']
+        saved['offsets'] = {}
+        with open(self.path + '.idx', 'w', encoding='utf-8') as file:
+            json.dump(saved, file)
+        self.assertEqual(len(self._source().index()), len(first) + 1)
+
+    def test_get(self):
+        """Test lookups ignore case and return the first matching row"""
+        source = self._source()
+        user = source.get('a0000000-0000-0000-0000-000000000001')
+        self.assertEqual(user, {
+            'user_id': 'A0000000-0000-0000-0000-000000000001',
+            'name': 'Alice', 'email': 'alice@example.com',
+            'age': Decimal(26)})
+        self.assertEqual(
+            source.get('B0000000-0000-0000-0000-000000000002', 'record'),
+            UserRow('b0000000-0000-0000-0000-000000000002', 'Bob, Jr.',
+                    'bob@example.com', 19))
+        self.assertIsNone(source.get('missing'))
+
+    def test_stream_users_file_order(self):
+        """Test rows stream in file order without later duplicates"""
+        names = [user['name'] for user in self._source().stream_users()]
+        self.assertEqual(names, ['Carol', 'Alice', 'Bob, Jr.', 'Dan'])
+
+    def test_stream_users_resume_after(self):
+        """Test resume_after streams in key order past the given id"""
+        source = self._source()
+        names = [user.name for user in source.stream_users(
+            'record', resume_after='A0000000-0000-0000-0000-000000000001')]
+        self.assertEqual(names, ['Bob, Jr.', 'Carol', 'Dan'])
+
+    def test_stream_users_in_batches(self):
+        """Test batching, filters and column selection"""
+        source = self._source()
+        sizes = [len(batch) for batch in source.stream_users_in_batches(3)]
+        self.assertEqual(sizes, [3, 1])
+        batches = list(source.stream_users_in_batches(
+            2, columns=['name'], where=[('age', '>', 25)]))
+        # The first batch keeps Carol and Alice, the second only Dan
+        self.assertEqual(batches, [[{'name': 'Carol'}, {'name': 'Alice'}],
+                                   [{'name': 'Dan'}]])
+
+
+if __name__ == "__main__":
+    unittest.main()
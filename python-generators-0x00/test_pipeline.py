@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""Tests for the fused stage pipeline"""
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from pipeline import Pipeline  # noqa: E402
+
+
+def _users(count):
+    return [{'user_id': str(i), 'email': f"user{i}@example.com",
+             'age': 18 + i % 50} for i in range(count)]
+
+
+def _batches(rows, size):
+    return [rows[i:i + size] for i in range(0, len(rows), size)]
+
+
+class TestPipeline(unittest.TestCase):
+    """Test class for Pipeline"""
+
+    def setUp(self):
+        """Builds 250 synthetic users in batches of 40"""
+        self.users = _users(250)
+        self.batches = _batches(self.users, 40)
+
+    def _chain(self, fuse):
+        return (Pipeline(self.batches, fuse=fuse)
+                .filter(lambda user: user['age'] > 25)
+                .map(lambda user: user['email'])
+                .map(str.upper))
+
+    def test_map_and_filter(self):
+        """Test stages run in order and match plain Python"""
+        expected = [user['email'].upper() for user in self.users
+                    if user['age'] > 25]
+        self.assertEqual(list(self._chain(fuse=True)), expected)
+
+    def test_fused_matches_unfused(self):
+        """Test fusion changes nothing but speed"""
+        self.assertEqual(list(self._chain(fuse=True)),
+                         list(self._chain(fuse=False)))
+        self.assertEqual(
+            [len(batch) for batch in self._chain(fuse=True).batches()],
+            [len(batch) for batch in self._chain(fuse=False).batches()])
+
+    def test_filter_uses_truthiness(self):
+        """Test filter keeps items whose predicate result is truthy"""
+        pipeline = Pipeline([[0, 1, 2, 3, 4]]).map(lambda n: n % 3).filter(
+            lambda n: n)
+        self.assertEqual(list(pipeline), [1, 2, 1])
+
+    def test_empty_batches_are_skipped(self):
+        """Test batches emptied by a filter are not yielded"""
+        pipeline = Pipeline(self.batches).filter(
+            lambda user: user['user_id'] == '100')
+        self.assertEqual([len(batch) for batch in pipeline.batches()], [1])
+
+    def test_window(self):
+        """Test windows span source batches and keep a short last one"""
+        pipeline = Pipeline([[1, 2, 3], [4], [5, 6, 7, 8, 9]]).window(4)
+        self.assertEqual(list(pipeline), [[1, 2, 3, 4], [5, 6, 7, 8], [9]])
+        fused = (Pipeline([[1, 2, 3], [4, 5]]).map(lambda n: n * 10)
+                 .window(2).map(sum))
+        self.assertEqual(list(fused), [30, 70, 50])
+        with self.assertRaises(ValueError):
+            Pipeline([]).window(0)
+
+    def test_from_rows_and_sink(self):
+        """Test a row source is batched and sink counts its items"""
+        seen = []
+        pipeline = Pipeline.from_rows(iter(range(10)), batch_size=3)
+        count = pipeline.filter(lambda n: n % 2).sink(seen.append)
+        self.assertEqual(count, 5)
+        self.assertEqual(seen, [1, 3, 5, 7, 9])
+
+    def test_derived_pipelines_keep_stages(self):
+        """Test extending a pipeline leaves its own stages unchanged"""
+        base = Pipeline(self.batches).map(lambda user: user['age'])
+        adults = base.filter(lambda age: age > 60)
+        self.assertEqual(len(list(base)), len(self.users))
+        self.assertTrue(all(age > 60 for age in adults))
+
+    def test_derived_pipelines_share_an_iterator_source(self):
+        """Test pipelines over one generator consume the same batches"""
+        source = iter(self.batches)
+        base = Pipeline(source)
+        doubled = base.map(lambda user: user['age'] * 2)
+        self.assertEqual(len(list(doubled)), len(self.users))
+        self.assertEqual(list(base), [])
+
+    def test_errors_propagate(self):
+        """Test an exception raised by a stage reaches the consumer"""
+        pipeline = Pipeline([[1, 0, 2]]).map(lambda n: 1 / n)
+        with self.assertRaises(ZeroDivisionError):
+            list(pipeline)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""Tests for the background-thread prefetcher"""
+import os
+import sys
+import threading
+import time
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from prefetch import prefetch  # noqa: E402
+
+
+class Source:
+    """Generator wrapper recording how far it was read and if it closed"""
+
+    def __init__(self, count, fail_at=None):
+        self.count = count
+        self.fail_at = fail_at
+        self.produced = 0
+        self.closed = threading.Event()
+
+    def __iter__(self):
+        try:
+            for item in range(self.count):
+                if item == self.fail_at:
+                    raise RuntimeError(f"fetch {item} failed")
+                self.produced += 1
+                yield item
+        finally:
+            self.closed.set()
+
+
+class TestPrefetch(unittest.TestCase):
+    """Test class for prefetch"""
+
+    def test_yields_everything_in_order(self):
+        """Test every item arrives, in order, and the source is closed"""
+        source = Source(100)
+        self.assertEqual(list(prefetch(iter(source), depth=3)),
+                         list(range(100)))
+        self.assertTrue(source.closed.is_set())
+
+    def test_invalid_depth_raises_on_call(self):
+        """Test a bad depth fails when prefetch is called, not on next()"""
+        with self.assertRaises(ValueError):
+            prefetch([1, 2, 3], depth=0)
+
+    def test_early_break_closes_source(self):
+        """Test stopping early stops the thread and closes the source"""
+        source = Source(10000)
+        before = threading.active_count()
+        for item in prefetch(iter(source), depth=2):
+            if item == 5:
+                break
+        self.assertTrue(source.closed.wait(5))
+        self.assertEqual(threading.active_count(), before)
+        self.assertLess(source.produced, 10)
+
+    def test_errors_are_reraised(self):
+        """Test an exception in the source reaches the caller after the
+        items fetched before it"""
+        source = Source(10, fail_at=4)
+        seen = []
+        with self.assertRaisesRegex(RuntimeError, "fetch 4 failed"):
+            for item in prefetch(iter(source), depth=2):
+                seen.append(item)
+        self.assertEqual(seen, [0, 1, 2, 3])
+        self.assertTrue(source.closed.is_set())
+
+    def test_back_pressure(self):
+        """Test the thread stops fetching once depth items are waiting"""
+        source = Source(1000)
+        items = prefetch(iter(source), depth=3)
+        self.assertEqual(next(items), 0)
+        time.sleep(0.3)
+        # One item held by the caller, depth in the queue and one waiting
+        # to be put
+        self.assertLessEqual(source.produced, 1 + 3 + 1)
+        items.close()
+        self.assertTrue(source.closed.wait(5))
+
+
+if __name__ == "__main__":
+    unittest.main()
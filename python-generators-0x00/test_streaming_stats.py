@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""Tests for the one-pass statistics accumulator"""
+import bisect
+import os
+import pickle
+import random
+import statistics
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from streaming_stats import KLLSketch, StreamingStats  # noqa: E402
+
+
+def _rank_error(data, value, q):
+    """Distance between q and the normalized rank range of value in data"""
+    low = bisect.bisect_left(data, value) / len(data)
+    high = bisect.bisect_right(data, value) / len(data)
+    if low <= q <= high:
+        return 0.0
+    return min(abs(q - low), abs(q - high))
+
+
+class TestStreamingStats(unittest.TestCase):
+    """Test class for StreamingStats"""
+
+    def setUp(self):
+        """Builds a reproducible stream of ages"""
+        generator = random.Random(1)
+        self.values = [generator.randint(18, 120) for _ in range(20000)]
+
+    def test_mean_and_variance(self):
+        """Test Welford mean and variance match the statistics module"""
+        stats = StreamingStats()
+        for value in self.values[:1000]:
+            stats.update(value)
+        stats.update_batch(self.values[1000:])
+        self.assertEqual(stats.count, len(self.values))
+        self.assertAlmostEqual(stats.mean, statistics.fmean(self.values))
+        self.assertAlmostEqual(stats.variance,
+                               statistics.pvariance(self.values), places=6)
+        self.assertAlmostEqual(stats.stddev, statistics.pstdev(self.values),
+                               places=6)
+        self.assertEqual((stats.min, stats.max),
+                         (min(self.values), max(self.values)))
+
+    def test_large_offset_is_stable(self):
+        """Test variance stays accurate for values far from zero"""
+        values = [1e9 + v for v in self.values[:5000]]
+        stats = StreamingStats()
+        stats.update_batch(values)
+        self.assertAlmostEqual(stats.variance,
+                               statistics.pvariance(self.values[:5000]),
+                               places=3)
+
+    def test_percentiles_within_error_bound(self):
+        """Test KLL percentiles stay within the sketch's rank error"""
+        stats = StreamingStats(k=200, seed=7)
+        stats.update_batch(self.values)
+        data = sorted(self.values)
+        for p in (1, 10, 25, 50, 75, 90, 95, 99):
+            error = _rank_error(data, stats.percentile(p), p / 100)
+            self.assertLessEqual(error, 0.02, f"p{p}")
+
+    def test_sketch_memory_is_bounded(self):
+        """Test the sketch keeps O(k) items however long the stream"""
+        sketch = KLLSketch(k=100, seed=3)
+        for value in range(200000):
+            sketch.update(value)
+        self.assertEqual(sketch.count, 200000)
+        self.assertLess(sum(len(items) for items in sketch.compactors), 1000)
+
+    def test_merge_of_partials(self):
+        """Test merged partial accumulators equal one over the whole stream"""
+        parts = [self.values[i::4] for i in range(4)]
+        partials = []
+        for index, part in enumerate(parts):
+            partial = StreamingStats(seed=index)
+            partial.update_batch(part)
+            # Partials come back from worker processes pickled
+            partials.append(pickle.loads(pickle.dumps(partial)))
+        merged = StreamingStats(seed=9)
+        for partial in partials:
+            merged.merge(partial)
+        whole = StreamingStats()
+        whole.update_batch(self.values)
+
+        self.assertEqual(merged.count, whole.count)
+        self.assertAlmostEqual(merged.mean, whole.mean)
+        self.assertAlmostEqual(merged.variance, whole.variance, places=6)
+        self.assertEqual((merged.min, merged.max), (whole.min, whole.max))
+        self.assertEqual(merged.histogram, whole.histogram)
+        self.assertEqual(merged.sketch.count, len(self.values))
+        data = sorted(self.values)
+        for p in (5, 50, 95):
+            self.assertLessEqual(
+                _rank_error(data, merged.percentile(p), p / 100), 0.02)
+
+    def test_merge_edge_cases(self):
+        """Test merging empty accumulators and mismatched bin widths"""
+        stats = StreamingStats()
+        stats.merge(StreamingStats())
+        self.assertEqual(stats.count, 0)
+        self.assertIsNone(stats.percentile(50))
+        other = StreamingStats()
+        other.update_batch([1, 2, 3])
+        stats.merge(other)
+        self.assertEqual((stats.count, stats.mean, stats.min), (3, 2.0, 1))
+        with self.assertRaises(ValueError):
+            stats.merge(StreamingStats(bin_width=5))
+
+    def test_histogram(self):
+        """Test values are counted in bins of bin_width"""
+        stats = StreamingStats(bin_width=10)
+        stats.update_batch([18, 19, 20, 29, 30, 120])
+        self.assertEqual(stats.summary()["histogram"],
+                         {10: 2, 20: 2, 30: 1, 120: 1})
+
+
+if __name__ == "__main__":
+    unittest.main()